@@ -0,0 +1,43 @@
+"""
+Benchmarks minimum_spanning_tree against the dense scipy path it replaced.
+
+The scipy path builds the full N x N distance matrix, so it is only run while that
+matrix stays small. The Boruvka engine is run serially and with all cores.
+
+Usage: python prototype/benchmarks/mst.py
+"""
+
+from time import perf_counter
+
+import numpy as np
+from scipy.sparse import csr_matrix
+from scipy.sparse.csgraph import minimum_spanning_tree as scipy_mst
+from scipy.spatial.distance import pdist, squareform
+from sklearn.datasets import make_blobs
+
+from dataeval._internal.functional.utils import minimum_spanning_tree
+
+
+def dense_scipy_mst(X):
+    return scipy_mst(csr_matrix(squareform(pdist(X)) + 1e-5)).tocoo()
+
+
+def timeit(fn, *args, **kwargs):
+    start = perf_counter()
+    result = fn(*args, **kwargs)
+    return perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    print(f"{'samples':>10} {'scipy (s)':>10} {'n_jobs=1 (s)':>13} {'n_jobs=-1 (s)':>14} {'same weight':>12}")
+    for n in (2_000, 10_000, 20_000, 100_000, 500_000):
+        X = make_blobs(n, centers=10, n_features=8, random_state=0)[0].astype(np.float64)
+        serial, (_, _, weights) = timeit(minimum_spanning_tree, X, n_jobs=1)
+        parallel, (_, _, parallel_weights) = timeit(minimum_spanning_tree, X, n_jobs=-1)
+        same = np.isclose(weights.sum(), parallel_weights.sum())
+        if n <= 10_000:
+            dense, tree = timeit(dense_scipy_mst, X)
+            same &= np.isclose(weights.sum(), tree.data.sum() - 1e-5 * (n - 1))
+        else:
+            dense = float("nan")
+        print(f"{n:>10} {dense:>10.2f} {serial:>13.2f} {parallel:>14.2f} {same!s:>12}")
@@ -0,0 +1,63 @@
+"""
+Benchmarks DisjointSet against the previous list-based Clusterer._sorted_union_find.
+
+Time per pair should stay roughly flat as the number of pairs grows for DisjointSet,
+while the list-based approach grows with the number of groups.
+
+Usage: python prototype/benchmarks/union_find.py
+"""
+
+from time import perf_counter
+
+import numpy as np
+
+from dataeval._internal.functional.utils import DisjointSet
+
+
+def list_union_find(index_groups):
+    groups = []
+    for indices in zip(*index_groups):
+        indices = set(indices)
+        temp = []
+        for group in groups:
+            if not set(group).isdisjoint(indices):
+                indices.update(group)
+            else:
+                temp.append(group)
+        temp.append(sorted(indices))
+        groups = temp
+    return sorted(groups)
+
+
+def disjoint_set_union_find(index_groups):
+    a, b = index_groups
+    ds = DisjointSet(int(max(a.max(), b.max())) + 1)
+    ds.union(a, b)
+    return ds.groups()
+
+
+def pairs(n_pairs, rng):
+    # Near-duplicate style pairs: mostly small groups with some chaining
+    n = 2 * n_pairs
+    a = rng.integers(0, n, n_pairs)
+    b = np.clip(a + rng.integers(1, 4, n_pairs), 0, n - 1)
+    return a, b
+
+
+def timeit(fn, args, repeat=3):
+    best = np.inf
+    for _ in range(repeat):
+        start = perf_counter()
+        fn(args)
+        best = min(best, perf_counter() - start)
+    return best
+
+
+if __name__ == "__main__":
+    rng = np.random.default_rng(0)
+    print(f"{'pairs':>10} {'disjoint set (s)':>18} {'ns/pair':>9} {'list (s)':>10}")
+    for n_pairs in (10**3, 10**4, 10**5, 10**6, 10**7):
+        index_groups = pairs(n_pairs, rng)
+        fast = timeit(disjoint_set_union_find, index_groups)
+        slow = timeit(list_union_find, index_groups, repeat=1) if n_pairs <= 10**4 else float("nan")
+        print(f"{n_pairs:>10} {fast:>18.4f} {1e9 * fast / n_pairs:>9.1f} {slow:>10.4f}")
@@ -1,8 +1,12 @@
-from typing import Dict, Iterable, List, NamedTuple, Tuple, Union, cast
+import math
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, cast
 
 import numpy as np
-from scipy.cluster.hierarchy import linkage
-from scipy.spatial.distance import pdist, squareform
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.neighbors import NearestNeighbors
+
+from dataeval._internal.functional.distance import pairwise_distances
+from dataeval._internal.functional.utils import DisjointSet, prim_mst, single_linkage, sparse_mst
 
 
 def extend_linkage(link_arr: np.ndarray) -> np.ndarray:
@@ -29,55 +33,183 @@ def extend_linkage(link_arr: np.ndarray) -> np.ndarray:
     return arr
 
 
-class Cluster:
-    __slots__ = "merged", "samples", "sample_dist", "is_copy", "count", "dist_avg", "dist_std", "out1", "out2"
+CLUSTER_DTYPE = np.dtype(
+    [
+        ("level", np.int32),
+        ("cid", np.int32),
+        ("merged", np.int32),
+        ("parent", np.int32),
+        ("offset", np.int32),
+        ("count", np.int32),
+        ("dist_avg", np.float64),
+        ("dist_std", np.float64),
+        ("out1", np.bool_),
+        ("out2", np.bool_),
+        ("is_copy", np.bool_),
+    ]
+)
+
+
+class ClusterHierarchy:
+    """
+    Array-backed cluster hierarchy built from an extended linkage matrix
 
-    def __init__(self, merged: int, samples: np.ndarray, sample_dist: Union[float, np.ndarray], is_copy: bool = False):
-        self.merged = merged
-        self.samples = np.array(samples, dtype=np.int32)
-        self.sample_dist = np.array([sample_dist] if np.isscalar(sample_dist) else sample_dist)
-        self.is_copy = is_copy
+    Each cluster is a record in a single structured array holding its level, cluster id,
+    parent record, distance statistics and an offset/count into one permutation of the
+    sample indices in which the samples of every cluster are contiguous. Distance
+    statistics are merged as running moments, so no per-merge arrays are created.
+    Clusters that skip levels before merging are repeated as copies on the skipped
+    levels. Records are ordered by level, then by creation.
 
-        dist = float(self.sample_dist[-1])
+    Parameters
+    ----------
+    link_arr : np.ndarray
+        Linkage matrix extended with the id assigned to each row
+    """
 
-        self.count = len(self.samples)
-        if is_copy:
-            self.dist_avg = 0.0
-            self.dist_std = 0.0
-            self.out1 = False
-            self.out2 = False
-        else:
-            self.dist_avg = float(np.mean(self.sample_dist))
-            self.dist_std = float(np.std(self.sample_dist)) if len(self.sample_dist) > 1 else 1e-5
-            out1 = self.dist_avg + self.dist_std
-            out2 = out1 + self.dist_std
-            self.out1 = dist > out1
-            self.out2 = dist > out2
-
-    def copy(self) -> "Cluster":
-        return Cluster(False, self.samples, self.sample_dist, True)
-
-    def __repr__(self) -> str:
-        _params = {
-            "merged": self.merged,
-            "samples": self.samples,
-            "sample_dist": self.sample_dist,
-            "is_copy": self.is_copy,
-        }
-        return f"{self.__class__.__name__}(**{repr(_params)})"
+    def __init__(self, link_arr: np.ndarray):
+        num_nodes = len(link_arr)
+        num_samples = num_nodes + 1
 
+        rows: List[tuple] = []
+        sources: List[int] = []
+        node_record = [0] * num_nodes
+        node_level = [0] * num_nodes
+        node_cid = [0] * num_nodes
+        node_moments: List[Tuple[int, float, float]] = [(0, 0.0, 0.0)] * num_nodes
+        children = [(0, 0)] * num_nodes
+        occupied = set()
 
-class Clusters(Dict[int, Dict[int, Cluster]]):
-    def __init__(self, *args, **kwargs):
-        super().__init__(*args, **kwargs)
-        self.max_level: int = 1
+        self.max_level = 1
+        next_cluster_id = 0
 
+        # Walking through the linkage array to generate clusters
+        for node, (left_id, right_id, dist, _) in enumerate(link_arr[:, :4].tolist()):
+            left_id, right_id = int(left_id), int(right_id)
+            left, right = left_id - num_samples, right_id - num_samples
+            dist = float(np.float32(dist))
+            merged = 0
+
+            if left >= 0 and right >= 0:
+                merged = max(node_cid[left], node_cid[right])
+                left_first = link_arr[left, 3] >= link_arr[right, 3]
+                children[node] = (left_id, right_id) if left_first else (right_id, left_id)
+                moments = _combine_moments(node_moments[right], node_moments[left])
+                level = max(node_level[left], node_level[right]) + 1
+                cid = min(node_cid[left], node_cid[right])
 
-class ClusterPosition(NamedTuple):
-    """Keeps track of a cluster's level and ID"""
+                # Only tracking the levels in which clusters merge for the cluster distance matrix
+                self.max_level = max(self.max_level, node_level[left], node_level[right])
+                # Repeat the lower cluster as a copy on each level it skips before merging
+                low, high = (left, right) if node_level[left] < node_level[right] else (right, left)
+                for copy_level in range(node_level[high], node_level[low], -1):
+                    if (copy_level, node_cid[low]) not in occupied:
+                        occupied.add((copy_level, node_cid[low]))
+                        rows.append((copy_level, node_cid[low], 0, 0.0, 0.0, False, False, True))
+                        sources.append(low)
+            elif left >= 0 or right >= 0:
+                child, child_id, other_id = (left, left_id, right_id) if left >= 0 else (right, right_id, left_id)
+                children[node] = (child_id, other_id)
+                moments = node_moments[child]
+                level, cid = node_level[child] + 1, node_cid[child]
+            else:
+                children[node] = (left_id, right_id)
+                moments = (0, 0.0, 0.0)
+                level, cid = 0, next_cluster_id
+                next_cluster_id += 1
 
-    level: int
-    cid: int
+            count, dist_avg, m2 = node_moments[node] = _combine_moments(moments, (1, dist, 0.0))
+            dist_std = float(np.sqrt(m2 / count)) if count > 1 else 1e-5
+            out1 = dist_avg + dist_std
+            out2 = out1 + dist_std
+
+            occupied.add((level, cid))
+            node_level[node], node_cid[node], node_record[node] = level, cid, len(rows)
+            rows.append((level, cid, merged, dist_avg, dist_std, dist > out1, dist > out2, False))
+            sources.append(node)
+
+        # Assign contiguous sample ranges top-down so that every cluster is a slice of one permutation
+        counts = link_arr[:, 3].astype(np.intp)
+        offsets = np.zeros(num_nodes, dtype=np.intp)
+        parents = np.full(num_nodes, -1, dtype=np.intp)
+        self.order = np.zeros(num_samples, dtype=np.int32)
+        for node in range(num_nodes - 1, -1, -1):
+            offset = offsets[node]
+            for child_id in children[node]:
+                if child_id >= num_samples:
+                    offsets[child_id - num_samples] = offset
+                    parents[child_id - num_samples] = node
+                    offset += counts[child_id - num_samples]
+                else:
+                    self.order[offset] = child_id
+                    offset += 1
+
+        fields = ["level", "cid", "merged", "dist_avg", "dist_std", "out1", "out2", "is_copy"]
+        created = np.array(rows, dtype=CLUSTER_DTYPE[fields])
+        source_arr = np.array(sources, dtype=np.intp)
+        record_arr = np.array(node_record, dtype=np.intp)
+
+        # Order records by level, keeping creation order within a level
+        ordering = np.argsort(created["level"], kind="stable")
+        position = np.empty_like(ordering)
+        position[ordering] = np.arange(len(ordering))
+
+        records = np.zeros(len(created), dtype=CLUSTER_DTYPE)
+        for field in fields:
+            records[field] = created[field][ordering]
+        source_arr = source_arr[ordering]
+        records["offset"] = offsets[source_arr]
+        records["count"] = counts[source_arr]
+        # Copies point to the cluster their source merges into
+        node_parent = parents[source_arr]
+        records["parent"] = np.where(node_parent >= 0, position[record_arr[node_parent]], -1)
+
+        self.records = records
+        self._level_bounds = np.searchsorted(records["level"], np.arange(records["level"][-1] + 2))
+        self._num_cids = int(records["cid"].max()) + 1
+        self._keys = records["level"].astype(np.int64) * self._num_cids + records["cid"]
+        self._key_order = np.argsort(self._keys, kind="stable")
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    @property
+    def levels(self) -> range:
+        """All levels of the hierarchy in ascending order"""
+        return range(len(self._level_bounds) - 1)
+
+    def level(self, level: int) -> range:
+        """Returns the indices of the records on the given level"""
+        return range(self._level_bounds[level], self._level_bounds[level + 1])
+
+    def find(self, level: int, cid: int) -> int:
+        """Returns the index of the record for cluster `cid` on `level`"""
+        key = level * self._num_cids + cid
+        i = int(np.searchsorted(self._keys, key, sorter=self._key_order))
+        if (
+            level not in self.levels
+            or not 0 <= cid < self._num_cids
+            or i == len(self._keys)
+            or self._keys[self._key_order[i]] != key
+        ):
+            raise KeyError(f"No cluster {cid} on level {level}")
+        return int(self._key_order[i])
+
+    def samples(self, record: int) -> np.ndarray:
+        """Returns the samples of a record as a view into the sample permutation"""
+        offset, count = self.records["offset"][record], self.records["count"][record]
+        return self.order[offset : offset + count]
+
+
+def _combine_moments(a: Tuple[int, float, float], b: Tuple[int, float, float]) -> Tuple[int, float, float]:
+    """Combines the running (count, mean, M2) moments of two disjoint sets of values"""
+    na, mean_a, m2_a = a
+    nb, mean_b, m2_b = b
+    if not na or not nb:
+        return b if not na else a
+    n = na + nb
+    delta = mean_b - mean_a
+    return n, mean_a + delta * nb / n, m2_a + m2_b + delta * delta * na * nb / n
 
 
 class ClusterMergeEntry:
@@ -104,20 +236,65 @@ class Clusterer:
     ----------
     dataset : np.ndarray
         An array of images or image embeddings to perform clustering
+    metric : str, default "euclidean"
+        Distance metric between samples, used for the linkage, cluster distances and
+        duplicate thresholds. "euclidean" and "cosine" are computed in float32 with
+        blocked matrix products, other metrics supported by
+        :func:`scipy.spatial.distance.cdist` are computed in blocks with cdist.
+        Float32 distances carry a relative error of about 1e-6, so samples lying that
+        close to a merge level or threshold can be flagged differently than with float64
+        distances. Outliers, potential outliers and duplicates of any dataset may
+        therefore change slightly from the float64 results of earlier versions.
+    representatives : Optional[int], default None
+        If set and the dataset has more samples, the dataset is first partitioned with
+        mini-batch k-means and the hierarchy is only built on the sample nearest to each
+        centroid. Results are mapped back to every sample through its nearest
+        representative, making evaluation a fast approximate pre-screen of large datasets.
+
+    Note
+    ----
+    New samples can be inserted with :meth:`Clusterer.add`, which extends the minimum
+    spanning tree underlying the single linkage with the distances from the new samples
+    only, rather than recomputing the distances between all samples.
+
+    In approximate mode, the distance between any two samples differs from the distance
+    between their representatives by at most twice the "error_bound" reported by evaluate.
+    For euclidean and other true metrics, it is the largest distance from a sample to its
+    representative. Cosine distances are half the squared euclidean distances r between
+    normalized samples, which do not satisfy the triangle inequality, so the bound is
+    2 * r + r**2 for the largest such distance r to a representative. Metrics of cdist
+    which are not true metrics, such as "sqeuclidean", have no such bound.
     """
 
-    def __init__(self, dataset: np.ndarray):
+    def __init__(self, dataset: np.ndarray, metric: str = "euclidean", representatives: Optional[int] = None):
+        if representatives is not None and representatives < 2:
+            raise ValueError(f"Representatives should be at least 2; got {representatives}")
+        self._metric = metric
+        self._num_representatives = representatives
         # Allows an update to dataset to reset the state rather than instantiate a new class
         self._on_init(dataset)
 
     def _on_init(self, dataset: np.ndarray):
         self._validate_data(dataset)
         self._data: np.ndarray = dataset
+
+        self._representatives: Optional[np.ndarray] = None
+        self._assignments: Optional[np.ndarray] = None
+        self._assignment_dist: Optional[np.ndarray] = None
+        if self._num_representatives is not None and len(dataset) > self._num_representatives:
+            self._partition(dataset, self._num_representatives)
+            dataset = dataset[self._representatives]
         self._num_samples = len(dataset)
 
-        self._darr: np.ndarray = pdist(dataset, metric="euclidean")
-        self._sqdmat: np.ndarray = squareform(self._darr)
-        self._larr: np.ndarray = extend_linkage(linkage(self._darr))
+        # Distance matrix of the hierarchy samples, dropped when samples are added and recomputed on demand
+        self._dist_cache: Optional[np.ndarray] = pairwise_distances(dataset, metric=self._metric)
+        rows, cols, weights = prim_mst(self._dist_cache)
+        self._mst: Tuple[np.ndarray, np.ndarray, np.ndarray] = rows, cols, weights.astype(np.float32)
+        self._on_update()
+
+    def _on_update(self):
+        """Rebuilds the hierarchy from the minimum spanning tree and resets the cached results"""
+        self._larr: np.ndarray = extend_linkage(single_linkage(*self._mst, self._num_samples))
         self._max_clusters: int = np.count_nonzero(self._larr[:, 3] == 2)
 
         min_num = int(self._num_samples * 0.05)
@@ -126,6 +303,105 @@ class Clusterer:
         self._clusters = None
         self._last_good_merge_levels = None
 
+    def add(self, samples: np.ndarray):
+        """
+        Appends samples to the data and inserts them into the existing hierarchy
+
+        The minimum spanning tree of all samples is contained in the union of the previous
+        tree and the edges from each new sample, so only the distances from the new samples
+        are computed and the single linkage is rebuilt from the resulting sparse graph.
+        Adding M samples to N therefore takes O(N * M) time and memory, and the tree edges
+        rather than a distance matrix are kept across additions. In approximate mode, new
+        samples are assigned to their nearest representative and only those farther from it
+        than the current error bound become new representatives.
+
+        Note
+        ----
+        The next :meth:`evaluate` still rebuilds the cluster hierarchy, recomputes the N x N
+        distance matrix and reruns the outlier and duplicate passes over every cluster,
+        because the merge levels depend on the whole hierarchy. Evaluating after adding
+        samples is therefore O(N^2), as when the Clusterer is first evaluated.
+
+        Parameters
+        ----------
+        samples : np.ndarray
+            An array of images or image embeddings with the same number of features as the data
+
+        Raises
+        ------
+        TypeError
+            If samples is not a np.ndarray
+        ValueError
+            If samples is not 2 dimensional or the number of features does not match the data
+        """
+        if not isinstance(samples, np.ndarray):
+            raise TypeError(f"Samples should be of type np.ndarray; got {type(samples)}")
+        if samples.ndim != 2 or samples.shape[1] != self._data.shape[1]:
+            raise ValueError(f"Samples should have shape (N, {self._data.shape[1]}); got {samples.shape}")
+        if not len(samples):
+            return
+
+        start = len(self._data)
+        self._data = np.concatenate([self._data, samples])
+        new = np.arange(start, len(self._data))
+        if self._representatives is not None:
+            new = self._assign(new)
+        if not len(new):
+            self._clusters = None
+            self._last_good_merge_levels = None
+            return
+
+        hierarchy = self._data if self._representatives is None else self._data[self._representatives]
+        self._insert(hierarchy[: self._num_samples], hierarchy[self._num_samples :])
+        self._on_update()
+
+    def _assign(self, new: np.ndarray) -> np.ndarray:
+        """
+        Assigns new samples to their nearest representative, promoting the samples farther than the
+        error bound to representatives, and returns the indices of the promoted samples
+        """
+        representatives = cast(np.ndarray, self._representatives)
+        dist = pairwise_distances(self._data[new], self._data[representatives], self._metric)
+        # Keeping every sample within the largest distance to a representative preserves the error bound
+        radius = float(cast(np.ndarray, self._assignment_dist).max())
+        promoted = new[dist.min(axis=1) > radius]
+        if len(promoted):
+            dist = np.hstack([dist, pairwise_distances(self._data[new], self._data[promoted], self._metric)])
+            representatives = np.concatenate([representatives, promoted])
+        assignments = dist.argmin(axis=1)
+
+        self._representatives = representatives
+        self._assignments = np.concatenate([cast(np.ndarray, self._assignments), assignments])
+        self._assignment_dist = np.concatenate(
+            [cast(np.ndarray, self._assignment_dist), dist[np.arange(len(new)), assignments]]
+        )
+        return promoted
+
+    def _error_bound(self) -> float:
+        """Half of the largest difference between the distance of two samples and that of their representatives"""
+        radius = float(cast(np.ndarray, self._assignment_dist).max())
+        if self._metric != "cosine":
+            return radius
+        # The euclidean distances between normalized samples, at most 2, differ by at most 2 * r,
+        # which changes their halved squares by at most 2 * (2 * r) + 2 * r**2
+        r = math.sqrt(2 * radius)
+        return 2 * r + r**2
+
+    def _insert(self, existing: np.ndarray, new: np.ndarray):
+        """Extends the minimum spanning tree with new hierarchy samples"""
+        n, total = len(existing), len(existing) + len(new)
+        cross = pairwise_distances(new, existing, self._metric)
+        inner = pairwise_distances(new, metric=self._metric)
+        self._dist_cache = None
+
+        new_rows, new_cols = np.triu_indices(len(new), 1)
+        rows, cols, weights = self._mst
+        rows = np.concatenate([rows, np.repeat(np.arange(n, total), n), n + new_rows])
+        cols = np.concatenate([cols, np.tile(np.arange(n), len(new)), n + new_cols])
+        weights = np.concatenate([weights, cross.ravel(), inner[new_rows, new_cols]])
+        self._mst = sparse_mst(rows, cols, weights, total)
+        self._num_samples = total
+
     @property
     def data(self) -> np.ndarray:
         return self._data
@@ -135,9 +411,27 @@ class Clusterer:
         self._on_init(x)
 
     @property
-    def clusters(self) -> Clusters:
+    def _sqdmat(self) -> np.ndarray:
+        """Distance matrix of the samples of the hierarchy, recomputed after samples are added"""
+        if self._dist_cache is None:
+            hierarchy = self._data if self._representatives is None else self._data[self._representatives]
+            self._dist_cache = pairwise_distances(hierarchy, metric=self._metric)
+        return self._dist_cache
+
+    @property
+    def representatives(self) -> Optional[np.ndarray]:
+        """Indices of the samples used to build the hierarchy in approximate mode"""
+        return self._representatives
+
+    @property
+    def assignments(self) -> Optional[np.ndarray]:
+        """Position in `representatives` of the nearest representative of each sample in approximate mode"""
+        return self._assignments
+
+    @property
+    def clusters(self) -> ClusterHierarchy:
         if self._clusters is None:
-            self._clusters = self._create_clusters()
+            self._clusters = ClusterHierarchy(self._larr)
         return self._clusters
 
     @property
@@ -162,83 +456,48 @@ class Clusterer:
         if features < 1:
             raise ValueError(f"Samples should have at least 1 feature; got {features}")
 
-    def _create_clusters(self) -> Clusters:
-        """Generates clusters based on linkage matrix"""
-        next_cluster_id = 0
-        cluster_map: Dict[int, ClusterPosition] = {}  # Dictionary to associate new cluster ids with actual clusters
-        clusters: Clusters = Clusters()
-
-        # Walking through the linkage array to generate clusters
-        for arr_i in self._larr:
-            left_id = int(arr_i[0])
-            right_id = int(arr_i[1])
-            sample_dist = np.array([arr_i[2]], dtype=np.float32)
-            merged = False
-
-            # Determine if the id is already associated with a cluster
-            left = cluster_map.get(left_id)
-            right = cluster_map.get(right_id)
-
-            if left and right:
-                merged = max([left.cid, right.cid])
-                lc = clusters[left.level][left.cid]
-                rc = clusters[right.level][right.cid]
-                left_first = len(lc.samples) >= len(rc.samples)
-                samples = np.concatenate([lc.samples, rc.samples] if left_first else [rc.samples, lc.samples])
-                sample_dist = np.concatenate([rc.sample_dist, lc.sample_dist, sample_dist])
-                level, cid = max(left.level, right.level) + 1, min(left.cid, right.cid)
-
-                # Only tracking the levels in which clusters merge for the cluster distance matrix
-                clusters.max_level = max(clusters.max_level, left.level, right.level)
-                # Update clusters to include previously skipped levels
-                clusters = self._fill_levels(clusters, left, right)
-            elif left or right:
-                child, other_id = cast(Tuple[ClusterPosition, int], (left, right_id) if left else (right, left_id))
-                cc = clusters[child.level][child.cid]
-                samples = np.concatenate([cc.samples, [other_id]])
-                sample_dist = np.concatenate([cc.sample_dist, sample_dist])
-                level, cid = child.level + 1, child.cid
-            else:
-                samples = np.array([left_id, right_id], dtype=np.int32)
-                level, cid = 0, next_cluster_id
-                next_cluster_id += 1
-
-            # Set the cluster and associate the linkage id with the cluster
-            if level not in clusters:
-                clusters[level] = {}
-
-            clusters[level][cid] = Cluster(merged, samples, sample_dist)
-            cluster_map[int(arr_i[-1])] = ClusterPosition(level, cid)
-
-        return clusters
-
-    def _fill_levels(self, clusters: Clusters, left: ClusterPosition, right: ClusterPosition) -> Clusters:
-        # Sets each level's cluster info if it does not exist
-        if left.level != right.level:
-            (level, cid), max_level = (left, right[0]) if left[0] < right[0] else (right, left[0])
-            cluster = clusters[level][cid].copy()
-            for level_id in range(max_level, level, -1):
-                clusters[level_id].setdefault(cid, cluster)
-        return clusters
+    def _partition(self, dataset: np.ndarray, num_representatives: int):
+        """
+        Selects the samples nearest to mini-batch k-means centroids as representatives, then spends
+        the remaining budget on the samples farthest from them so that isolated samples are kept
+        """
+        num_centroids = max(2, num_representatives - num_representatives // 10)
+        # Spherical k-means approximates the partition for cosine distances
+        points = dataset / np.linalg.norm(dataset, axis=1, keepdims=True) if self._metric == "cosine" else dataset
+        kmeans = MiniBatchKMeans(n_clusters=num_centroids, n_init=3, random_state=0).fit(points)  # type: ignore
+        nearest = NearestNeighbors(n_neighbors=1).fit(points)
+        representatives = np.unique(nearest.kneighbors(kmeans.cluster_centers_, return_distance=False))
+
+        nearest_rep = NearestNeighbors(n_neighbors=1, metric=self._metric)
+        dist = nearest_rep.fit(dataset[representatives]).kneighbors(dataset)[0][:, 0]
+        num_farthest = num_representatives - len(representatives)
+        if num_farthest > 0:
+            farthest = np.argpartition(dist, -num_farthest)[-num_farthest:]
+            representatives = np.union1d(representatives, farthest[dist[farthest] > 0])
+
+        dist, assignments = nearest_rep.fit(dataset[representatives]).kneighbors(dataset)
+        self._representatives = representatives
+        self._assignments, self._assignment_dist = assignments[:, 0], dist[:, 0]
 
     def _get_cluster_distances(self) -> np.ndarray:
         """Calculates the minimum distances between clusters are each level"""
         # Cluster distance matrix
-        max_level = self.clusters.max_level
+        clusters = self.clusters
+        max_level = clusters.max_level
         cluster_matrix = np.full((max_level, self._max_clusters, self._max_clusters), -1.0, dtype=np.float32)
 
-        for level, cluster_set in self.clusters.items():
-            if level < max_level:
-                cluster_ids = sorted(cluster_set.keys())
-                for i, cluster_id in enumerate(cluster_ids):
-                    cluster_matrix[level, cluster_id, cluster_id] = self.clusters[level][cluster_id].dist_avg
-                    for int_id in range(i + 1, len(cluster_ids)):
-                        compare_id = cluster_ids[int_id]
-                        sample_a = self.clusters[level][cluster_id].samples
-                        sample_b = self.clusters[level][compare_id].samples
-                        min_mat = self._sqdmat[np.ix_(sample_a, sample_b)].min()
-                        cluster_matrix[level, cluster_id, compare_id] = min_mat
-                        cluster_matrix[level, compare_id, cluster_id] = min_mat
+        for level in clusters.levels[:max_level]:
+            records = sorted(clusters.level(level), key=lambda i: clusters.records["cid"][i])
+            for i, record in enumerate(records):
+                cluster_id = clusters.records["cid"][record]
+                cluster_matrix[level, cluster_id, cluster_id] = clusters.records["dist_avg"][record]
+                sample_a = clusters.samples(record)
+                for compare in records[i + 1 :]:
+                    compare_id = clusters.records["cid"][compare]
+                    sample_b = clusters.samples(compare)
+                    min_mat = self._sqdmat[np.ix_(sample_a, sample_b)].min()
+                    cluster_matrix[level, cluster_id, compare_id] = min_mat
+                    cluster_matrix[level, compare_id, cluster_id] = min_mat
 
         return cluster_matrix
 
@@ -283,33 +542,31 @@ class Clusterer:
         intra_max = []
         merge_mean = []
         merge_list: List[ClusterMergeEntry] = []
-
-        for level, cluster_set in self.clusters.items():
-            for outer_cluster, cluster in cluster_set.items():
-                inner_cluster = cluster.merged
-                if not inner_cluster:
-                    continue
-                # Extract necessary information
-                num_samples = len(cluster.samples)
-                out1 = cluster.out1
-                out2 = cluster.out2
-
-                # If outside 2-std or 1-std and larger than a minimum sized cluster, take the mean distance, else max
-                aggregate_func = (
-                    np.mean if out2 or (out1 and num_samples >= self._min_num_samples_per_cluster) else np.max
-                )
-
-                distances = cluster_matrix[:level, outer_cluster, inner_cluster]
-                intra_distance = cluster_matrix[:, outer_cluster, outer_cluster]
-                positive_mask = intra_distance >= 0
-                intra_filtered = intra_distance[positive_mask]
-
-                # TODO: Append now, take max over axis later?
-                intra_max.append(np.max(intra_filtered))
-                # Calculate the corresponding distance stats
-                distance_stats_arr = aggregate_func(distances)
-                merge_mean.append(distance_stats_arr)
-                merge_list.append(ClusterMergeEntry(level, outer_cluster, inner_cluster, 0))
+        records = self.clusters.records
+
+        for record in np.flatnonzero(records["merged"]):
+            level = int(records["level"][record])
+            outer_cluster = int(records["cid"][record])
+            inner_cluster = int(records["merged"][record])
+            # Extract necessary information
+            num_samples = records["count"][record]
+            out1 = records["out1"][record]
+            out2 = records["out2"][record]
+
+            # If outside 2-std or 1-std and larger than a minimum sized cluster, take the mean distance, else max
+            aggregate_func = np.mean if out2 or (out1 and num_samples >= self._min_num_samples_per_cluster) else np.max
+
+            distances = cluster_matrix[:level, outer_cluster, inner_cluster]
+            intra_distance = cluster_matrix[:, outer_cluster, outer_cluster]
+            positive_mask = intra_distance >= 0
+            intra_filtered = intra_distance[positive_mask]
+
+            # TODO: Append now, take max over axis later?
+            intra_max.append(np.max(intra_filtered))
+            # Calculate the corresponding distance stats
+            distance_stats_arr = aggregate_func(distances)
+            merge_mean.append(distance_stats_arr)
+            merge_list.append(ClusterMergeEntry(level, outer_cluster, inner_cluster, 0))
 
         all_merge_indices = self._calc_merge_indices(merge_mean=merge_mean, intra_max=intra_max)
 
@@ -371,45 +628,44 @@ class Clusterer:
         possible_outliers = set()
         already_seen = set()
         last_level = {}
-
-        for level, cluster_set in self.clusters.items():
-            for cluster_id, cluster in cluster_set.items():
-                if cluster_id in last_merge_levels:
-                    last_level[cluster_id] = level
-
-        for level, cluster_set in self.clusters.items():
-            for cluster_id, cluster in cluster_set.items():
-                if not cluster.merged and cluster_id in last_merge_levels and level > last_merge_levels[cluster_id]:
-                    if cluster_id in already_seen and cluster.samples[-1] not in outliers:
-                        outliers.add(cluster.samples[-1])
-                    elif cluster.out2:
-                        if len(cluster.samples) < self._min_num_samples_per_cluster:
-                            outliers.update(cluster.samples.tolist())
-                        elif cluster.samples[-1] not in outliers:
-                            outliers.add(cluster.samples[-1])
-                        if cluster_id not in already_seen:
-                            already_seen.add(cluster_id)
-                    elif cluster.out1 and len(cluster.samples) >= self._min_num_samples_per_cluster:
-                        possible_outliers.add(cluster.samples[-1])
-                    elif level == last_level[cluster_id] and len(cluster.samples) < self._min_num_samples_per_cluster:
-                        outliers.update(cluster.samples.tolist())
+        records = self.clusters.records
+
+        for record in range(len(records)):
+            cluster_id = int(records["cid"][record])
+            if cluster_id in last_merge_levels:
+                last_level[cluster_id] = records["level"][record]
+
+        for record in range(len(records)):
+            level, cluster_id = int(records["level"][record]), int(records["cid"][record])
+            if records["merged"][record] or cluster_id not in last_merge_levels:
+                continue
+            if level > last_merge_levels[cluster_id]:
+                samples = self.clusters.samples(record)
+                if cluster_id in already_seen and samples[-1] not in outliers:
+                    outliers.add(samples[-1])
+                elif records["out2"][record]:
+                    if len(samples) < self._min_num_samples_per_cluster:
+                        outliers.update(samples.tolist())
+                    elif samples[-1] not in outliers:
+                        outliers.add(samples[-1])
+                    if cluster_id not in already_seen:
+                        already_seen.add(cluster_id)
+                elif records["out1"][record] and len(samples) >= self._min_num_samples_per_cluster:
+                    possible_outliers.add(samples[-1])
+                elif level == last_level[cluster_id] and len(samples) < self._min_num_samples_per_cluster:
+                    outliers.update(samples.tolist())
 
         return sorted(outliers), sorted(possible_outliers)
 
     def _sorted_union_find(self, index_groups: Iterable[Iterable[int]]) -> List[List[int]]:
         """Merges and sorts groups of indices that share any common index"""
-        groups: List[List[int]] = []
-        for indices in zip(*index_groups):
-            indices = set(indices)
-            temp = []
-            for group in groups:
-                if not set(group).isdisjoint(indices):
-                    indices.update(group)
-                else:
-                    temp.append(group)
-            temp.append(sorted(indices))
-            groups = temp
-        return sorted(groups)
+        columns = [np.asarray(indices, dtype=np.intp) for indices in index_groups]
+        if not columns or not columns[0].size:
+            return []
+        disjoint_set = DisjointSet(max(int(indices.max()) for indices in columns) + 1)
+        for left, right in zip(columns[:-1], columns[1:]):
+            disjoint_set.union(left, right)
+        return disjoint_set.groups(np.concatenate(columns), min_size=1)
 
     def find_duplicates(self, last_merge_levels: Dict[int, int]) -> Tuple[List[List[int]], List[List[int]]]:
         """
@@ -426,24 +682,107 @@ class Clusterer:
             The exact duplicates and near duplicates as lists of related indices
         """
 
+        exact_threshold, near_threshold = self._get_duplicate_thresholds(last_merge_levels)
+
+        # Samples within the near threshold of each other are connected by minimum spanning tree
+        # edges within the threshold, so only the components of those edges are compared
+        rows, cols, weights = self._mst
+        within = weights <= near_threshold
+        components = DisjointSet(self._num_samples)
+        components.union(rows[within], cols[within])
+
+        groups = [np.asarray(members) for members in components.groups()]
+        return self._group_duplicates(
+            groups, lambda members: self._sqdmat[np.ix_(members, members)], exact_threshold, near_threshold
+        )
+
+    def _group_duplicates(
+        self,
+        groups: List[np.ndarray],
+        distances: Callable[[np.ndarray], np.ndarray],
+        exact_threshold: float,
+        near_threshold: float,
+    ) -> Tuple[List[List[int]], List[List[int]]]:
+        """Finds the exact and near duplicates by comparing all pairs of samples within each group"""
+        exact_pairs, near_pairs = [], []
+        for members in groups:
+            rows, cols = np.triu_indices(len(members), 1)
+            dist = distances(members)[rows, cols]
+            exact = dist <= exact_threshold
+            near = (dist <= near_threshold) & ~exact
+            exact_pairs.append(members[np.stack([rows[exact], cols[exact]])])
+            near_pairs.append(members[np.stack([rows[near], cols[near]])])
+
+        def _sorted_groups(pairs: List[np.ndarray]) -> List[List[int]]:
+            return self._sorted_union_find(np.concatenate(pairs, axis=1)) if pairs else []
+
+        return _sorted_groups(exact_pairs), _sorted_groups(near_pairs)
+
+    def _get_duplicate_thresholds(self, last_merge_levels: Dict[int, int]) -> Tuple[float, float]:
+        """Returns the exact and near duplicate distance thresholds from the last good merge levels"""
         duplicates_std = []
+        records = self.clusters.records
         for cluster_id, level in last_merge_levels.items():
-            samples = self.clusters[level][cluster_id].samples
-            if len(samples) >= self._min_num_samples_per_cluster:
-                duplicates_std.append(self.clusters[level][cluster_id].dist_std)
-        diag_mask = np.ones_like(self._sqdmat, dtype=bool)
-        np.fill_diagonal(diag_mask, 0)
-        diag_mask = np.triu(diag_mask)
+            record = self.clusters.find(level, cluster_id)
+            if records["count"][record] >= self._min_num_samples_per_cluster:
+                duplicates_std.append(records["dist_std"][record])
+        near_threshold = float(np.mean(duplicates_std))
+        return near_threshold / 100, near_threshold
 
-        exact_mask = self._sqdmat <= (np.mean(duplicates_std) / 100)
-        exact_indices = np.nonzero(exact_mask & diag_mask)
-        exact_dupes = self._sorted_union_find(exact_indices)
+    def _members(self, representatives: List[int]) -> List[int]:
+        """Returns the samples assigned to any of the given representatives"""
+        return np.flatnonzero(np.isin(cast(np.ndarray, self._assignments), representatives)).tolist()
 
-        near_mask = self._sqdmat <= np.mean(duplicates_std)
-        near_indices = np.nonzero(near_mask & diag_mask & ~exact_mask)
-        near_dupes = self._sorted_union_find(near_indices)
+    def _nearest_neighbor_scale(self, groups: List[np.ndarray], num_probes: int = 1000) -> float:
+        """
+        Estimates the ratio of the median nearest neighbor distance between samples to that between
+        representatives, probing a subset of samples against the other samples of their cell group
+        """
+        rep_dist = self._sqdmat + np.diag(np.full(self._num_samples, np.inf))
+        rep_scale = float(np.median(rep_dist.min(axis=1)))
+        if not groups or rep_scale <= 0:
+            return 1.0
+
+        rng = np.random.default_rng(0)
+        sizes = np.array([len(members) for members in groups])
+        probes = rng.choice(len(groups), size=min(num_probes, int(sizes.sum())), p=sizes / sizes.sum())
+        nearest = []
+        for group in probes:
+            members = groups[group]
+            i = rng.integers(len(members))
+            dist = pairwise_distances(self._data[members[i : i + 1]], self._data[members], self._metric)[0]
+            nearest.append(np.min(np.delete(dist, i)))
+        return min(1.0, float(np.median(nearest)) / rep_scale)
+
+    def _find_member_duplicates(
+        self, duplicates: List[List[int]], near_duplicates: List[List[int]], last_merge_levels: Dict[int, int]
+    ) -> Tuple[List[List[int]], List[List[int]]]:
+        """
+        Finds duplicates among all samples in approximate mode
 
-        return exact_dupes, near_dupes
+        Samples are only compared within the cells of their representative, joined with the
+        cells of representatives found to be duplicates of each other.
+        """
+        assignments = cast(np.ndarray, self._assignments)
+
+        cells = DisjointSet(len(cast(np.ndarray, self._representatives)))
+        for group in duplicates + near_duplicates:
+            cells.union(group[:-1], group[1:])
+        cell_groups = cells.find(assignments)
+        order = np.argsort(cell_groups, kind="stable")
+        _, starts, counts = np.unique(cell_groups[order], return_index=True, return_counts=True)
+        groups = [order[start : start + count] for start, count in zip(starts, counts) if count > 1]
+
+        # Thresholds come from distances between representatives, which are sparser than the samples
+        scale = self._nearest_neighbor_scale(groups)
+        exact_threshold, near_threshold = (scale * t for t in self._get_duplicate_thresholds(last_merge_levels))
+
+        return self._group_duplicates(
+            groups,
+            lambda members: pairwise_distances(self._data[members], metric=self._metric),
+            exact_threshold,
+            near_threshold,
+        )
 
     def evaluate(self):
         """Finds and flags indices of the data for outliers and duplicates
@@ -453,12 +792,20 @@ class Clusterer:
 
         Dict[str, Union[List[int]], List[List[int]]]
             Dictionary containing list of outliers, potential outliers, duplicates, and near duplicates in keys
-            "outliers", "potential_outliers", "duplicates", "near_duplicates" respectively
+            "outliers", "potential_outliers", "duplicates", "near_duplicates" respectively. In approximate mode,
+            "error_bound" holds half of the largest difference between the distance of two samples and
+            the distance of their representatives
         """
 
         outliers, potential_outliers = self.find_outliers(self.last_good_merge_levels)
         duplicates, near_duplicates = self.find_duplicates(self.last_good_merge_levels)
 
+        if self._representatives is not None:
+            outliers, potential_outliers = self._members(outliers), self._members(potential_outliers)
+            duplicates, near_duplicates = self._find_member_duplicates(
+                duplicates, near_duplicates, self.last_good_merge_levels
+            )
+
         ret = {
             "outliers": outliers,
             "potential_outliers": potential_outliers,
@@ -466,4 +813,7 @@ class Clusterer:
             "near_duplicates": near_duplicates,
         }
 
+        if self._assignment_dist is not None:
+            ret["error_bound"] = self._error_bound()
+
         return ret
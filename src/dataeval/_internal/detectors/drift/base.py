@@ -7,11 +7,20 @@ Licensed under Apache Software License (Apache 2.0)
 """
 
 from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
 from functools import wraps
-from typing import Callable, Dict, Literal, Optional, Tuple, Union
+from itertools import repeat
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Dict, Iterator, Literal, Optional, Tuple, Union
 
 import numpy as np
 
+from dataeval._internal.functional.distance import _effective_n_jobs
+
+# Name, shape and dtype of an array in shared memory
+_SharedArray = Tuple[str, Tuple[int, ...], str]
+
 
 def update_x_ref(fn):
     @wraps(fn)
@@ -21,6 +30,7 @@ def update_x_ref(fn):
         # update reference dataset
         if self.update_x_ref is not None:
             self._x_ref = self.update_x_ref(self.x_ref, x, self.n)
+            self._x_ref_cache.clear()
 
         # used for reservoir sampling
         self.n += len(x)
@@ -132,12 +142,16 @@ class BaseDrift:
         # Ref counter for preprocessed x
         self._x_refcount = 0
 
+        # Representations of the reference data, cleared when it changes
+        self._x_ref_cache: Dict[str, np.ndarray] = {}
+
     @property
     def x_ref(self) -> np.ndarray:
         if not self.x_ref_preprocessed:
             self.x_ref_preprocessed = True
             if self.preprocess_fn is not None:
                 self._x_ref = self.preprocess_fn(self._x_ref)
+                self._x_ref_cache.clear()
 
         return self._x_ref
 
@@ -148,6 +162,47 @@ class BaseDrift:
         return x
 
 
+def _average_ranks(x: np.ndarray) -> np.ndarray:
+    """Ranks of values sorted along each row, starting at 1, where tied values share their average rank"""
+    n = x.shape[1]
+    positions = np.broadcast_to(np.arange(n), x.shape)
+    edge = np.ones((x.shape[0], 1), dtype=bool)
+    changes = x[:, 1:] != x[:, :-1]
+    # First and last position of the group of tied values of each position
+    first = np.maximum.accumulate(np.where(np.hstack([edge, changes]), positions, 0), axis=1)
+    last = np.minimum.accumulate(np.where(np.hstack([changes, edge]), positions, n)[:, ::-1], axis=1)[:, ::-1]
+    return (first + last) / 2 + 1
+
+
+@contextmanager
+def _shared_array(x: np.ndarray) -> Iterator[_SharedArray]:
+    """Copies an array into shared memory for the lifetime of the context"""
+    shm = SharedMemory(create=True, size=max(1, x.nbytes))
+    try:
+        np.ndarray(x.shape, dtype=x.dtype, buffer=shm.buf)[...] = x
+        yield shm.name, x.shape, x.dtype.str
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _test_features(
+    test: Callable[..., np.ndarray], x_ref: _SharedArray, x: _SharedArray, start: int, stop: int, args: Tuple
+) -> np.ndarray:
+    """Runs a univariate test on a contiguous chunk of the features of arrays in shared memory"""
+    ref_block, x_block = SharedMemory(name=x_ref[0]), SharedMemory(name=x[0])
+    try:
+        ref_view = np.ndarray(x_ref[1], dtype=x_ref[2], buffer=ref_block.buf)[start:stop]
+        x_view = np.ndarray(x[1], dtype=x[2], buffer=x_block.buf)[start:stop]
+        result = np.array(test(ref_view, x_view, *args))
+        # The views must be released before the blocks can be closed
+        del ref_view, x_view
+        return result
+    finally:
+        ref_block.close()
+        x_block.close()
+
+
 class BaseUnivariateDrift(BaseDrift):
     """
     Generic drift detector component which serves as a base class for methods using
@@ -165,6 +220,7 @@ class BaseUnivariateDrift(BaseDrift):
         preprocess_fn: Optional[Callable[[np.ndarray], np.ndarray]] = None,
         correction: Literal["bonferroni", "fdr"] = "bonferroni",
         n_features: Optional[int] = None,
+        n_jobs: Optional[int] = None,
     ) -> None:
         super().__init__(
             x_ref,
@@ -176,6 +232,51 @@ class BaseUnivariateDrift(BaseDrift):
         )
 
         self._n_features = n_features
+        self.n_jobs = n_jobs
+
+    def _map_features(
+        self, test: Callable[..., np.ndarray], x_ref: np.ndarray, x: np.ndarray, *args: Any
+    ) -> np.ndarray:
+        """
+        Applies a univariate test to every feature, in n_jobs processes for tests which cannot be vectorized
+
+        The features of x_ref and x, of shape (n_features, n_ref) and (n_features, n), are split into one
+        contiguous chunk per process. Both arrays are shared with the processes instead of being copied to
+        each of them, and the results of the chunks are gathered in feature order.
+
+        Parameters
+        ----------
+        test : Callable[..., np.ndarray]
+            Module level function returning the results of the features of chunks of x_ref and x,
+            followed by args
+        x_ref : np.ndarray
+            Reference data of each feature
+        x : np.ndarray
+            Test data of each feature
+
+        Returns
+        -------
+        np.ndarray
+            Results of the test concatenated over the features
+        """
+        workers = min(_effective_n_jobs(self.n_jobs), len(x_ref))
+        if workers <= 1:
+            return np.array(test(x_ref, x, *args))
+        bounds = np.linspace(0, len(x_ref), workers + 1).astype(int)
+        with ExitStack() as stack:
+            shared_ref = stack.enter_context(_shared_array(np.ascontiguousarray(x_ref)))
+            shared_x = stack.enter_context(_shared_array(np.ascontiguousarray(x)))
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            chunks = executor.map(
+                _test_features,
+                repeat(test),
+                repeat(shared_ref),
+                repeat(shared_x),
+                bounds[:-1],
+                bounds[1:],
+                repeat(args),
+            )
+            return np.concatenate(list(chunks))
 
     @property
     def n_features(self) -> int:
@@ -192,6 +293,14 @@ class BaseUnivariateDrift(BaseDrift):
 
         return self._n_features
 
+    @property
+    def _x_ref_sorted(self) -> np.ndarray:
+        """Reference data of shape (n_features, n_ref) sorted along each row, cached until the reference changes"""
+        if "sorted" not in self._x_ref_cache:
+            x_ref = self.x_ref.reshape(self.x_ref.shape[0], -1)
+            self._x_ref_cache["sorted"] = np.sort(x_ref.T, axis=1)
+        return self._x_ref_cache["sorted"]
+
     @preprocess_x
     @abstractmethod
     def score(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
@@ -6,12 +6,100 @@ Original code Copyright (c) 2023 Seldon Technologies Ltd
 Licensed under Apache Software License (Apache 2.0)
 """
 
+import math
+from functools import lru_cache
 from typing import Callable, Literal, Optional, Tuple
 
 import numpy as np
+from scipy.special import gammaln, kv
 from scipy.stats import cramervonmises_2samp
 
-from .base import BaseUnivariateDrift, UpdateStrategy, preprocess_x
+from .base import BaseUnivariateDrift, UpdateStrategy, _average_ranks, preprocess_x
+
+# Largest sample size for which the "auto" method computes exact p-values, as in scipy
+EXACT_MAX_SIZE = 20
+# Normalized statistics of the p-value lookup table, whose p-values fall below 1e-9 at its end
+TABLE_GRID = np.linspace(0.003, 4.0, 4001)
+
+
+def _cvm_statistics(x_ref: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """
+    Computes the two-sample CVM statistic T of every feature at once
+
+    Parameters
+    ----------
+    x_ref : np.ndarray
+        Reference data of shape (n_features, n_ref), sorted along each row
+    x : np.ndarray
+        Test data of shape (n_features, n)
+
+    Returns
+    -------
+    np.ndarray
+        Statistic of each feature
+    """
+    n_features, n_ref = x_ref.shape
+    n = x.shape[1]
+    pooled = np.concatenate([x_ref, np.sort(x, axis=1)], axis=1)
+    # A stable sort of the two sorted runs of each row is a linear merge, which keeps each sample in order
+    order = np.argsort(pooled, axis=1, kind="stable")
+    ranks = _average_ranks(np.take_along_axis(pooled, order, axis=1))
+    from_ref = order < n_ref
+    rx = ranks[from_ref].reshape(n_features, n_ref)
+    ry = ranks[~from_ref].reshape(n_features, n)
+    u = n_ref * np.sum((rx - np.arange(1, n_ref + 1)) ** 2, axis=1)
+    u += n * np.sum((ry - np.arange(1, n + 1)) ** 2, axis=1)
+    k, total = n_ref * n, n_ref + n
+    return u / (k * total) - (4 * k - 1) / (6 * total)
+
+
+def _cdf_cvm_inf(x: np.ndarray) -> np.ndarray:
+    """
+    CDF of the limiting distribution of the CVM statistic, from the series of Csörgő and Faraway (1996)
+    summed until its terms fall below 1e-7 as in scipy
+    """
+    x = np.asarray(x, dtype=np.float64)
+    total = np.zeros_like(x)
+    active = np.ones(x.shape, dtype=bool)
+    k = 0
+    while np.any(active):
+        y = 4 * k + 1
+        q = y**2 / (16 * x[active])
+        u = math.exp(gammaln(k + 0.5) - gammaln(k + 1)) / (np.pi**1.5 * np.sqrt(x[active]))
+        term = u * math.sqrt(y) * np.exp(-q) * kv(0.25, q)
+        total[active] += term
+        active[active] = np.abs(term) >= 1e-7
+        k += 1
+    return total
+
+
+@lru_cache(maxsize=None)
+def _pvalue_table() -> np.ndarray:
+    """Asymptotic p-values at the normalized statistics of TABLE_GRID, computed once"""
+    return np.clip(1 - _cdf_cvm_inf(TABLE_GRID), 0, 1)
+
+
+def _cvm_asymptotic_pvalues(t: np.ndarray, n_ref: int, n: int, table: bool = False) -> np.ndarray:
+    """
+    Asymptotic p-values of CVM statistics, as computed by :func:`scipy.stats.cramervonmises_2samp`,
+    or interpolated from a lookup table of the limiting distribution
+    """
+    k, total = n_ref * n, n_ref + n
+    et = (1 + 1 / total) / 6
+    vt = (total + 1) * (4 * k * total - 3 * (n_ref**2 + n**2) - 2 * k) / (45 * total**2 * 4 * k)
+    tn = 1 / 6 + (t - et) / math.sqrt(45 * vt)
+    if table:
+        return np.interp(tn, TABLE_GRID, _pvalue_table(), left=1.0)
+    p_val = np.ones_like(tn)
+    # Below 0.003 the CDF is under 1.28e-18
+    tested = tn >= 0.003
+    p_val[tested] = np.clip(1 - _cdf_cvm_inf(tn[tested]), 0, 1)
+    return p_val
+
+
+def _cvm_exact_pvalues(x_ref: np.ndarray, x: np.ndarray) -> np.ndarray:
+    """Exact p-values of the CVM test of each feature, for data of shape (n_features, n_samples)"""
+    return np.array([cramervonmises_2samp(r, t, method="exact").pvalue for r, t in zip(x_ref, x)])
 
 
 class DriftCVM(BaseUnivariateDrift):
@@ -50,6 +138,13 @@ class DriftCVM(BaseUnivariateDrift):
         Number of features used in the statistical test. No need to pass it if no
         preprocessing takes place. In case of a preprocessing step, this can also
         be inferred automatically but could be more expensive to compute.
+    method : Literal["auto", "exact", "asymptotic", "table"], default "auto"
+        Method of computing the p-values. 'auto' computes exact p-values if neither
+        sample has more than 20 instances and asymptotic p-values otherwise. 'table'
+        interpolates the asymptotic p-values from a lookup table computed once.
+    n_jobs : Optional[int], default None
+        Number of processes computing exact p-values, which cannot be vectorized, over
+        contiguous chunks of the features, where None is 1 and -1 uses all cores.
     """
 
     def __init__(
@@ -61,6 +156,8 @@ class DriftCVM(BaseUnivariateDrift):
         preprocess_fn: Optional[Callable[[np.ndarray], np.ndarray]] = None,
         correction: Literal["bonferroni", "fdr"] = "bonferroni",
         n_features: Optional[int] = None,
+        method: Literal["auto", "exact", "asymptotic", "table"] = "auto",
+        n_jobs: Optional[int] = None,
     ) -> None:
         super().__init__(
             x_ref=x_ref,
@@ -70,8 +167,13 @@ class DriftCVM(BaseUnivariateDrift):
             preprocess_fn=preprocess_fn,
             correction=correction,
             n_features=n_features,
+            n_jobs=n_jobs,
         )
 
+        if method not in ("auto", "exact", "asymptotic", "table"):
+            raise ValueError("`method` must be `auto`, `exact`, `asymptotic` or `table`.")
+        self.method = method
+
     @preprocess_x
     def score(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -87,11 +189,12 @@ class DriftCVM(BaseUnivariateDrift):
         -------
         Feature level p-values and CVM statistics.
         """
-        x = x.reshape(x.shape[0], -1)
-        x_ref = self.x_ref.reshape(self.x_ref.shape[0], -1)
-        p_val = np.zeros(self.n_features, dtype=np.float32)
-        dist = np.zeros_like(p_val)
-        for f in range(self.n_features):
-            result = cramervonmises_2samp(x_ref[:, f], x[:, f], method="auto")
-            p_val[f], dist[f] = result.pvalue, result.statistic
-        return p_val, dist
+        x = x.reshape(x.shape[0], -1).T
+        x_ref = self._x_ref_sorted
+        n_ref, n = x_ref.shape[1], x.shape[1]
+        dist = _cvm_statistics(x_ref, x)
+        if self.method == "exact" or (self.method == "auto" and max(n_ref, n) <= EXACT_MAX_SIZE):
+            p_val = self._map_features(_cvm_exact_pvalues, x_ref, x)
+        else:
+            p_val = _cvm_asymptotic_pvalues(dist, n_ref, n, table=self.method == "table")
+        return p_val.astype(np.float32), dist.astype(np.float32)
@@ -9,10 +9,72 @@ Licensed under Apache Software License (Apache 2.0)
 from typing import Callable, Literal, Optional, Tuple
 
 import numpy as np
-from scipy.stats import ks_2samp
+from scipy.stats import ks_2samp, kstwo
 
 from .base import BaseUnivariateDrift, UpdateStrategy, preprocess_x
 
+# Largest product of the sample sizes for which the "auto" method computes exact p-values,
+# whose cost grows with the product
+EXACT_MAX_SIZE = 10_000
+
+
+def _ks_statistics(
+    x_ref: np.ndarray, x: np.ndarray, alternative: Literal["two-sided", "less", "greater"]
+) -> np.ndarray:
+    """
+    Computes the K-S statistic of every feature at once
+
+    Parameters
+    ----------
+    x_ref : np.ndarray
+        Reference data of shape (n_features, n_ref), sorted along each row
+    x : np.ndarray
+        Test data of shape (n_features, n)
+    alternative : Literal["two-sided", "less", "greater"]
+        The alternative hypothesis, as in :func:`scipy.stats.ks_2samp`
+
+    Returns
+    -------
+    np.ndarray
+        Statistic of each feature
+    """
+    n_ref, n = x_ref.shape[1], x.shape[1]
+    pooled = np.concatenate([x_ref, np.sort(x, axis=1)], axis=1)
+    # A stable sort of the two sorted runs of each row is a linear merge
+    order = np.argsort(pooled, axis=1, kind="stable")
+    values = np.take_along_axis(pooled, order, axis=1)
+    from_ref = order < n_ref
+    cdf_diffs = np.cumsum(from_ref, axis=1) / n_ref - np.cumsum(~from_ref, axis=1) / n
+    # The ECDFs are compared after the last of each group of tied values
+    last = np.ones(values.shape, dtype=bool)
+    last[:, :-1] = values[:, 1:] != values[:, :-1]
+    cdf_diffs = np.where(last, cdf_diffs, 0.0)
+    if alternative == "greater":
+        return cdf_diffs.max(axis=1)
+    if alternative == "less":
+        return -cdf_diffs.min(axis=1)
+    return np.abs(cdf_diffs).max(axis=1)
+
+
+def _ks_asymptotic_pvalues(
+    dist: np.ndarray, n_ref: int, n: int, alternative: Literal["two-sided", "less", "greater"]
+) -> np.ndarray:
+    """Asymptotic p-values of K-S statistics, as computed by :func:`scipy.stats.ks_2samp`"""
+    large, small = float(max(n_ref, n)), float(min(n_ref, n))
+    en = large * small / (large + small)
+    if alternative == "two-sided":
+        p_val = kstwo.sf(dist, np.round(en))
+    else:
+        # Hodges' approximation, which requires large to be the larger sample size
+        z = np.sqrt(en) * dist
+        p_val = np.exp(-2 * z**2 - 2 * z * (large + 2 * small) / np.sqrt(large * small * (large + small)) / 3.0)
+    return np.clip(p_val, 0, 1)
+
+
+def _ks_exact_pvalues(x_ref: np.ndarray, x: np.ndarray, alternative: str) -> np.ndarray:
+    """Exact p-values of the K-S test of each feature, for data of shape (n_features, n_samples)"""
+    return np.array([ks_2samp(r, t, alternative, method="exact")[1] for r, t in zip(x_ref, x)])
+
 
 class DriftKS(BaseUnivariateDrift):
     """
@@ -51,6 +113,13 @@ class DriftKS(BaseUnivariateDrift):
         Number of features used in the statistical test. No need to pass it if no
         preprocessing takes place. In case of a preprocessing step, this can also
         be inferred automatically but could be more expensive to compute.
+    method : Literal["auto", "exact", "asymp"], default "auto"
+        Method of computing the p-values. The exact p-values cost O(n_ref * n) per
+        feature, so 'auto' only computes them if the product of the sample sizes
+        is at most 10,000 and uses the asymptotic distribution otherwise.
+    n_jobs : Optional[int], default None
+        Number of processes computing exact p-values, which cannot be vectorized, over
+        contiguous chunks of the features, where None is 1 and -1 uses all cores.
     """
 
     def __init__(
@@ -63,6 +132,8 @@ class DriftKS(BaseUnivariateDrift):
         correction: Literal["bonferroni", "fdr"] = "bonferroni",
         alternative: Literal["two-sided", "less", "greater"] = "two-sided",
         n_features: Optional[int] = None,
+        method: Literal["auto", "exact", "asymp"] = "auto",
+        n_jobs: Optional[int] = None,
     ) -> None:
         super().__init__(
             x_ref=x_ref,
@@ -72,10 +143,15 @@ class DriftKS(BaseUnivariateDrift):
             preprocess_fn=preprocess_fn,
             correction=correction,
             n_features=n_features,
+            n_jobs=n_jobs,
         )
 
+        if method not in ("auto", "exact", "asymp"):
+            raise ValueError("`method` must be `auto`, `exact` or `asymp`.")
+
         # Other attributes
-        self.alternative = alternative
+        self.alternative: Literal["two-sided", "less", "greater"] = alternative
+        self.method = method
 
     @preprocess_x
     def score(self, x: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
@@ -91,10 +167,12 @@ class DriftKS(BaseUnivariateDrift):
         -------
         Feature level p-values and K-S statistics.
         """
-        x = x.reshape(x.shape[0], -1)
-        x_ref = self.x_ref.reshape(self.x_ref.shape[0], -1)
-        p_val = np.zeros(self.n_features, dtype=np.float32)
-        dist = np.zeros_like(p_val)
-        for f in range(self.n_features):
-            dist[f], p_val[f] = ks_2samp(x_ref[:, f], x[:, f], alternative=self.alternative, method="exact")
-        return p_val, dist
+        x = x.reshape(x.shape[0], -1).T
+        x_ref = self._x_ref_sorted
+        n_ref, n = x_ref.shape[1], x.shape[1]
+        dist = _ks_statistics(x_ref, x, self.alternative)
+        if self.method == "exact" or (self.method == "auto" and n_ref * n <= EXACT_MAX_SIZE):
+            p_val = self._map_features(_ks_exact_pvalues, x_ref, x, self.alternative)
+        else:
+            p_val = _ks_asymptotic_pvalues(dist, n_ref, n, self.alternative)
+        return p_val.astype(np.float32), dist.astype(np.float32)
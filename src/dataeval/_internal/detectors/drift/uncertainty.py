@@ -96,6 +96,9 @@ class DriftUncertainty:
         CPU if needed. Can be specified by passing either 'cuda', 'gpu' or 'cpu'.
     input_shape : Optional[tuple], default None
         Shape of input data.
+    n_jobs : Optional[int], default None
+        Number of processes computing the exact p-values of the K-S test, where
+        None is 1 and -1 uses all cores.
     """
 
     def __init__(
@@ -109,6 +112,7 @@ class DriftUncertainty:
         batch_size: int = 32,
         preprocess_batch_fn: Optional[Callable] = None,
         device: Optional[str] = None,
+        n_jobs: Optional[int] = None,
     ) -> None:
         def model_fn(x: np.ndarray) -> np.ndarray:
             return preprocess_drift(
@@ -131,6 +135,7 @@ class DriftUncertainty:
             x_ref_preprocessed=x_ref_preprocessed,
             update_x_ref=update_x_ref,
             preprocess_fn=preprocess_fn,
+            n_jobs=n_jobs,
         )
 
     def predict(self, x: np.ndarray) -> Dict[str, Union[int, float, np.ndarray]]:
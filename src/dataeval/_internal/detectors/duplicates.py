@@ -3,6 +3,7 @@ from typing import Dict, List, Literal
 import numpy as np
 
 from dataeval._internal.flags import ImageHash
+from dataeval._internal.functional.utils import DisjointSet
 from dataeval._internal.metrics.stats import ImageStats
 
 
@@ -20,20 +21,28 @@ class Duplicates:
         self.images = images
 
     def _get_duplicates(self) -> dict:
-        exact = {}
-        near = {}
-        for i, value in enumerate(self.results["xxhash"]):
-            exact.setdefault(value, []).append(i)
-        for i, value in enumerate(self.results["pchash"]):
-            near.setdefault(value, []).append(i)
-        exact = [v for v in exact.values() if len(v) > 1]
-        near = [v for v in near.values() if len(v) > 1 and not any(set(v).issubset(x) for x in exact)]
+        exact_labels = self._group_labels(self.results["xxhash"])
+        near_labels = self._group_labels(self.results["pchash"])
+        exact = self._label_groups(exact_labels)
+        # Hashes partition the images, so a near group lies within an exact group only if it shares one xxhash
+        near = [v for v in self._label_groups(near_labels) if np.any(exact_labels[v] != exact_labels[v[0]])]
 
         return {
-            "exact": sorted(exact),
-            "near": sorted(near),
+            "exact": exact,
+            "near": near,
         }
 
+    def _group_labels(self, values: List[str]) -> np.ndarray:
+        """Maps each hash value to the integer label of its first occurrence"""
+        _, first, inverse = np.unique(values, return_index=True, return_inverse=True)
+        return first[inverse.ravel()]
+
+    def _label_groups(self, labels: np.ndarray) -> List[List[int]]:
+        """Returns sorted groups of indices sharing a label"""
+        disjoint_set = DisjointSet(len(labels))
+        disjoint_set.union(np.arange(len(labels)), labels)
+        return disjoint_set.groups()
+
     def evaluate(self) -> Dict[Literal["exact", "near"], List[int]]:
         """
         Returns duplicate image indices for both exact matches and near matches
@@ -1,38 +1,66 @@
-from typing import Tuple
+from typing import Optional, Tuple
 
 import numpy as np
-from scipy.sparse import coo_matrix
 from scipy.stats import mode
 
-from dataeval._internal.functional.utils import compute_neighbors, get_classes_counts, minimum_spanning_tree
+from dataeval._internal.functional.neighbors import NeighborIndex
+from dataeval._internal.functional.utils import get_classes_counts, minimum_spanning_tree
 
+# Number of nearest neighbors used as candidate edges of the minimum spanning tree
+MST_NEIGHBORS = 10
 
-def ber_mst(X: np.ndarray, y: np.ndarray, _: int) -> Tuple[float, float]:
+
+def ber_mst(X: np.ndarray, y: np.ndarray, _: int, n_jobs: Optional[int] = None) -> Tuple[float, float]:
     """Calculates the Bayes Error Rate using a minimum spanning tree"""
+    return _ber_mst(NeighborIndex(X, n_jobs), y, _)[:2]
+
+
+def ber_knn(X: np.ndarray, y: np.ndarray, k: int, n_jobs: Optional[int] = None) -> Tuple[float, float]:
+    """Calculates the Bayes Error Rate using K-nearest neighbors"""
+    return _ber_knn(NeighborIndex(X, n_jobs), y, k)[:2]
+
+
+def _confusion(a: np.ndarray, b: np.ndarray, num_classes: int) -> np.ndarray:
+    """Counts the pairs (a[i], b[i]) of class indices in a num_classes x num_classes matrix"""
+    counts = np.bincount(a * num_classes + b, minlength=num_classes * num_classes)
+    return counts.reshape((num_classes, num_classes))
+
+
+def _ber_mst(index: NeighborIndex, y: np.ndarray, _: int) -> Tuple[float, float, np.ndarray]:
+    """
+    Calculates the Bayes Error Rate using a minimum spanning tree, along with the symmetric
+    counts of the tree edges joining each pair of classes
+    """
 
     M, N = get_classes_counts(y)
+    labels = np.unique(y, return_inverse=True)[1].reshape(-1)
 
-    tree = coo_matrix(minimum_spanning_tree(X))
-    matches = np.sum([y[tree.row[i]] != y[tree.col[i]] for i in range(N - 1)])
+    # Approximate neighbors would leave the Boruvka searches short of the minimum spanning tree
+    neighbors = index.kneighbors(min(max(MST_NEIGHBORS, index.cached_k), len(index) - 1)) if index.exact else None
+    rows, cols = minimum_spanning_tree(index.data, n_jobs=index.n_jobs, neighbors=neighbors)[:2]
+    edges = _confusion(labels[rows], labels[cols], M)
+    edges = edges + edges.T - np.diag(np.diag(edges))
+    matches = int(np.triu(edges, 1).sum())
     deltas = matches / (2 * N)
     upper = 2 * deltas
     lower = ((M - 1) / (M)) * (1 - max(1 - 2 * ((M) / (M - 1)) * deltas, 0) ** 0.5)
-    return upper, lower
+    return upper, lower, edges
 
 
-def ber_knn(X: np.ndarray, y: np.ndarray, k: int) -> Tuple[float, float]:
-    """Calculates the Bayes Error Rate using K-nearest neighbors"""
+def _ber_knn(index: NeighborIndex, y: np.ndarray, k: int) -> Tuple[float, float, np.ndarray]:
+    """
+    Calculates the Bayes Error Rate using K-nearest neighbors, along with the counts of samples
+    of each class whose neighbors vote for each class
+    """
 
     M, N = get_classes_counts(y)
+    classes, labels = np.unique(y, return_inverse=True)
 
-    # All features belong on second dimension
-    X = X.reshape((X.shape[0], -1))
-    nn_indices = compute_neighbors(X, X, k=k)
-    nn_indices = np.expand_dims(nn_indices, axis=1) if nn_indices.ndim == 1 else nn_indices
+    nn_indices = index.kneighbors(k)[1]
     modal_class = mode(y[nn_indices], axis=1, keepdims=True).mode.squeeze()
     upper = float(np.count_nonzero(modal_class - y) / N)
     lower = _knn_lowerbound(upper, M, k)
-    return upper, lower
+    return upper, lower, _confusion(labels.reshape(-1), np.searchsorted(classes, modal_class).reshape(-1), M)
 
 
 def _knn_lowerbound(value: float, classes: int, k: int) -> float:
@@ -0,0 +1,314 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+from scipy.spatial.distance import cdist
+
+GEMM_METRICS = ("euclidean", "cosine")
+BLOCK_BYTES = 2**26
+# Columns whose kth smallest distance bounds the candidates for the k nearest neighbors of a row
+THRESHOLD_COLUMNS = 1024
+# Relative rounding error of the float32 ranking of neighbors by |b|^2 - 2ab
+RANKING_TOLERANCE = 1e-5
+# Above this many features, tree searches are slower than brute force, as in scikit-learn's "auto" choice
+BRUTE_FORCE_FEATURES = 15
+
+# Squared distances below this fraction of the squared norms lose their precision to
+# cancellation in the GEMM expansion and are recomputed from the differences directly
+CANCELLATION_TOLERANCE = 1e-3
+
+
+def _effective_n_jobs(n_jobs: Optional[int]) -> int:
+    """Returns the number of workers for n_jobs, where None is 1 and negative values count back from all cores"""
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return max(1, n_jobs)
+
+
+def _prepare(x: np.ndarray, metric: str, center: Optional[np.ndarray]) -> np.ndarray:
+    """Casts to float32 and applies the transform under which the metric is a squared euclidean distance"""
+    x = np.asarray(x, dtype=np.float32).reshape((len(x), -1))
+    if metric == "cosine":
+        norms = np.linalg.norm(x, axis=1, keepdims=True)
+        return x / np.where(norms > 0, norms, 1)
+    return x - center if center is not None else x
+
+
+def _gemm_distances(a: np.ndarray, b: np.ndarray, sq_a: np.ndarray, sq_b: np.ndarray, metric: str) -> np.ndarray:
+    """Computes a block of distances from the expansion |a|^2 + |b|^2 - 2ab with a single matrix product"""
+    scale = sq_a[:, None] + sq_b[None, :]
+    sq_dist = scale - 2 * (a @ b.T)
+    rows, cols = np.nonzero(sq_dist <= CANCELLATION_TOLERANCE * scale)
+    if rows.size:
+        diff = a[rows] - b[cols]
+        sq_dist[rows, cols] = np.einsum("ij,ij->i", diff, diff)
+    np.maximum(sq_dist, 0, out=sq_dist)
+    if metric == "cosine":
+        return np.multiply(sq_dist, 0.5, out=sq_dist)
+    return np.sqrt(sq_dist, out=sq_dist)
+
+
+def blocked_distances(
+    a: np.ndarray,
+    b: Optional[np.ndarray] = None,
+    metric: str = "euclidean",
+    block_size: Optional[int] = None,
+) -> Iterator[Tuple[slice, np.ndarray]]:
+    """
+    Yields blocks of rows of the float32 distance matrix between a and b
+
+    Euclidean and cosine distances are computed with one float32 matrix product per block,
+    all other metrics are passed to :func:`scipy.spatial.distance.cdist`.
+
+    Parameters
+    ----------
+    a : np.ndarray
+        Array of shape (n_samples_a, n_features)
+    b : Optional[np.ndarray], default None
+        Array of shape (n_samples_b, n_features), a is used if not provided
+    metric : str, default "euclidean"
+        Distance metric, either "euclidean", "cosine" or any metric supported by cdist
+    block_size : Optional[int], default None
+        Number of rows of a per block, sized to bound the block's memory if not provided
+
+    Yields
+    ------
+    Tuple[slice, np.ndarray]
+        Slice of the rows of a and the float32 distances from those rows to b
+    """
+    n_a = len(a)
+    if block_size is None:
+        block_size = max(1, BLOCK_BYTES // (4 * max(len(a if b is None else b), 1)))
+    distances = _block_distances(a, b, metric)
+    for start in range(0, n_a, block_size):
+        rows = slice(start, min(start + block_size, n_a))
+        yield rows, distances(rows)
+
+
+def _block_distances(a: np.ndarray, b: Optional[np.ndarray], metric: str) -> Callable[[slice], np.ndarray]:
+    """Prepares a and b once, and returns a function computing the float32 distances from a slice of rows of a to b"""
+    same = b is None
+    b = a if b is None else b
+    n_a, n_b = len(a), len(b)
+
+    if metric not in GEMM_METRICS:
+        a, b = a.reshape((n_a, -1)), b.reshape((n_b, -1))
+        return lambda rows: cdist(a[rows], b, metric=metric).astype(np.float32)  # type: ignore
+
+    # Centering keeps the norms, and therefore the cancellation error, small
+    center = np.asarray(a, dtype=np.float32).reshape((n_a, -1)).mean(axis=0)
+    a = _prepare(a, metric, center)
+    b = a if same else _prepare(b, metric, center)
+    sq_a = np.einsum("ij,ij->i", a, a)
+    sq_b = sq_a if same else np.einsum("ij,ij->i", b, b)
+
+    def distances(rows: slice) -> np.ndarray:
+        block = _gemm_distances(a[rows], b, sq_a[rows], sq_b, metric)
+        if same:
+            # Distance of a sample to itself is exactly zero
+            block[np.arange(block.shape[0]), np.arange(rows.start, rows.stop)] = 0
+        return block
+
+    return distances
+
+
+def _candidates(
+    block: np.ndarray, k: int, slack: Union[float, np.ndarray] = 0.0, max_candidates: Optional[int] = None
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Yields the rows and columns of the values of block which may be among the k smallest of their row,
+    in chunks of rows holding at most max_candidates values unless a single row holds more
+    """
+    # The kth smallest value of a subset of the columns bounds the kth smallest value of the row,
+    # so only the few values below it need to be ordered. Columns strided across the whole row keep
+    # the bound tight when the columns are sorted, for instance by label.
+    step = max(1, block.shape[1] // max(THRESHOLD_COLUMNS, k))
+    bound = np.partition(block[:, ::step], k - 1, axis=1)[:, k - 1] + slack
+    counts = np.count_nonzero(block <= bound[:, None], axis=1)
+    limit = max_candidates or int(counts.sum())
+    start = 0
+    while start < len(block):
+        # Rows are added while the cumulative number of candidates stays within the limit
+        stop = start + max(1, int(np.searchsorted(np.cumsum(counts[start:]), limit, side="right")))
+        rows, cols = np.nonzero(block[start:stop] <= bound[start:stop, None])
+        yield rows + start, cols
+        start = stop
+
+
+def _smallest_k(rows: np.ndarray, cols: np.ndarray, values: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the k smallest values of each row from the first to the last given, as (row, column, value)
+    triplets sorted by row, and their columns
+    """
+    order = np.lexsort((cols, values, rows))
+    starts = np.searchsorted(rows[order], np.arange(rows[0], rows[-1] + 1) if rows.size else np.zeros(0, dtype=int))
+    selected = order[starts[:, None] + np.arange(k)]
+    return values[selected], cols[selected]
+
+
+def blocked_kneighbors(
+    a: np.ndarray,
+    b: Optional[np.ndarray] = None,
+    k: int = 1,
+    metric: str = "euclidean",
+    max_bytes: int = BLOCK_BYTES,
+    n_jobs: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the k nearest neighbors in b of each sample of a with a brute force search in blocks of rows
+
+    Only the candidate neighbors of each row of a block are kept, so the memory used by the search
+    is bounded by max_bytes for any number of samples. Euclidean and cosine neighbors are ranked
+    with one float32 matrix product per block, and the distances to the candidates are computed
+    from their differences.
+
+    Parameters
+    ----------
+    a : np.ndarray
+        Array of query samples of shape (n_samples_a, n_features)
+    b : Optional[np.ndarray], default None
+        Array of shape (n_samples_b, n_features), a is used if not provided and each sample of a is
+        then excluded from its own neighbors
+    k : int, default 1
+        Number of neighbors
+    metric : str, default "euclidean"
+        Distance metric, either "euclidean", "cosine" or any metric supported by cdist
+    max_bytes : int, default 2**26
+        Approximate memory ceiling of the blocks held at once by all threads
+    n_jobs : Optional[int], default None
+        Number of threads searching blocks concurrently, where None is 1 and -1 uses all cores
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray]
+        Float32 distances and indices of the neighbors of shape (n_samples_a, k), sorted by distance
+
+    Raises
+    ------
+    ValueError
+        If k is not between 1 and the number of samples of b, excluding the query itself when b is a
+    """
+    same = b is None
+    b = a if b is None else b
+    n_a, n_b = len(a), len(b)
+    if not 0 < k <= n_b - same:
+        raise ValueError(f"k should be between 1 and {n_b - same}; got {k}")
+    workers = _effective_n_jobs(n_jobs)
+    # Each float32 block is held alongside its boolean comparison to the bound of the candidates,
+    # and the chunks of candidates ordered at once, which take about 64 bytes each
+    block_size = max(1, max_bytes // (8 * n_b * workers))
+    max_candidates = max(k, block_size * n_b // 32)
+
+    nearest: Callable[[slice], Tuple[np.ndarray, np.ndarray]]
+    if metric in GEMM_METRICS:
+        # Centering keeps the norms, and therefore the cancellation error, small
+        center = np.asarray(a, dtype=np.float32).reshape((n_a, -1)).mean(axis=0)
+        a = _prepare(a, metric, center)
+        b = a if same else _prepare(b, metric, center)
+        sq_a = np.einsum("ij,ij->i", a, a)
+        sq_b = sq_a if same else np.einsum("ij,ij->i", b, b)
+        nearest = partial(_gemm_kneighbors, a, b, sq_a, sq_b, metric, same, k, max_candidates)
+    else:
+        distances = _block_distances(a, None if same else b, metric)
+        nearest = partial(_cdist_kneighbors, distances, same, k, max_candidates)
+
+    blocks = [slice(start, min(start + block_size, n_a)) for start in range(0, n_a, block_size)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(nearest, blocks))
+    if not results:
+        return np.zeros((0, k), dtype=np.float32), np.zeros((0, k), dtype=np.intp)
+    return np.concatenate([dist for dist, _ in results]), np.concatenate([ind for _, ind in results])
+
+
+def _cdist_kneighbors(
+    distances: Callable[[slice], np.ndarray], same: bool, k: int, max_candidates: int, rows: slice
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the k nearest neighbors of a block of rows from their distances to all samples"""
+    block = distances(rows)
+    if same:
+        block[np.arange(block.shape[0]), np.arange(rows.start, rows.stop)] = np.inf
+    results = [
+        _smallest_k(cand_rows, cand_cols, block[cand_rows, cand_cols], k)
+        for cand_rows, cand_cols in _candidates(block, k, max_candidates=max_candidates)
+    ]
+    return np.concatenate([dist for dist, _ in results]), np.concatenate([ind for _, ind in results])
+
+
+def _gemm_kneighbors(
+    a: np.ndarray,
+    b: np.ndarray,
+    sq_a: np.ndarray,
+    sq_b: np.ndarray,
+    metric: str,
+    same: bool,
+    k: int,
+    max_candidates: int,
+    rows: slice,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Returns the k nearest neighbors of a block of rows of the prepared samples a among the prepared
+    samples b, given their squared norms, ranked with a single matrix product
+    """
+    # Ranking by |b|^2 - 2ab leaves out |a|^2, which is the same along each row
+    block = a[rows] @ b.T
+    block *= -2
+    block += sq_b
+    if same:
+        block[np.arange(block.shape[0]), np.arange(rows.start, rows.stop)] = np.inf
+    # Candidates within the rounding error of the ranking are kept and ordered by their distances
+    results = []
+    slack = RANKING_TOLERANCE * (sq_a[rows] + sq_b.max())
+    for cand_rows, cand_cols in _candidates(block, k, slack, max_candidates):
+        query = cand_rows + rows.start
+        scale = sq_a[query] + sq_b[cand_cols]
+        sq_dist = block[cand_rows, cand_cols] + sq_a[query]
+        recompute = np.flatnonzero(sq_dist <= CANCELLATION_TOLERANCE * scale)
+        # Differences are taken a few at a time, as each holds all of the features
+        sections = max(1, -(-recompute.size * a.shape[1] // (4 * max_candidates)))
+        for part in np.array_split(recompute, sections):
+            diff = a[query[part]] - b[cand_cols[part]]
+            sq_dist[part] = np.einsum("ij,ij->i", diff, diff)
+        np.maximum(sq_dist, 0, out=sq_dist)
+        dist = sq_dist * 0.5 if metric == "cosine" else np.sqrt(sq_dist)
+        results.append(_smallest_k(cand_rows, cand_cols, dist, k))
+    return np.concatenate([dist for dist, _ in results]), np.concatenate([ind for _, ind in results])
+
+
+def pairwise_distances(
+    a: np.ndarray,
+    b: Optional[np.ndarray] = None,
+    metric: str = "euclidean",
+    block_size: Optional[int] = None,
+) -> np.ndarray:
+    """
+    Returns the float32 distance matrix between a and b, computed in blocks of rows
+
+    Parameters
+    ----------
+    a : np.ndarray
+        Array of shape (n_samples_a, n_features)
+    b : Optional[np.ndarray], default None
+        Array of shape (n_samples_b, n_features), a is used if not provided
+    metric : str, default "euclidean"
+        Distance metric, either "euclidean", "cosine" or any metric supported by cdist
+    block_size : Optional[int], default None
+        Number of rows of a per block, sized to bound the block's memory if not provided
+
+    Returns
+    -------
+    np.ndarray
+        Distance matrix of shape (n_samples_a, n_samples_b)
+    """
+    dist = np.empty((len(a), len(a) if b is None else len(b)), dtype=np.float32)
+    for rows, block in blocked_distances(a, b, metric, block_size):
+        dist[rows] = block
+        if b is None:
+            # Mirror the upper triangle so that the matrix is exactly symmetric
+            dist[rows, : rows.start] = dist[: rows.start, rows].T
+            diagonal = dist[rows, rows]
+            dist[rows, rows] = np.triu(diagonal) + np.triu(diagonal, 1).T
+    return dist
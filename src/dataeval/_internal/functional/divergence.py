@@ -1,16 +1,40 @@
+from typing import Optional
+
 import numpy as np
 
+from .neighbors import NeighborIndex
 from .utils import compute_neighbors, minimum_spanning_tree
 
 
-def divergence_mst(data: np.ndarray, labels: np.ndarray) -> int:
-    mst = minimum_spanning_tree(data).toarray()
-    edgelist = np.transpose(np.nonzero(mst))
-    errors = np.sum(labels[edgelist[:, 0]] != labels[edgelist[:, 1]])
-    return errors
+def divergence_mst(data: np.ndarray, labels: np.ndarray, n_jobs: Optional[int] = None) -> int:
+    labels = labels.reshape(-1)
+    rows, cols, _ = minimum_spanning_tree(data, n_jobs=n_jobs)
+    return int(np.count_nonzero(labels[rows] != labels[cols]))
+
+
+def divergence_fnn(data: np.ndarray, labels: np.ndarray, n_jobs: Optional[int] = None) -> int:
+    labels = labels.reshape(-1)
+    nn_indices = compute_neighbors(data, data, n_jobs=n_jobs)
+    return int(np.count_nonzero(labels[nn_indices] != labels))
+
+
+def _divergence_mst(index_a: NeighborIndex, index_b: NeighborIndex) -> int:
+    """Counts the minimum spanning tree edges joining a sample of each dataset"""
+    # The tree spans both datasets, so unlike the FNN searches it needs them in a single array
+    data = np.concatenate((index_a.data, index_b.data))
+    labels = np.repeat(np.array([0, 1], dtype=np.int8), [len(index_a), len(index_b)])
+    return divergence_mst(data, labels, index_a.n_jobs)
 
 
-def divergence_fnn(data: np.ndarray, labels: np.ndarray) -> int:
-    nn_indices = compute_neighbors(data, data)
-    errors = np.sum(np.abs(labels[nn_indices] - labels))
+def _divergence_fnn(index_a: NeighborIndex, index_b: NeighborIndex) -> int:
+    """
+    Counts the samples whose nearest neighbor among both datasets belongs to the other dataset,
+    comparing the cached nearest neighbor within each dataset to a query of the other one
+    """
+    errors = 0
+    for own, other in ((index_a, index_b), (index_b, index_a)):
+        # A single sample has no neighbor within its own dataset
+        within = own.kneighbors(1)[0][:, 0] if len(own) > 1 else np.full(len(own), np.inf)
+        across = other.query(own.data, 1)[0][:, 0]
+        errors += int(np.count_nonzero(across < within))
     return errors
@@ -0,0 +1,142 @@
+from typing import Optional, Tuple
+
+import numpy as np
+from scipy.special import digamma, xlogy
+from sklearn.neighbors import NearestNeighbors
+
+
+def prepare_continuous(values: np.ndarray, rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scales a continuous factor to unit variance and jitters it to break ties, as advised by Kraskov et al.
+
+    Returns the prepared values and their sorted copy, which serves as the neighbor index of the factor
+    for every pair it is part of.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    std = values.std()
+    if std > 0:
+        values = values / std
+    values = values + 1e-10 * max(1.0, float(np.mean(np.abs(values)))) * rng.standard_normal(len(values))
+    return values, np.sort(values)
+
+
+def _count_within(sorted_values: np.ndarray, values: np.ndarray, radius: np.ndarray) -> np.ndarray:
+    """Counts the sorted values within the radius of each value, inclusive and including the value itself"""
+    n = len(sorted_values)
+    upper = np.searchsorted(sorted_values, values + radius, side="right")
+    lower = np.searchsorted(sorted_values, values - radius, side="left")
+    # Rounding of the bounds can misplace values at the radius, so the bounds are corrected by the differences
+    while np.any(move := (upper > 0) & (sorted_values[upper - 1] - values > radius)):
+        upper[move] -= 1
+    while np.any(move := (upper < n) & (sorted_values[np.minimum(upper, n - 1)] - values <= radius)):
+        upper[move] += 1
+    while np.any(move := (lower < n) & (values - sorted_values[np.minimum(lower, n - 1)] > radius)):
+        lower[move] += 1
+    while np.any(move := (lower > 0) & (values - sorted_values[lower - 1] <= radius)):
+        lower[move] -= 1
+    return upper - lower
+
+
+def _kth_neighbor_distance(values: np.ndarray, groups: np.ndarray, k: np.ndarray) -> np.ndarray:
+    """
+    Distance from each value to its k-th nearest neighbor among the values of the same group
+
+    Within a group sorted by value, the k nearest neighbors of a value are within k positions of it, so
+    the distances come from a window of 2k values instead of a tree per group. Every value must have at
+    least k neighbors in its group.
+    """
+    order = np.lexsort((values, groups))
+    ordered, ordered_groups = values[order], groups[order]
+    n, window = len(values), int(k.max())
+    offsets = np.concatenate([np.arange(-window, 0), np.arange(1, window + 1)])
+    neighbors = np.arange(n)[:, None] + offsets
+    clipped = np.clip(neighbors, 0, n - 1)
+    valid = (neighbors == clipped) & (ordered_groups[clipped] == ordered_groups[:, None])
+    distances = np.where(valid, np.abs(ordered[clipped] - ordered[:, None]), np.inf)
+    distances.sort(axis=1)
+    kth = np.empty(n)
+    kth[order] = np.take_along_axis(distances, k[order, None] - 1, axis=1)[:, 0]
+    return kth
+
+
+def mutual_info_discrete(codes: np.ndarray, num_values: np.ndarray) -> np.ndarray:
+    """
+    Mutual information in nats between every pair of categorical factors
+
+    The joint counts of a factor with all of the following factors come from a single bincount, and
+    the mutual information of the pairs is the difference of their marginal and joint entropies.
+    The diagonal holds the entropy of each factor.
+
+    Parameters
+    ----------
+    codes : np.ndarray
+        Integer codes of the factors of shape (num_samples, num_factors)
+    num_values : np.ndarray
+        Number of codes of each factor
+
+    Returns
+    -------
+    np.ndarray
+        Symmetric matrix of shape (num_factors, num_factors)
+    """
+    num_samples, num_factors = codes.shape
+    num_values = np.asarray(num_values, dtype=np.intp)
+    mi = np.zeros((num_factors, num_factors))
+    counts = [np.bincount(codes[:, i], minlength=num_values[i]).astype(np.float64) for i in range(num_factors)]
+    entropy = np.log(num_samples) - np.array([xlogy(c, c).sum() for c in counts]) / num_samples
+    for i in range(num_factors):
+        sizes = num_values[i] * num_values[i:]
+        offsets = np.concatenate([[0], np.cumsum(sizes)])
+        keys = offsets[:-1] + codes[:, i : i + 1] * num_values[i:] + codes[:, i:]
+        joint = np.bincount(keys.reshape(-1), minlength=offsets[-1]).astype(np.float64)
+        joint_entropy = np.log(num_samples) - np.add.reduceat(xlogy(joint, joint), offsets[:-1]) / num_samples
+        mi[i, i:] = entropy[i] + entropy[i:] - joint_entropy
+    mi = np.maximum(np.triu(mi) + np.triu(mi, 1).T, 0.0)
+    return mi
+
+
+def mutual_info_continuous(x: np.ndarray, y: np.ndarray, sorted_x: np.ndarray, sorted_y: np.ndarray, k: int) -> float:
+    """
+    Estimates the mutual information in nats between two continuous factors
+
+    Uses the estimator of Kraskov et al., where the marginal counts come from the sorted values
+    of each factor.
+
+    References
+    ----------
+    A. Kraskov, H. Stogbauer and P. Grassberger, "Estimating mutual information". Phys. Rev. E 69, 2004.
+    """
+    n = len(x)
+    k = min(k, n - 1)
+    nn = NearestNeighbors(metric="chebyshev", n_neighbors=k).fit(np.stack([x, y], axis=1))
+    radius = np.nextafter(nn.kneighbors()[0][:, -1], 0)
+    nx = _count_within(sorted_x, x, radius) - 1
+    ny = _count_within(sorted_y, y, radius) - 1
+    mi = digamma(n) + digamma(k) - np.mean(digamma(nx + 1)) - np.mean(digamma(ny + 1))
+    return max(0.0, float(mi))
+
+
+def mutual_info_mixed(c: np.ndarray, d: np.ndarray, sorted_c: Optional[np.ndarray], k: int) -> float:
+    """
+    Estimates the mutual information in nats between a continuous factor and a categorical factor
+
+    Uses the estimator of Ross, ignoring the samples whose category is unique. The sorted values
+    of the continuous factor are reused when every sample is kept.
+
+    References
+    ----------
+    B. C. Ross "Mutual Information between Discrete and Continuous Data Sets". PLoS ONE 9(2), 2014.
+    """
+    label_counts = np.bincount(d)[d]
+    keep = label_counts > 1
+    if not np.any(keep):
+        return 0.0
+    if not np.all(keep) or sorted_c is None:
+        c, d, label_counts = c[keep], d[keep], label_counts[keep]
+        sorted_c = np.sort(c)
+
+    k_all = np.minimum(k, label_counts - 1)
+    radius = np.nextafter(_kth_neighbor_distance(c, d, k_all), 0)
+    m_all = _count_within(sorted_c, c, radius)
+    mi = digamma(len(c)) + np.mean(digamma(k_all)) - np.mean(digamma(label_counts)) - np.mean(digamma(m_all))
+    return max(0.0, float(mi))
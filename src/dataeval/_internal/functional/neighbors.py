@@ -0,0 +1,376 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal, Optional, Tuple, Union, cast
+
+import numpy as np
+from numpy.typing import ArrayLike
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.neighbors import NearestNeighbors
+
+from dataeval._internal.functional.distance import (
+    BRUTE_FORCE_FEATURES,
+    _effective_n_jobs,
+    _gemm_distances,
+    blocked_kneighbors,
+)
+
+_METHODS = Literal["exact", "ivf"]
+
+QUERY_BLOCK = 4096
+TRAINING_SAMPLES_PER_LIST = 64
+
+
+def _drop_self(distances: np.ndarray, indices: np.ndarray, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Removes each queried sample from its own k + 1 neighbors, or the farthest neighbor when a
+    duplicate sample took its place
+    """
+    is_self = indices == rows[:, None]
+    is_self[~is_self.any(axis=1), -1] = True
+    shape = (len(rows), indices.shape[1] - 1)
+    return distances[~is_self].reshape(shape), indices[~is_self].reshape(shape)
+
+
+def _merge_neighbors(
+    distances: np.ndarray, indices: np.ndarray, other_distances: np.ndarray, other_indices: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Returns the k nearest of two sets of neighbors of the same samples, sorted by distance"""
+    distances = np.concatenate((distances, other_distances), axis=1)
+    indices = np.concatenate((indices, other_indices), axis=1)
+    order = np.argsort(distances, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(distances, order, axis=1), np.take_along_axis(indices, order, axis=1)
+
+
+class _BruteForceIndex:
+    """Exact search of the blocked float32 distances, with the query interface of scikit-learn"""
+
+    def __init__(self, n_jobs: Optional[int] = None):
+        self.n_jobs = n_jobs
+
+    def fit(self, X: np.ndarray) -> "_BruteForceIndex":
+        self._data = X
+        return self
+
+    def kneighbors(self, X: Optional[np.ndarray] = None, n_neighbors: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        if X is None:
+            distances, indices = blocked_kneighbors(self._data, k=n_neighbors, n_jobs=self.n_jobs)
+        else:
+            distances, indices = blocked_kneighbors(X, self._data, n_neighbors, n_jobs=self.n_jobs)
+        return distances.astype(np.float64), indices
+
+
+class _IVFIndex:
+    """
+    Inverted file index searching the samples of the lists whose k-means centroids are nearest
+    to each query, with exact float32 distances to the samples of the probed lists
+    """
+
+    def __init__(self, n_lists: Optional[int] = None, n_probe: int = 8, n_jobs: Optional[int] = None):
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self.n_jobs = n_jobs
+
+    def fit(self, X: np.ndarray) -> "_IVFIndex":
+        n = len(X)
+        n_lists = min(n, self.n_lists or max(1, int(np.sqrt(n))))
+        # Centering keeps the norms, and therefore the cancellation error of the distances, small
+        self._center = X.mean(axis=0, dtype=np.float64).astype(np.float32)
+        X = np.asarray(X, dtype=np.float32) - self._center
+
+        rng = np.random.default_rng(0)
+        training = X[rng.permutation(n)[: TRAINING_SAMPLES_PER_LIST * n_lists]]
+        kmeans = MiniBatchKMeans(n_clusters=n_lists, n_init=3, random_state=0).fit(training)  # type: ignore
+        self._centroids = np.asarray(kmeans.cluster_centers_, dtype=np.float32)
+        lists = kmeans.predict(X)
+
+        # Samples are stored contiguously by list so that each probed list is a single slice
+        self._order = np.argsort(lists, kind="stable")
+        self._offsets = np.concatenate([[0], np.cumsum(np.bincount(lists, minlength=n_lists))])
+        self._sizes = np.diff(self._offsets)
+        self._data = X[self._order]
+        self._sq_data = np.einsum("ij,ij->i", self._data, self._data)
+        self._sq_centroids = np.einsum("ij,ij->i", self._centroids, self._centroids)
+        return self
+
+    def _search(self, X: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        sq_x = np.einsum("ij,ij->i", X, X)
+        centroid_dist = self._sq_centroids[None, :] - 2 * (X @ self._centroids.T)
+        ranked = np.argsort(centroid_dist, axis=1)
+        # Probe more lists for the queries whose nearest lists hold fewer than k samples
+        covered = np.cumsum(self._sizes[ranked], axis=1)
+        n_probe = np.maximum(np.minimum(self.n_probe, ranked.shape[1]), (covered < k).sum(axis=1) + 1)
+        queries, ranks = np.nonzero(np.arange(ranked.shape[1])[None, :] < n_probe[:, None])
+        probes = ranked[queries, ranks]
+        order = np.argsort(probes, kind="stable")
+        queries, probes = queries[order], probes[order]
+        bounds = np.flatnonzero(np.diff(probes)) + 1
+
+        best_dist = np.full((len(X), k), np.inf, dtype=np.float32)
+        best_ind = np.zeros((len(X), k), dtype=np.intp)
+        for start, members in zip(np.concatenate([[0], bounds]), np.split(queries, bounds)):
+            lo, hi = self._offsets[probes[start]], self._offsets[probes[start] + 1]
+            dist = _gemm_distances(X[members], self._data[lo:hi], sq_x[members], self._sq_data[lo:hi], "euclidean")
+            dist = np.concatenate([best_dist[members], dist], axis=1)
+            ind = np.concatenate([best_ind[members], np.broadcast_to(self._order[lo:hi], dist[:, k:].shape)], axis=1)
+            if dist.shape[1] > k:
+                keep = np.argpartition(dist, k - 1, axis=1)[:, :k]
+                dist, ind = np.take_along_axis(dist, keep, axis=1), np.take_along_axis(ind, keep, axis=1)
+            best_dist[members], best_ind[members] = dist, ind
+
+        order = np.argsort(best_dist, axis=1, kind="stable")
+        return np.take_along_axis(best_dist, order, axis=1), np.take_along_axis(best_ind, order, axis=1)
+
+    def kneighbors(self, X: Optional[np.ndarray] = None, n_neighbors: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        queries = self._data[np.argsort(self._order)] if X is None else np.asarray(X, dtype=np.float32) - self._center
+        k = n_neighbors + 1 if X is None else n_neighbors
+        blocks = [queries[start : start + QUERY_BLOCK] for start in range(0, len(queries), QUERY_BLOCK)]
+        with ThreadPoolExecutor(max_workers=_effective_n_jobs(self.n_jobs)) as executor:
+            results = list(executor.map(lambda block: self._search(block, k), blocks))
+        distances = np.concatenate([dist for dist, _ in results]).astype(np.float64)
+        indices = np.concatenate([ind for _, ind in results])
+        if X is None:
+            return _drop_self(distances, indices, np.arange(len(queries)))
+        return distances, indices
+
+
+class NeighborIndex:
+    """
+    Nearest neighbor index over a set of images or image embeddings, built once and shared by metrics
+
+    The search structure is fitted on first use. Neighbors of the indexed samples are cached for the
+    largest k requested so far, and smaller requests are served from the cache. An index can be passed
+    to :class:`.BER`, :class:`.Divergence` and :class:`.Coverage` in place of the data, and saved to
+    disk along with its cached neighbors.
+
+    The "ivf" method trades exactness for speed on large sets of high-dimensional embeddings. It
+    partitions the samples into lists with mini-batch k-means and only searches the n_probe lists
+    whose centroids are nearest to each query. Its recall can be estimated with :meth:`recall`.
+
+    Parameters
+    ----------
+    data : ArrayLike
+        Array of images or image embeddings, flattened to (n_samples, n_features)
+    n_jobs : Optional[int], default None
+        Number of parallel jobs for the neighbor searches, where None is 1 and -1 uses all cores
+    method : Literal["exact", "ivf"], default "exact"
+        Exact search, or approximate search with an inverted file index. Exact searches use
+        scikit-learn trees for up to 15 features, and a blocked brute force search otherwise
+    n_lists : Optional[int], default None
+        Number of lists of the inverted file index, the square root of n_samples if not provided
+    n_probe : int, default 8
+        Number of lists searched for each query by the inverted file index, where more lists
+        increase the recall at the cost of speed
+
+    Note
+    ----
+    The data is not copied until samples are added, and must not be modified while the index is in use.
+    """
+
+    def __init__(
+        self,
+        data: ArrayLike,
+        n_jobs: Optional[int] = None,
+        method: _METHODS = "exact",
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+    ):
+        if method not in ("exact", "ivf"):
+            raise ValueError(f"method should be one of ('exact', 'ivf'); got {method}")
+        data = np.asarray(data)
+        self._data: np.ndarray = data.reshape((len(data), -1))
+        self.n_jobs = n_jobs
+        self.method: _METHODS = method
+        self.n_lists = n_lists
+        self.n_probe = n_probe
+        self._tree: Optional[Union[NearestNeighbors, _BruteForceIndex, _IVFIndex]] = None
+        self._distances: Optional[np.ndarray] = None
+        self._indices: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def data(self) -> np.ndarray:
+        """Indexed samples of shape (n_samples, n_features)"""
+        return self._data
+
+    @property
+    def cached_k(self) -> int:
+        """Number of neighbors currently cached for each indexed sample"""
+        return 0 if self._indices is None else self._indices.shape[1]
+
+    @property
+    def exact(self) -> bool:
+        """Whether the searches return the exact nearest neighbors"""
+        return self.method == "exact"
+
+    def _fitted(self) -> Union[NearestNeighbors, _BruteForceIndex, _IVFIndex]:
+        if self._tree is None:
+            if self.exact and self._data.shape[1] > BRUTE_FORCE_FEATURES:
+                self._tree = _BruteForceIndex(self.n_jobs).fit(self._data)
+            elif self.exact:
+                tree = NearestNeighbors(n_jobs=self.n_jobs)
+                tree.fit(self._data)
+                self._tree = tree
+            else:
+                self._tree = _IVFIndex(self.n_lists, self.n_probe, self.n_jobs).fit(self._data)
+        return self._tree
+
+    def kneighbors(self, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the k nearest neighbors of every indexed sample, excluding the sample itself
+
+        Parameters
+        ----------
+        k : int
+            Number of neighbors
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Distances and indices of the neighbors of shape (n_samples, k), sorted by distance
+
+        Raises
+        ------
+        ValueError
+            If k is not between 1 and n_samples - 1
+        """
+        if not 0 < k < len(self):
+            raise ValueError(f"k should be between 1 and {len(self) - 1}; got {k}")
+        if k > self.cached_k:
+            self._distances, self._indices = self._fitted().kneighbors(n_neighbors=k)
+        distances, indices = cast(np.ndarray, self._distances), cast(np.ndarray, self._indices)
+        return distances[:, :k], indices[:, :k]
+
+    def query(self, X: ArrayLike, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the k nearest indexed samples of each sample in X
+
+        Parameters
+        ----------
+        X : ArrayLike
+            Array of query samples with the same number of features as the indexed data
+        k : int, default 1
+            Number of neighbors
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Distances and indices of the neighbors of shape (n_queries, k), sorted by distance
+        """
+        X = np.asarray(X)
+        return self._fitted().kneighbors(X.reshape((len(X), -1)), n_neighbors=k)
+
+    def add(self, X: ArrayLike) -> np.ndarray:
+        """
+        Appends samples to the index, updating the cached neighbors instead of searching them again
+
+        Cached neighbors of the indexed samples are merged with their nearest new samples, and the
+        new samples are searched against the indexed samples and each other. The search structure
+        is fitted again on the next query.
+
+        Parameters
+        ----------
+        X : ArrayLike
+            Array of samples with the same number of features as the indexed data
+
+        Returns
+        -------
+        np.ndarray
+            Indices of the previously indexed samples whose cached neighbors now include a new sample
+        """
+        X = np.asarray(X)
+        X = X.reshape((len(X), -1))
+        n, k = len(self), self.cached_k
+        changed = np.zeros(0, dtype=np.intp)
+        if len(X) and k:
+            distances, indices = cast(np.ndarray, self._distances), cast(np.ndarray, self._indices)
+            batch = NeighborIndex(X, self.n_jobs)
+            nearest_new = batch.query(self._data, min(k, len(X)))
+            old = _merge_neighbors(distances, indices, nearest_new[0], nearest_new[1] + n, k)
+            changed = np.flatnonzero((old[1] >= n).any(axis=1))
+
+            new = self.query(X, min(k, n))
+            if len(X) > 1:
+                within = batch.kneighbors(min(k, len(X) - 1))
+                new = _merge_neighbors(new[0], new[1], within[0], within[1] + n, k)
+            self._distances = np.concatenate((old[0], new[0]))
+            self._indices = np.concatenate((old[1], new[1]))
+        if len(X):
+            self._data = np.concatenate((self._data, X))
+            self._tree = None
+        return changed
+
+    def recall(self, k: int = 10, n_samples: int = 1000) -> float:
+        """
+        Estimates the fraction of the exact k nearest neighbors found by the index
+
+        The neighbors of a random subset of the indexed samples are compared with a brute force search.
+
+        Parameters
+        ----------
+        k : int, default 10
+            Number of neighbors
+        n_samples : int, default 1000
+            Number of indexed samples whose neighbors are compared
+
+        Returns
+        -------
+        float
+            Mean recall of the k nearest neighbors, which is 1.0 for the exact method
+        """
+        if not 0 < k < len(self):
+            raise ValueError(f"k should be between 1 and {len(self) - 1}; got {k}")
+        rows = np.sort(np.random.default_rng(0).permutation(len(self))[:n_samples])
+        queries = self._data[rows]
+        brute = NearestNeighbors(algorithm="brute", n_jobs=self.n_jobs).fit(self._data)
+        dist, ind = brute.kneighbors(queries, n_neighbors=k + 1)
+        expected = _drop_self(dist, ind, rows)[1]
+        dist, ind = self.query(queries, k + 1)
+        found = _drop_self(dist, ind, rows)[1]
+        hits = (found[:, :, None] == expected[:, None, :]).any(axis=2).sum()
+        return float(hits / expected.size)
+
+    def save(self, path: str) -> None:
+        """
+        Saves the data and the cached neighbors to a NumPy .npz file
+
+        Parameters
+        ----------
+        path : str
+            File path, with the .npz extension appended if missing
+        """
+        arrays = {"data": self._data, "method": np.array(self.method), "n_probe": np.array(self.n_probe)}
+        if self.n_lists is not None:
+            arrays.update(n_lists=np.array(self.n_lists))
+        if self._indices is not None:
+            arrays.update(distances=self._distances, indices=self._indices)
+        np.savez(path, **arrays)
+
+    @classmethod
+    def load(cls, path: str, n_jobs: Optional[int] = None) -> "NeighborIndex":
+        """
+        Loads an index saved with :meth:`save`, restoring its cached neighbors
+
+        Parameters
+        ----------
+        path : str
+            Path of the .npz file
+        n_jobs : Optional[int], default None
+            Number of parallel jobs for the neighbor searches, where None is 1 and -1 uses all cores
+
+        Returns
+        -------
+        NeighborIndex
+            The loaded index, whose search structure is fitted again on first query
+        """
+        with np.load(path) as arrays:
+            n_lists = int(arrays["n_lists"]) if "n_lists" in arrays else None
+            index = cls(arrays["data"], n_jobs, str(arrays["method"]), n_lists, int(arrays["n_probe"]))  # type: ignore
+            if "indices" in arrays:
+                index._distances, index._indices = arrays["distances"], arrays["indices"]
+        return index
+
+
+def as_index(data: Union[ArrayLike, NeighborIndex], n_jobs: Optional[int] = None) -> NeighborIndex:
+    """Returns data if it is already a NeighborIndex, otherwise an index over it"""
+    return data if isinstance(data, NeighborIndex) else NeighborIndex(data, n_jobs)
@@ -1,6 +1,93 @@
 import numpy as np
-from sklearn.metrics import average_precision_score
 
+from dataeval._internal.functional.distance import BLOCK_BYTES
 
-def uap(labels: np.ndarray, scores: np.ndarray):
-    return float(average_precision_score(labels, scores, average="weighted"))
+
+def _weighted_average(precision: np.ndarray, support: np.ndarray) -> float:
+    """Averages the precision of each class weighted by its number of samples"""
+    return float(np.sum(precision * support) / np.sum(support))
+
+
+def uap(labels: np.ndarray, scores: np.ndarray) -> float:
+    """
+    Computes the average precision of each class weighted by its support, as
+    sklearn.metrics.average_precision_score(labels, scores, average="weighted") does
+
+    The scores of a block of classes are sorted with a single vectorized sort. The average
+    precision of a class is the mean precision at the scores of its samples, where the number
+    of samples scored at or above each threshold is found by binary search of the sorted scores,
+    so samples with tied scores are counted together.
+
+    Parameters
+    ----------
+    labels : np.ndarray
+        Class label of each sample, where the sorted unique labels match the columns of scores
+    scores : np.ndarray
+        Score of each class of shape (num_samples, num_classes)
+
+    Returns
+    -------
+    float
+        The support weighted average precision
+
+    Raises
+    ------
+    ValueError
+        If there are fewer than 2 classes, or the scores do not have a column per class
+    """
+    classes, codes = np.unique(np.ravel(labels), return_inverse=True)
+    scores = np.asarray(scores)
+    if len(classes) < 2:
+        raise ValueError(f"Expected at least 2 classes; got {len(classes)}")
+    if scores.ndim != 2 or scores.shape != (len(codes), len(classes)):
+        raise ValueError(f"scores should be of shape {(len(codes), len(classes))}; got {scores.shape}")
+
+    num_samples, num_classes = scores.shape
+    support = np.bincount(codes, minlength=num_classes)
+    bounds = np.concatenate([[0], np.cumsum(support)])
+    members = np.argsort(codes, kind="stable")
+    precision = np.zeros(num_classes)
+    block = max(1, BLOCK_BYTES // (scores.itemsize * num_samples))
+    for start in range(0, num_classes, block):
+        stop = min(start + block, num_classes)
+        # One sort of the scores of every class in the block, each along a contiguous row
+        ordered = np.ascontiguousarray(scores[:, start:stop].T)
+        ordered.sort(axis=1)
+        for c in range(start, stop):
+            positives = np.sort(scores[members[bounds[c] : bounds[c + 1]], c])
+            if len(positives) == 0:
+                continue
+            # Precision at the score of each positive, counting tied scores above the threshold
+            true_positives = len(positives) - np.searchsorted(positives, positives, side="left")
+            predicted = num_samples - np.searchsorted(ordered[c - start], positives, side="left")
+            precision[c] = np.mean(true_positives / predicted)
+    return _weighted_average(precision, support)
+
+
+def binned_uap(positives: np.ndarray, negatives: np.ndarray) -> float:
+    """
+    Computes the support weighted average precision from histograms of the scores of each class
+
+    Every bin is a threshold, so the result matches :func:`uap` on scores rounded to their bins.
+
+    Parameters
+    ----------
+    positives : np.ndarray
+        Counts of the scores of the samples of each class in each bin of shape (num_classes, num_bins),
+        with the bins in increasing order of score
+    negatives : np.ndarray
+        Counts of the scores of the samples of other classes, of the same shape
+
+    Returns
+    -------
+    float
+        The support weighted average precision
+    """
+    # Cumulative counts from the highest bin are the true and false positives at each threshold
+    true_positives = np.cumsum(positives[:, ::-1], axis=1, dtype=np.float64)
+    predicted = true_positives + np.cumsum(negatives[:, ::-1], axis=1, dtype=np.float64)
+    support = true_positives[:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        gains = np.where(positives[:, ::-1] > 0, positives[:, ::-1] * true_positives / predicted, 0.0)
+    precision = gains.sum(axis=1) / np.maximum(support, 1)
+    return _weighted_average(precision, support)
@@ -1,37 +1,314 @@
-from typing import Any, Literal, NamedTuple, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+from typing import List, Literal, NamedTuple, Optional, Tuple, Union
 
 import numpy as np
+from numpy.typing import ArrayLike
 from scipy.signal import convolve2d
 from scipy.sparse import csr_matrix
 from scipy.sparse.csgraph import minimum_spanning_tree as mst
-from scipy.spatial.distance import pdist, squareform
+from scipy.spatial.distance import cdist
 from sklearn.neighbors import NearestNeighbors
 
-EPSILON = 1e-5
+from dataeval._internal.functional.distance import (
+    BLOCK_BYTES,
+    BRUTE_FORCE_FEATURES,
+    _effective_n_jobs,
+    blocked_kneighbors,
+)
+
 EDGE_KERNEL = np.array([[-1, -1, -1], [-1, 8, -1], [-1, -1, -1]], dtype=np.int8)
 BIT_DEPTH = (1, 8, 12, 16, 32)
+NUM_ANCHORS = 32
+
+
+def _nearest_outside(
+    X: np.ndarray, labels: np.ndarray, unresolved: np.ndarray, best: np.ndarray, searches: np.ndarray, n_jobs: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the unresolved samples of each searched component that may have a foreign neighbor
+    closer than the best candidate of the component, with their nearest sample outside of the
+    component and its distance
+    """
+    results = []
+    for label in searches.tolist():
+        inside = labels == label
+        queries = np.flatnonzero(unresolved & inside)
+        outside = np.flatnonzero(~inside)
+        tree = NearestNeighbors(n_neighbors=1, n_jobs=n_jobs).fit(X[outside])
+
+        # Query a sample of anchors first, then only the samples which the triangle inequality,
+        # d(p, outside) >= d(anchor, outside) - d(p, anchor), cannot rule out
+        anchors = np.random.default_rng(label).permutation(queries)[:NUM_ANCHORS]
+        anchor_dist, anchor_ind = tree.kneighbors(X[anchors])
+        bound = np.max(anchor_dist[:, 0] - cdist(X[queries], X[anchors]), axis=1)
+        queries = np.setdiff1d(queries[bound < min(best[label], anchor_dist.min())], anchors)
+        dist, ind = tree.kneighbors(X[queries]) if queries.size else (np.zeros((0, 1)), np.zeros((0, 1), dtype=np.intp))
+        results.append(
+            (
+                np.concatenate([anchors, queries]),
+                outside[np.concatenate([anchor_ind[:, 0], ind[:, 0]])],
+                np.concatenate([anchor_dist[:, 0], dist[:, 0]]),
+            )
+        )
+    queries, targets, weights = (np.concatenate(arrays) for arrays in zip(*results))
+    return queries, targets, weights
+
+
+def _nearest_foreign(
+    tree: NearestNeighbors, X: np.ndarray, labels: np.ndarray, queries: np.ndarray, k: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns whether each queried sample has a neighbor of another component among its k nearest
+    neighbors in the shared tree, the nearest of them with its distance, and the k-th distance
+    """
+    found = np.zeros(len(queries), dtype=bool)
+    targets = np.zeros(len(queries), dtype=np.intp)
+    weights = np.full(len(queries), np.inf)
+    kth = np.zeros(len(queries))
+    # The samples are their own neighbors here, and are dropped with the rest of their component
+    block = max(1, BLOCK_BYTES // (16 * (k + 1)))
+    for start in range(0, len(queries), block):
+        part = slice(start, start + block)
+        dist, ind = tree.kneighbors(X[queries[part]], k + 1)
+        foreign = labels[ind] != labels[queries[part], None]
+        first = foreign.argmax(axis=1)
+        rows = np.arange(len(ind))
+        found[part] = foreign[rows, first]
+        targets[part] = ind[rows, first]
+        weights[part] = np.where(found[part], dist[rows, first], np.inf)
+        kth[part] = dist[:, -1]
+    return found, targets, weights, kth
 
 
-def minimum_spanning_tree(X: np.ndarray) -> Any:
+def minimum_spanning_tree(
+    X: np.ndarray,
+    k: int = 10,
+    n_jobs: Optional[int] = None,
+    neighbors: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
     """
-    Returns the minimum spanning tree from a NumPy image array.
+    Returns the euclidean minimum spanning tree of a NumPy image array as an edge list.
+
+    Uses Boruvka's algorithm, finding the nearest sample outside of each component on every
+    round. Exact duplicates are joined to their first occurrence at a weight of 0 and the tree
+    is built over the distinct samples. Candidates come from the k nearest neighbors of each
+    sample, computed once with a space partitioning tree. The samples whose k nearest neighbors
+    all lie within their own component, and whose k-th neighbor is closer than the best candidate
+    of that component, query the same tree for twice as many neighbors while their number times
+    the size of the component is at most N, or a tree built on the samples outside of it
+    otherwise. Memory is O(N * k) rather than the O(N^2) of a dense distance matrix.
 
     Parameters
     ----------
-    X: np.ndarray
+    X : np.ndarray
         Numpy image array
+    k : int, default 10
+        Number of nearest neighbors used as candidate edges
+    n_jobs : Optional[int], default None
+        Number of threads sharing the nearest neighbor searches, where None is 1 and -1 uses all cores.
+        The searches outside of each component run concurrently, or are split across threads when
+        there are fewer components than threads.
+    neighbors : Optional[Tuple[np.ndarray, np.ndarray]], default None
+        Precomputed distances and indices of the nearest neighbors of each sample, excluding the
+        sample itself and sorted by distance, used as the candidate edges instead of querying k.
+        They are not used when X contains exact duplicates.
 
     Returns
     -------
-        Data representing the minimum spanning tree
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        Source vertices, target vertices and weights of the N - 1 edges
     """
     # All features belong on second dimension
     X = X.reshape((X.shape[0], -1))
-    # We add a small constant to the distance matrix to ensure scipy interprets
-    # the input graph as fully-connected.
-    dense_eudist = squareform(pdist(X)) + EPSILON
-    eudist_csr = csr_matrix(dense_eudist)
-    return mst(eudist_csr)
+    n = len(X)
+    if n < 2:
+        return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp), np.zeros(0)
+
+    _, first, inverse = np.unique(X, axis=0, return_index=True, return_inverse=True)
+    if len(first) < n:
+        # Joining each duplicate to its first occurrence adds the zero weight edges of the tree
+        duplicated = np.flatnonzero(first[inverse.reshape(-1)] != np.arange(n))
+        rows, cols, weights = minimum_spanning_tree(X[first], k, n_jobs)
+        return (
+            np.concatenate([first[rows], first[inverse.reshape(-1)[duplicated]]]),
+            np.concatenate([first[cols], duplicated]),
+            np.concatenate([weights, np.zeros(len(duplicated), dtype=weights.dtype)]),
+        )
+
+    workers = _effective_n_jobs(n_jobs)
+    tree: Optional[NearestNeighbors] = None
+    if neighbors is None:
+        # Neighbors of the fitted samples exclude the samples themselves
+        tree = NearestNeighbors(n_neighbors=min(k, n - 1), n_jobs=workers)
+        tree.fit(X)
+        neighbors = tree.kneighbors()
+    nbr_dist, nbr_ind = neighbors
+    samples = np.arange(n)
+    components = DisjointSet(n)
+    edges: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        while True:
+            roots = components.find(samples)
+            _, labels = np.unique(roots, return_inverse=True)
+            num_components = int(labels.max()) + 1
+            if num_components == 1:
+                break
+
+            # Nearest candidate outside of the component of each sample
+            foreign = labels[nbr_ind] != labels[:, None]
+            first = foreign.argmax(axis=1)
+            found = foreign[samples, first]
+            targets = nbr_ind[samples, first]
+            weights = np.where(found, nbr_dist[samples, first], np.inf)
+
+            # Samples whose nearest foreign sample may be closer than any candidate of their component
+            best = np.full(num_components, np.inf)
+            np.minimum.at(best, labels, weights)
+            unresolved = ~found & (nbr_dist[:, -1] < best[labels])
+
+            # Components whose unresolved samples would find fewer neighbors than a tree outside of it
+            # holds query the shared tree for twice as many neighbors, until they exceed the component
+            sizes = np.bincount(labels, minlength=num_components)
+            shared = np.bincount(labels[unresolved], minlength=num_components) * sizes <= n
+            num_neighbors = nbr_ind.shape[1]
+            while True:
+                queries = np.flatnonzero(unresolved & shared[labels])
+                if not queries.size:
+                    break
+                if tree is None:
+                    tree = NearestNeighbors(n_jobs=workers)
+                    tree.fit(X)
+                num_neighbors = min(2 * num_neighbors, n - 1)
+                queried, targets[queries], weights[queries], kth = _nearest_foreign(
+                    tree, X, labels, queries, num_neighbors
+                )
+                np.minimum.at(best, labels[queries], weights[queries])
+                unresolved[queries] = ~queried & (kth < best[labels[queries]])
+
+            searches = np.unique(labels[unresolved])
+            # Threads either share contiguous chunks of the components or the queries of each component
+            chunks = np.array_split(searches, min(workers, len(searches))) if searches.size else []
+            tree_jobs = 1 if len(searches) >= workers else workers
+            for queries, queried_targets, queried_weights in executor.map(
+                _nearest_outside, repeat(X), repeat(labels), repeat(unresolved), repeat(best), chunks, repeat(tree_jobs)
+            ):
+                targets[queries], weights[queries] = queried_targets, queried_weights
+
+            # Lightest outgoing edge of each component
+            order = np.lexsort((weights, labels))
+            lightest = order[np.append(True, labels[order][1:] != labels[order][:-1])]
+            edges.append((lightest, targets[lightest], weights[lightest]))
+            components.union(lightest, targets[lightest])
+
+    # Components choosing between equally light edges can close cycles, which the final tree drops
+    rows, cols, weights = (np.concatenate(arrays) for arrays in zip(*edges))
+    rows, cols = np.minimum(rows, cols), np.maximum(rows, cols)
+    _, unique = np.unique(rows * n + cols, return_index=True)
+    return sparse_mst(rows[unique], cols[unique], weights[unique], n)
+
+
+def prim_mst(dist: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the minimum spanning tree edges of a dense distance matrix using Prim's algorithm.
+
+    Vertices are added in the same order as :func:`scipy.cluster.hierarchy.linkage` with
+    the single method, each edge linking the previously added vertex to the next one,
+    so that the resulting single linkage matches scipy's tie-breaking.
+
+    Parameters
+    ----------
+    dist : np.ndarray
+        Square distance matrix
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        Source vertices, target vertices and weights of the N - 1 edges
+    """
+    n = len(dist)
+    rows = np.zeros(n - 1, dtype=np.intp)
+    cols = np.zeros(n - 1, dtype=np.intp)
+    weights = np.zeros(n - 1, dtype=np.float64)
+    nearest = np.full(n, np.inf)
+    merged = np.zeros(n, dtype=bool)
+    x = 0
+    for k in range(n - 1):
+        merged[x] = True
+        np.minimum(nearest, dist[x], out=nearest, where=~merged)
+        nearest[x] = np.inf
+        y = int(np.argmin(np.where(merged, np.inf, nearest)))
+        rows[k], cols[k], weights[k] = x, y, nearest[y]
+        x = y
+    return rows, cols, weights
+
+
+def sparse_mst(
+    rows: np.ndarray, cols: np.ndarray, weights: np.ndarray, n: int
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Returns the minimum spanning tree edges of a sparse graph given as an edge list.
+
+    Parameters
+    ----------
+    rows, cols, weights : np.ndarray
+        Source vertices, target vertices and weights of the candidate edges, without repeats
+    n : int
+        Number of vertices, which must be connected by the candidate edges
+
+    Returns
+    -------
+    Tuple[np.ndarray, np.ndarray, np.ndarray]
+        Source vertices, target vertices and weights of the N - 1 edges
+    """
+    # Scipy drops explicit zeros from sparse graphs, so zero weights are replaced by the
+    # smallest positive float which keeps their order relative to every other weight
+    tiny = np.finfo(np.float64).tiny
+    data = np.where(weights > 0, weights.astype(np.float64), tiny)
+    tree = mst(csr_matrix((data, (rows, cols)), shape=(n, n))).tocoo()
+    if tree.nnz != n - 1:
+        raise ValueError(f"Candidate edges span {n - tree.nnz} components instead of 1")
+    tree_weights = np.where(tree.data > tiny, tree.data, 0).astype(weights.dtype)
+    return tree.row.astype(np.intp), tree.col.astype(np.intp), tree_weights
+
+
+def single_linkage(rows: np.ndarray, cols: np.ndarray, weights: np.ndarray, n: int) -> np.ndarray:
+    """
+    Returns the single linkage matrix, in the format of :func:`scipy.cluster.hierarchy.linkage`,
+    from the edges of a minimum spanning tree.
+
+    Parameters
+    ----------
+    rows, cols, weights : np.ndarray
+        Source vertices, target vertices and weights of the N - 1 edges
+    n : int
+        Number of vertices
+
+    Returns
+    -------
+    np.ndarray
+        Linkage matrix of shape (N - 1, 4)
+    """
+    order = np.argsort(weights, kind="mergesort")
+    link_arr = np.zeros((n - 1, 4), dtype=np.float64)
+    # Linkage ids of the cluster each vertex or merged cluster belongs to, with compressed paths
+    parent = np.arange(2 * n - 1)
+    size = np.ones(2 * n - 1, dtype=np.intp)
+    for i, (x, y) in enumerate(zip(rows[order].tolist(), cols[order].tolist())):
+        roots = []
+        for node in (x, y):
+            root = node
+            while parent[root] != root:
+                root = parent[root]
+            while parent[node] != root:
+                parent[node], node = root, parent[node]
+            roots.append(root)
+        x_root, y_root = min(roots), max(roots)
+        parent[x_root] = parent[y_root] = n + i
+        size[n + i] = size[x_root] + size[y_root]
+        link_arr[i] = x_root, y_root, weights[order[i]], size[n + i]
+    return link_arr
 
 
 def get_classes_counts(labels: np.ndarray) -> Tuple[int, int]:
@@ -64,7 +341,8 @@ def compute_neighbors(
     A: np.ndarray,
     B: np.ndarray,
     k: int = 1,
-    algorithm: Literal["auto", "ball_tree", "kd_tree"] = "auto",
+    algorithm: Literal["auto", "ball_tree", "kd_tree", "brute"] = "auto",
+    n_jobs: Optional[int] = None,
 ) -> np.ndarray:
     """
     For each sample in A, compute the nearest neighbor in B
@@ -76,7 +354,10 @@ def compute_neighbors(
     k : int
         The number of neighbors to find
     algorithm : Literal
-        Tree method for nearest neighbor (auto, ball_tree or kd_tree)
+        Method for nearest neighbor (auto, ball_tree, kd_tree or brute), where brute and auto with
+        more than 15 features use a blocked brute force search with bounded memory
+    n_jobs : Optional[int], default None
+        Number of parallel jobs for the neighbor search, where None is 1 and -1 uses all cores
 
     Note
     ----
@@ -90,15 +371,125 @@ def compute_neighbors(
     See Also
     --------
     :func:`sklearn.neighbors.NearestNeighbors`
+    :func:`dataeval._internal.functional.distance.blocked_kneighbors`
     """
 
-    nbrs = NearestNeighbors(n_neighbors=k + 1, algorithm=algorithm).fit(B)
-    nns = nbrs.kneighbors(A)[1]
+    if algorithm == "brute" or (algorithm == "auto" and np.shape(B)[1] > BRUTE_FORCE_FEATURES):
+        nns = blocked_kneighbors(A, B, k + 1, n_jobs=n_jobs)[1]
+    else:
+        nbrs = NearestNeighbors(n_neighbors=k + 1, algorithm=algorithm, n_jobs=n_jobs).fit(B)
+        nns = nbrs.kneighbors(A)[1]
     nns = nns[:, 1:].squeeze()
 
     return nns
 
 
+class DisjointSet:
+    """
+    Array-based disjoint-set (union-find) forest using union by rank and path compression.
+
+    Unions are applied to whole arrays of index pairs at once. Each round resolves the
+    roots of every pending pair, hooks the lower ranked root of each pair beneath the
+    higher ranked one and repeats for the pairs that are still disjoint, so the number
+    of Python-level iterations depends on the depth of the forest rather than on the
+    number of pairs.
+
+    Parameters
+    ----------
+    size : int
+        Number of elements, labeled 0 to size - 1
+    """
+
+    def __init__(self, size: int):
+        self.parent = np.arange(size, dtype=np.intp)
+        self.rank = np.zeros(size, dtype=np.intp)
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def find(self, x: ArrayLike) -> np.ndarray:
+        """
+        Returns the root of each element in x, compressing every path that is walked
+
+        Parameters
+        ----------
+        x : ArrayLike
+            Element or array of elements
+
+        Returns
+        -------
+        np.ndarray
+            Root element for each element in x
+        """
+        x = np.asarray(x, dtype=np.intp)
+        path = [x]
+        root = self.parent[x]
+        while True:
+            grandparent = self.parent[root]
+            climbing = grandparent != root
+            if not climbing.any():
+                break
+            path.append(root)
+            root = grandparent
+        for nodes in path:
+            self.parent[nodes] = root
+        return root
+
+    def union(self, a: ArrayLike, b: ArrayLike) -> None:
+        """
+        Merges the sets containing each pair of elements (a[i], b[i])
+
+        Parameters
+        ----------
+        a, b : ArrayLike
+            Elements or arrays of elements of equal length to be merged pairwise
+        """
+        left, right = np.broadcast_arrays(np.asarray(a, dtype=np.intp), np.asarray(b, dtype=np.intp))
+        left, right = left.ravel(), right.ravel()
+        size = len(self.parent)
+        while left.size:
+            left, right = self.find(left), self.find(right)
+            disjoint = left != right
+            left, right = left[disjoint], right[disjoint]
+            if not left.size:
+                break
+            # Total order on roots by (rank, -index) guarantees every hook moves strictly upward
+            key_a = self.rank[left] * size + (size - 1 - left)
+            key_b = self.rank[right] * size + (size - 1 - right)
+            child = np.where(key_a < key_b, left, right)
+            key_root = np.maximum(key_a, key_b)
+            # A root paired with several others is hooked beneath the highest of them this round
+            order = np.lexsort((key_root, child))
+            child, key_root = child[order], key_root[order]
+            last = np.append(child[1:] != child[:-1], True)
+            hooked, roots = child[last], size - 1 - key_root[last] % size
+            self.parent[hooked] = roots
+            np.maximum.at(self.rank, roots, self.rank[hooked] + (self.rank[hooked] == self.rank[roots]))
+
+    def groups(self, indices: Optional[ArrayLike] = None, min_size: int = 2) -> List[List[int]]:
+        """
+        Returns the sets as sorted lists of elements, ordered by their smallest element
+
+        Parameters
+        ----------
+        indices : Optional[ArrayLike], default None
+            Restricts the output to these elements, all elements are used if not provided
+        min_size : int, default 2
+            Minimum number of elements for a set to be returned
+
+        Returns
+        -------
+        List[List[int]]
+            Sorted groups of elements sharing a root
+        """
+        indices = np.arange(len(self.parent)) if indices is None else np.unique(np.asarray(indices, dtype=np.intp))
+        roots = self.find(indices)
+        order = np.argsort(roots, kind="stable")
+        _, starts, counts = np.unique(roots[order], return_index=True, return_counts=True)
+        groups = [indices[order[s : s + c]].tolist() for s, c in zip(starts, counts) if c >= min_size]
+        return sorted(groups)
+
+
 class BitDepth(NamedTuple):
     depth: int
     pmin: Union[float, int]
@@ -7,15 +7,24 @@ Learning to Bound the Multi-class Bayes Error (Th. 3 and Th. 4)
 https://arxiv.org/abs/1811.06419
 """
 
-from typing import Callable, Dict, Literal, Tuple
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Literal, Optional, Tuple, Union
 
 import numpy as np
 
-from dataeval._internal.functional.ber import ber_knn, ber_mst
+from dataeval._internal.functional.ber import _ber_knn, _ber_mst
+from dataeval._internal.functional.distance import _effective_n_jobs
+from dataeval._internal.functional.neighbors import NeighborIndex, as_index
 from dataeval._internal.metrics.base import EvaluateMixin, MethodsMixin
 
 _METHODS = Literal["MST", "KNN"]
-_FUNCTION = Callable[[np.ndarray, np.ndarray, int], Tuple[float, float]]
+_FUNCTION = Callable[[NeighborIndex, np.ndarray, int], Tuple[float, float, np.ndarray]]
+
+
+def _ber_subsample(method: _FUNCTION, data: np.ndarray, labels: np.ndarray, k: int) -> Tuple[float, float]:
+    """Estimates the bounds of one subsample, in a worker process when run in a pool"""
+    return method(NeighborIndex(data), labels, k)[:2]
 
 
 class BER(EvaluateMixin, MethodsMixin[_METHODS, _FUNCTION]):
@@ -24,14 +33,18 @@ class BER(EvaluateMixin, MethodsMixin[_METHODS, _FUNCTION]):
 
     Parameters
     ----------
-    data : np.ndarray
-        Array of images or image embeddings
+    data : Union[np.ndarray, NeighborIndex]
+        Array of images or image embeddings, or a :class:`.NeighborIndex` over them whose cached
+        neighbors are shared with other metrics
     labels : np.ndarray
         Array of labels for each image or image embedding
     method : Literal["MST", "KNN"], default "KNN"
         Method to use when estimating the Bayes error rate
     k : int, default 1
         number of nearest neighbors for KNN estimator -- ignored by MST estimator
+    n_jobs : Optional[int], default None
+        Number of threads for the nearest neighbor searches of either estimator, where None is 1
+        and -1 uses all cores
 
 
     See Also
@@ -40,29 +53,42 @@ class BER(EvaluateMixin, MethodsMixin[_METHODS, _FUNCTION]):
 
     """
 
-    def __init__(self, data: np.ndarray, labels: np.ndarray, method: _METHODS = "KNN", k: int = 1) -> None:
+    def __init__(
+        self,
+        data: Union[np.ndarray, NeighborIndex],
+        labels: np.ndarray,
+        method: _METHODS = "KNN",
+        k: int = 1,
+        n_jobs: Optional[int] = None,
+    ) -> None:
         self.data = data
         self.labels = labels
         self.k = k
+        self.n_jobs = n_jobs
         self._set_method(method)
 
     @classmethod
     def _methods(
         cls,
     ) -> Dict[str, _FUNCTION]:
-        return {"KNN": ber_knn, "MST": ber_mst}
+        return {"KNN": _ber_knn, "MST": _ber_mst}
 
-    def evaluate(self) -> Dict[str, float]:
+    def evaluate(self) -> Dict[str, Any]:
         """
         Calculates the Bayes Error Rate estimate using the provided method
 
         Returns
         -------
-        Dict[str, float]
+        Dict[str, Any]
             ber : float
                 The estimated lower bounds of the Bayes Error Rate
             ber_lower : float
                 The estimated upper bounds of the Bayes Error Rate
+            confusion : np.ndarray
+                Counts between each pair of classes, ordered by sorted label value. For MST, the
+                symmetric number of tree edges joining a sample of one class to a sample of the
+                other. For KNN, the number of samples of the row class whose neighbors vote for
+                the column class. Off-diagonal entries are the misclassifications behind the estimate.
 
         Raises
         ------
@@ -70,5 +96,99 @@ class BER(EvaluateMixin, MethodsMixin[_METHODS, _FUNCTION]):
             If unique classes M < 2
         """
 
-        upper, lower = self._method(np.asarray(self.data), np.asarray(self.labels), self.k)
-        return {"ber": upper, "ber_lower": lower}
+        upper, lower, confusion = self._method(as_index(self.data, self.n_jobs), np.asarray(self.labels), self.k)
+        return {"ber": upper, "ber_lower": lower, "confusion": confusion}
+
+    def evaluate_subsamples(
+        self,
+        num_subsamples: int = 50,
+        subsample_size: int = 1000,
+        confidence: float = 0.95,
+        max_workers: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Estimates the Bayes Error Rate on random subsamples of the data, in parallel processes
+
+        Each subsample is drawn without replacement, as duplicated samples would be their own
+        nearest neighbors. The estimates are reported with percentile confidence intervals, which
+        cost far less than a single estimate on a large dataset.
+
+        Parameters
+        ----------
+        num_subsamples : int, default 50
+            Number of subsamples to estimate
+        subsample_size : int, default 1000
+            Number of samples in each subsample
+        confidence : float, default 0.95
+            Confidence level of the intervals
+        max_workers : Optional[int], default None
+            Number of processes estimating subsamples concurrently, where None is 1 and -1 uses all cores
+        seed : Optional[int], default None
+            Seed of the random subsampling
+
+        Returns
+        -------
+        Dict[str, Any]
+            ber : float
+                Mean of the upper bound estimates of the subsamples
+            ber_lower : float
+                Mean of the lower bound estimates of the subsamples
+            ber_ci : Tuple[float, float]
+                Confidence interval of the upper bound
+            ber_lower_ci : Tuple[float, float]
+                Confidence interval of the lower bound
+            ber_std_error : float
+                Standard error of the mean upper bound
+            ber_running_mean : np.ndarray
+                Mean of the upper bounds of the first i + 1 subsamples, which levels off
+                once enough subsamples have been estimated
+            estimates : np.ndarray
+                Upper and lower bounds of each subsample of shape (num_subsamples, 2)
+
+        Raises
+        ------
+        ValueError
+            If subsample_size is not between 2 and the number of samples, or if a subsample
+            has fewer than 2 classes
+        """
+        data = self.data.data if isinstance(self.data, NeighborIndex) else np.asarray(self.data)
+        labels = np.asarray(self.labels)
+        if not 2 <= subsample_size <= len(data):
+            raise ValueError(f"subsample_size should be between 2 and {len(data)}; got {subsample_size}")
+        if num_subsamples < 1:
+            raise ValueError(f"num_subsamples should be at least 1; got {num_subsamples}")
+
+        rng = np.random.default_rng(seed)
+        # Subsamples are only copied when they are about to be estimated
+        tasks = (
+            (self._method, data[indices], labels[indices], self.k)
+            for indices in (rng.choice(len(data), subsample_size, replace=False) for _ in range(num_subsamples))
+        )
+        workers = _effective_n_jobs(max_workers)
+        results: List[Tuple[float, float]] = []
+        if workers == 1:
+            results.extend(_ber_subsample(*task) for task in tasks)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                # Executor.map would submit every subsample at once, so at most two per worker are in flight
+                pending: Deque[Future] = deque()
+                for task in tasks:
+                    if len(pending) == 2 * workers:
+                        results.append(pending.popleft().result())
+                    pending.append(executor.submit(_ber_subsample, *task))
+                results.extend(future.result() for future in pending)
+
+        estimates = np.array(results, dtype=np.float64)
+        std_error = estimates[:, 0].std(ddof=1) / np.sqrt(num_subsamples) if num_subsamples > 1 else 0.0
+        quantiles = [(1 - confidence) / 2, (1 + confidence) / 2]
+        upper_ci, lower_ci = np.quantile(estimates, quantiles, axis=0).T
+        return {
+            "ber": float(estimates[:, 0].mean()),
+            "ber_lower": float(estimates[:, 1].mean()),
+            "ber_ci": (float(upper_ci[0]), float(upper_ci[1])),
+            "ber_lower_ci": (float(lower_ci[0]), float(lower_ci[1])),
+            "ber_std_error": float(std_error),
+            "ber_running_mean": np.cumsum(estimates[:, 0]) / np.arange(1, num_subsamples + 1),
+            "estimates": estimates,
+        }
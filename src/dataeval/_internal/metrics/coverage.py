@@ -1,8 +1,9 @@
 import math
-from typing import Literal, Tuple
+from typing import Dict, Literal, Optional, Tuple, Union
 
 import numpy as np
-from scipy.spatial.distance import pdist, squareform
+
+from dataeval._internal.functional.neighbors import NeighborIndex, as_index
 
 
 class Coverage:
@@ -13,8 +14,8 @@ class Coverage:
 
     Parameters
     ----------
-    embeddings : np.ndarray
-        n x p array of image embeddings from the dataset.
+    embeddings : Union[np.ndarray, NeighborIndex]
+        n x p array of image embeddings from the dataset, or a :class:`.NeighborIndex` over them.
     radius_type : Literal["adaptive", "naive"], default "adaptive"
         The function used to determine radius.
     k: int, default 20
@@ -24,12 +25,13 @@ class Coverage:
 
     Note
     ----
-    Embeddings should be on the unit interval.
+    Embeddings should be on the unit interval. The neighbor index built on the first evaluation is kept,
+    so that embeddings can be added with :meth:`add` without searching the existing ones again.
     """
 
     def __init__(
         self,
-        embeddings: np.ndarray,
+        embeddings: Union[np.ndarray, NeighborIndex],
         radius_type: Literal["adaptive", "naive"] = "adaptive",
         k: int = 20,
         percent: np.float64 = np.float64(0.01),
@@ -38,6 +40,18 @@ class Coverage:
         self.radius_type = radius_type
         self.k = k
         self.percent = percent
+        self._index: Optional[NeighborIndex] = None
+        self._source: Optional[Union[np.ndarray, NeighborIndex]] = None
+        # Result of the last evaluation, with the radius type, k and percent it was computed with
+        self._result: Optional[Tuple[Tuple[str, int, float], np.ndarray, np.ndarray]] = None
+
+    def _neighbors(self) -> NeighborIndex:
+        """Returns the persistent neighbor index over the embeddings, rebuilt if they were replaced"""
+        if self._index is None or self.embeddings is not self._source:
+            self._index = as_index(self.embeddings)
+            self._source = self.embeddings
+            self._result = None
+        return self._index
 
     def evaluate(self) -> Tuple[np.ndarray, np.ndarray]:
         """
@@ -59,22 +73,78 @@ class Coverage:
             If radius_type is unknown
         """
 
-        # Calculate distance matrix, look at the (k+1)th farthest neighbor for each image.
-        n = len(self.embeddings)
+        if self.radius_type not in ("naive", "adaptive"):
+            raise ValueError("Invalid radius type.")
+
+        # Look at the distance to the (k+1)th nearest neighbor of each image.
+        index = self._neighbors()
+        n = len(index)
         if n <= self.k:
             raise ValueError("Number of observations less than or equal to the specified number of neighbors.")
-        mat = squareform(pdist(self.embeddings))
-        sorted_dists = np.sort(mat, axis=1)
-        crit = sorted_dists[:, self.k + 1]
+        crit = index.kneighbors(self.k + 1)[0][:, self.k]
 
-        d = np.shape(self.embeddings)[1]
+        d = index.data.shape[1]
         if self.radius_type == "naive":
             self.rho = (1 / math.sqrt(math.pi)) * ((2 * self.k * math.gamma(d / 2 + 1)) / (n)) ** (1 / d)
             pvals = np.where(crit > self.rho)[0]
-        elif self.radius_type == "adaptive":
-            # Use data adaptive cutoff
-            cutoff = int(n * self.percent)
-            pvals = np.argsort(crit)[::-1][:cutoff]
         else:
-            raise ValueError("Invalid radius type.")
+            # Use data adaptive cutoff, ordering only the largest radii
+            cutoff = min(int(n * self.percent), n)
+            largest = np.argpartition(crit, n - cutoff)[n - cutoff :] if cutoff else np.zeros(0, dtype=np.intp)
+            pvals = largest[np.argsort(crit[largest])[::-1]]
+        self._result = (self.radius_type, self.k, float(self.percent)), pvals, crit
         return pvals, crit
+
+    def add(self, embeddings: np.ndarray) -> Dict[str, np.ndarray]:
+        """
+        Adds embeddings to the dataset and reports the changes in coverage
+
+        The neighbors of the new embeddings are searched against the existing ones, and the radii of
+        the existing embeddings are updated only where a new embedding is among their neighbors.
+        If the embeddings were given as a :class:`.NeighborIndex`, the index is extended in place.
+
+        Parameters
+        ----------
+        embeddings : np.ndarray
+            Array of new image embeddings with the same number of features as the dataset
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            uncovered : np.ndarray
+                Indices of the uncovered embeddings of the extended dataset, as returned by evaluate
+            newly_uncovered : np.ndarray
+                Indices of the new embeddings and of the existing embeddings which are now uncovered
+            newly_covered : np.ndarray
+                Indices of the existing embeddings which were uncovered and are now covered
+            updated : np.ndarray
+                Indices of the existing embeddings whose critical radius decreased
+            crit : np.ndarray
+                Array of critical value radii of the extended dataset
+
+        Raises
+        ------
+        ValueError
+            If length of embeddings is less than or equal to k
+        ValueError
+            If radius_type is unknown
+        """
+        index = self._neighbors()
+        # The last result is only reused if the parameters have not changed since it was evaluated
+        params = self.radius_type, self.k, float(self.percent)
+        if self._result is not None and self._result[0] == params:
+            previous, previous_crit = self._result[1:]
+        else:
+            previous, previous_crit = self.evaluate()
+        changed = index.add(embeddings)
+        if not isinstance(self.embeddings, NeighborIndex):
+            self.embeddings = self._source = index.data
+
+        uncovered, crit = self.evaluate()
+        return {
+            "uncovered": uncovered,
+            "newly_uncovered": np.setdiff1d(uncovered, previous),
+            "newly_covered": np.setdiff1d(previous, uncovered),
+            "updated": changed[crit[changed] < previous_crit[changed]],
+            "crit": crit,
+        }
@@ -0,0 +1,377 @@
+"""
+This module contains the implementation of the metadata bias analysis of a dataset,
+measuring the entropy and diversity of metadata factors and their dependence on class labels
+"""
+
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, List, Literal, Mapping, Optional, Tuple
+
+import numpy as np
+import scipy
+from numpy.typing import ArrayLike
+from scipy.special import xlogy
+
+from dataeval._internal.functional.distance import _effective_n_jobs
+from dataeval._internal.functional.metadata import (
+    mutual_info_continuous,
+    mutual_info_discrete,
+    mutual_info_mixed,
+    prepare_continuous,
+)
+from dataeval._internal.metrics.base import EvaluateMixin
+
+_DIVERSITY = Literal["simpson", "shannon"]
+
+
+def _encode(values: np.ndarray, num_bins: Optional[int]) -> Tuple[np.ndarray, int]:
+    """Returns the integer code of each value and the number of codes, binning continuous values uniformly"""
+    if num_bins is None:
+        _, codes = np.unique(values, return_inverse=True)
+        return codes.reshape(-1), int(codes.max()) + 1 if len(codes) else 0
+    if not np.issubdtype(values.dtype, np.number):
+        raise TypeError(
+            f"Encountered non-numeric values of dtype {values.dtype} for a continuous factor. "
+            "Ensure that all values of continuous factors are numeric."
+        )
+    edges = np.histogram_bin_edges(values, bins=num_bins)
+    # Inner edges only, so that values on the outer edges fall into the first and last bins
+    return np.digitize(values, edges[1:-1]), num_bins
+
+
+class MetadataBias(EvaluateMixin):
+    """
+    Analyzes the metadata factors of a dataset for bias with respect to the class labels
+
+    Every factor is encoded once into integer codes, with continuous factors binned uniformly. The joint counts of
+    each factor value and class are computed for all factors with a single bincount, and the entropy, diversity and
+    parity of the factors are derived from these cached contingency tables.
+
+    Parameters
+    ----------
+    factors : Mapping[str, ArrayLike]
+        Values of each metadata factor for every sample of the dataset, including the class labels
+    class_name : str, default "class"
+        Name of the factor holding the class labels
+    continuous_factor_bins : Optional[Mapping[str, int]], default None
+        Number of uniform bins of each continuous factor. Factors which are not listed are categorical,
+        with one code per unique value.
+
+    Raises
+    ------
+    ValueError
+        If the factors do not all have the same number of samples or have no samples, or if class_name
+        is not a factor
+    TypeError
+        If a continuous factor has non-numeric values
+    """
+
+    def __init__(
+        self,
+        factors: Mapping[str, ArrayLike],
+        class_name: str = "class",
+        continuous_factor_bins: Optional[Mapping[str, int]] = None,
+    ) -> None:
+        if class_name not in factors:
+            raise ValueError(f"Class factor '{class_name}' not found in factors {list(factors)}")
+        lengths = {name: len(np.ravel(values)) for name, values in factors.items()}
+        if len(set(lengths.values())) > 1:
+            raise ValueError(f"All factors should have the same number of samples; got {lengths}")
+        if not lengths[class_name]:
+            raise ValueError("Factors should have at least one sample; got 0")
+
+        bins = dict(continuous_factor_bins or {})
+        self.names: List[str] = list(factors)
+        self.class_name = class_name
+        encoded = [_encode(np.ravel(np.asarray(factors[name])), bins.get(name)) for name in self.names]
+        self.codes = np.stack([codes for codes, _ in encoded], axis=1) if encoded else np.zeros((0, 0), dtype=np.intp)
+        self.num_values = np.array([num for _, num in encoded], dtype=np.intp)
+
+        class_index = self.names.index(class_name)
+        self._class_codes = self.codes[:, class_index]
+        self._others = np.array([i for i in range(len(self.names)) if i != class_index], dtype=np.intp)
+        self._tables: Optional[np.ndarray] = None
+        # Raw values of the continuous factors, for the neighbor based estimates of mutual information
+        self._continuous = {
+            i: np.ravel(np.asarray(factors[name], dtype=np.float64))
+            for i, name in enumerate(self.names)
+            if name in bins
+        }
+
+    @property
+    def factor_names(self) -> List[str]:
+        """Names of the factors other than the class labels"""
+        return [self.names[i] for i in self._others]
+
+    @property
+    def _offsets(self) -> np.ndarray:
+        return np.concatenate([[0], np.cumsum(self.num_values)])
+
+    def contingency_tables(self) -> List[np.ndarray]:
+        """
+        Returns the joint counts of the values of each factor and the classes
+
+        Returns
+        -------
+        List[np.ndarray]
+            Array of shape (num_values, num_classes) for each factor, in the order of names
+        """
+        if self._tables is None:
+            num_classes = self.num_values[self.names.index(self.class_name)]
+            keys = (self.codes + self._offsets[:-1]) * num_classes + self._class_codes[:, None]
+            counts = np.bincount(keys.reshape(-1), minlength=self._offsets[-1] * num_classes)
+            self._tables = counts.reshape((self._offsets[-1], num_classes))
+        offsets = self._offsets
+        return [self._tables[offsets[i] : offsets[i + 1]] for i in range(len(self.names))]
+
+    def _joint(self) -> np.ndarray:
+        """Stacked contingency tables of all factors as floats, of shape (total num_values, num_classes)"""
+        self.contingency_tables()
+        return np.asarray(self._tables, dtype=np.float64)
+
+    def _sums(self, values: np.ndarray) -> np.ndarray:
+        """Sums rows of the stacked contingency tables over the values of each factor"""
+        return np.add.reduceat(values, self._offsets[:-1], axis=0)
+
+    def entropy(self, normalized: bool = False) -> np.ndarray:
+        """
+        Computes the entropy of each factor in nats
+
+        Parameters
+        ----------
+        normalized : bool, default False
+            Whether to normalize the entropy by the log of the number of values, where
+            factors with a single value have an entropy of 0
+
+        Returns
+        -------
+        np.ndarray
+            Entropy of each factor, in the order of names
+        """
+        counts = self._joint().sum(axis=1)
+        total = len(self.codes)
+        # Clipped, as the difference of logs rounds slightly below 0 for a single value
+        entropy = np.maximum(np.log(total) - self._sums(xlogy(counts, counts)) / total, 0.0)
+        if normalized:
+            entropy = np.divide(entropy, np.log(self.num_values), out=np.zeros_like(entropy), where=self.num_values > 1)
+        return entropy
+
+    def diversity(self, metric: _DIVERSITY = "simpson") -> np.ndarray:
+        """
+        Computes the diversity of each factor
+
+        The Simpson diversity is the inverse Simpson index divided by the number of values, from
+        1 / num_values when all samples share one value to 1 when they are evenly distributed. The
+        Shannon diversity is the normalized entropy, from 0 to 1.
+
+        Parameters
+        ----------
+        metric : Literal["simpson", "shannon"], default "simpson"
+            Diversity index to compute
+
+        Returns
+        -------
+        np.ndarray
+            Diversity of each factor, in the order of names
+
+        Raises
+        ------
+        ValueError
+            If metric is unknown
+        """
+        counts = self._joint().sum(axis=1, keepdims=True)
+        totals = np.full(len(self.names), len(self.codes), dtype=np.float64)
+        return self._diversity(counts, totals[:, None], metric)[:, 0]
+
+    def diversity_by_class(self, metric: _DIVERSITY = "simpson") -> np.ndarray:
+        """
+        Computes the diversity of each factor within each class
+
+        The diversities are normalized by the number of values of the factor over the whole dataset.
+
+        Parameters
+        ----------
+        metric : Literal["simpson", "shannon"], default "simpson"
+            Diversity index to compute
+
+        Returns
+        -------
+        np.ndarray
+            Diversity of shape (num_classes, num_factors), for the factors in the order of factor_names
+
+        Raises
+        ------
+        ValueError
+            If metric is unknown
+        """
+        joint = self._joint()
+        diversity = self._diversity(joint, joint[self._offsets[0] : self._offsets[1]].sum(axis=0), metric)
+        return diversity[self._others].T
+
+    def _diversity(self, counts: np.ndarray, totals: np.ndarray, metric: str) -> np.ndarray:
+        """Diversity of each factor (rows) for each set of counts (columns) of the stacked tables"""
+        if metric not in ("simpson", "shannon"):
+            raise ValueError(f"metric '{metric}' should be one of ['simpson', 'shannon']")
+        num_values = self.num_values[:, None].astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            if metric == "simpson":
+                return totals**2 / self._sums(counts**2) / num_values
+            entropy = np.maximum(np.log(totals) - self._sums(xlogy(counts, counts)) / totals, 0.0)
+            return np.where(num_values > 1, entropy / np.log(num_values), 0.0)
+
+    def mutual_information(
+        self,
+        num_neighbors: int = 5,
+        normalized: bool = True,
+        max_workers: Optional[int] = None,
+        seed: Optional[int] = None,
+    ) -> np.ndarray:
+        """
+        Estimates the mutual information between every pair of factors, including the class labels
+
+        The mutual information of categorical factors comes from their joint counts, computed for all
+        pairs at once. Pairs with a continuous factor use the nearest neighbor estimators of Kraskov et al.
+        and Ross on the raw values, which are run in parallel processes. Each continuous factor is scaled,
+        jittered and sorted once, and its sorted values serve every pair it is part of.
+
+        Parameters
+        ----------
+        num_neighbors : int, default 5
+            Number of nearest neighbors of the estimates for continuous factors
+        normalized : bool, default True
+            Whether to divide the mutual information of each pair by the mean entropy of the
+            factors, from 0 for independent factors to about 1 for identical factors
+        max_workers : Optional[int], default None
+            Number of processes estimating pairs with continuous factors, where None is 1 and -1 uses all cores
+        seed : Optional[int], default None
+            Seed of the jitter which breaks ties between the values of continuous factors
+
+        Returns
+        -------
+        np.ndarray
+            Symmetric matrix of shape (num_factors, num_factors), in the order of names. The diagonal
+            holds the entropy of each factor.
+        """
+        mi = mutual_info_discrete(self.codes, self.num_values)
+        rng = np.random.default_rng(seed)
+        prepared = {i: prepare_continuous(values, rng) for i, values in self._continuous.items()}
+
+        pairs, tasks = [], []
+        for i in range(len(self.names)):
+            for j in range(i + 1, len(self.names)):
+                if i in prepared and j in prepared:
+                    (x, sorted_x), (y, sorted_y) = prepared[i], prepared[j]
+                    tasks.append((mutual_info_continuous, (x, y, sorted_x, sorted_y)))
+                elif i in prepared or j in prepared:
+                    c, d = (i, j) if i in prepared else (j, i)
+                    tasks.append((mutual_info_mixed, (prepared[c][0], self.codes[:, d], prepared[c][1])))
+                else:
+                    continue
+                pairs.append((i, j))
+
+        workers = _effective_n_jobs(max_workers)
+        if workers == 1 or len(tasks) < 2:
+            estimates = [_estimate(function, args, num_neighbors) for function, args in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                estimates = list(executor.map(_estimate, *zip(*tasks), [num_neighbors] * len(tasks)))
+        for (i, j), estimate in zip(pairs, estimates):
+            mi[i, j] = mi[j, i] = estimate
+
+        if normalized:
+            entropy = np.diag(mi).copy()
+            mi = mi / (0.5 * np.add.outer(entropy, entropy) + 1e-6)
+        return mi
+
+    def parity(self) -> Dict[str, Any]:
+        """
+        Performs a chi-squared test of independence between each factor and the class labels
+
+        A high chi-squared value with a low p-value suggests that the factor is correlated with the
+        class labels. Each test matches :func:`scipy.stats.chi2_contingency` on the contingency table of
+        the factor, with the values which never occur removed.
+
+        Returns
+        -------
+        Dict[str, Any]
+            factor : List[str]
+                Names of the factors, as in factor_names
+            chi_squared : np.ndarray
+                chi-squared value of the test of each factor
+            p_value : np.ndarray
+                p-value of the test of each factor
+
+        Warning
+        -------
+            If any factor value co-occurs with a class fewer than 5 times but at least once
+        """
+        tables = [self.contingency_tables()[i] for i in self._others]
+        sparse = [name for name, table in zip(self.factor_names, tables) if np.any((table > 0) & (table < 5))]
+        if sparse:
+            warnings.warn(
+                f"Factors {sparse} have values which co-occur fewer than 5 times with a label. "
+                "This can cause inaccurate chi-squared calculation. Recommend ensuring each "
+                "label occurs either 0 times or at least 5 times with each value. If you are "
+                "using continuous factors, try quantizing their values into fewer bins."
+            )
+
+        chisquared = np.zeros(len(tables))
+        p_value = np.ones(len(tables))
+        if not tables:
+            return {"factor": [], "chi_squared": chisquared, "p_value": p_value}
+
+        # Tables are stacked with their empty rows removed, keeping the factor of each row
+        rows = [table[table.sum(axis=1) > 0] for table in tables]
+        observed = np.concatenate(rows).astype(np.float64)
+        factor = np.repeat(np.arange(len(rows)), [len(row) for row in rows])
+        col_sums = np.zeros((len(rows), observed.shape[1]))
+        np.add.at(col_sums, factor, observed)
+        total = col_sums.sum(axis=1)
+        expected = observed.sum(axis=1, keepdims=True) * col_sums[factor] / total[factor, None]
+
+        num_columns = np.count_nonzero(col_sums, axis=1)
+        dof = (np.array([len(row) for row in rows]) - 1) * (num_columns - 1)
+        diff = observed - expected
+        # Yates' continuity correction of the tests with one degree of freedom, as in chi2_contingency
+        correct = (dof == 1)[factor, None]
+        diff = np.where(correct, np.sign(diff) * np.maximum(np.abs(diff) - 0.5, 0), diff)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            terms = np.where(expected > 0, diff**2 / expected, 0.0)
+        np.add.at(chisquared, factor, terms.sum(axis=1))
+
+        tested = dof > 0
+        chisquared[~tested] = 0.0
+        p_value[tested] = scipy.stats.chi2.sf(chisquared[tested], dof[tested])
+        return {"factor": self.factor_names, "chi_squared": chisquared, "p_value": p_value}
+
+    def evaluate(self) -> Dict[str, Any]:
+        """
+        Computes the entropy, diversity and parity of the metadata factors
+
+        Returns
+        -------
+        Dict[str, Any]
+            entropy : np.ndarray
+                Normalized entropy of each factor, in the order of names
+            diversity : np.ndarray
+                Simpson diversity of each factor, in the order of names
+            diversity_by_class : np.ndarray
+                Simpson diversity of each factor within each class
+            chi_squared : np.ndarray
+                chi-squared value of the parity test of each factor, in the order of factor_names
+            p_value : np.ndarray
+                p-value of the parity test of each factor
+        """
+        parity = self.parity()
+        return {
+            "entropy": self.entropy(normalized=True),
+            "diversity": self.diversity(),
+            "diversity_by_class": self.diversity_by_class(),
+            "chi_squared": parity["chi_squared"],
+            "p_value": parity["p_value"],
+        }
+
+
+def _estimate(function: Callable[..., float], args: Tuple[np.ndarray, ...], num_neighbors: int) -> float:
+    """Runs one mutual information estimate, in a worker process when run in a pool"""
+    return function(*args, num_neighbors)
@@ -1,8 +1,18 @@
 import warnings
-from typing import Optional, Tuple
+from typing import Any, Dict, Optional, Tuple
 
 import numpy as np
 import scipy
+from numpy.typing import ArrayLike
+
+from dataeval._internal.metrics.base import MetricMixin
+
+
+def _chisquare(observed: np.ndarray, expected: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Computes the one-way chi-squared statistics and p-values of each row of observed and expected counts"""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        chisquared = np.sum((observed - expected) ** 2 / expected, axis=-1)
+    return chisquared, scipy.stats.chi2.sf(chisquared, observed.shape[-1] - 1)
 
 
 class Parity:
@@ -50,7 +60,36 @@ class Parity:
         # Calculate
         observed_dist = self._calculate_label_dist(observed_labels)
         expected_dist = self._calculate_label_dist(expected_labels)
+        self._set_dists(expected_dist, observed_dist)
+
+    @classmethod
+    def from_counts(cls, expected_counts: np.ndarray, observed_counts: np.ndarray) -> "Parity":
+        """
+        Creates a Parity from the class counts of the expected and observed datasets
+
+        Parameters
+        ----------
+        expected_counts : np.ndarray
+            Number of labels of each class in the expected dataset
+        observed_counts : np.ndarray
+            Number of labels of each class in the observed dataset
+
+        Returns
+        -------
+        Parity
+            Parity of the label distributions
 
+        Raises
+        ------
+        ValueError
+            If either dataset is empty or the numbers of classes differ
+        """
+        parity = cls.__new__(cls)
+        parity.num_classes = None
+        parity._set_dists(np.asarray(expected_counts), np.asarray(observed_counts))
+        return parity
+
+    def _set_dists(self, expected_dist: np.ndarray, observed_dist: np.ndarray):
         # Validate
         self._validate_dist(observed_dist, "observed")
 
@@ -178,3 +217,185 @@ class Parity:
         chisquared = cs_result.statistic
         p_value = cs_result.pvalue
         return chisquared, p_value
+
+    @classmethod
+    def evaluate_groups(
+        cls,
+        expected_labels: np.ndarray,
+        observed_labels: np.ndarray,
+        groups: Optional[np.ndarray] = None,
+        num_classes: Optional[int] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Perform the one-way chi-squared test of many sets of observed labels against the expected labels at once.
+
+        The class counts of every group are computed with a single bincount over combined group and class keys,
+        and the statistics and p-values of all groups are computed together. Each test matches :meth:`evaluate`
+        for the expected labels and the observed labels of the group.
+
+        Parameters
+        ----------
+        expected_labels : np.ndarray
+            List of class labels in the expected dataset
+        observed_labels : np.ndarray
+            Either a 2D array with one set of observed labels per row, or a list of class labels which are
+            split into groups by groups
+        groups : Optional[np.ndarray]
+            Group id of each observed label, required when observed_labels is a list of labels
+        num_classes : Optional[int]
+            The number of unique classes in the datasets. If this is not specified, it will
+            be inferred from the largest label in expected_labels and observed_labels
+
+        Returns
+        -------
+        Dict[str, np.ndarray]
+            group : np.ndarray
+                Sorted group ids, or the row indices of 2D observed labels
+            chi_squared : np.ndarray
+                chi-squared value of the test of each group
+            p_value : np.ndarray
+                p-value of the test of each group
+            num_observations : np.ndarray
+                Number of observed labels in each group
+
+        Raises
+        ------
+        ValueError
+            If either dataset is empty, if groups does not match observed_labels, or if a label
+            is not below num_classes
+        Warning
+            If any group has expected or observed class frequencies less than 5
+        """
+        expected_labels = np.asarray(expected_labels).reshape(-1)
+        observed_labels = np.asarray(observed_labels)
+        if groups is None:
+            if observed_labels.ndim != 2:
+                raise ValueError("Observed labels should be a 2D array of label sets when groups is not provided")
+            group_ids = np.arange(len(observed_labels))
+            keys = np.repeat(group_ids, observed_labels.shape[1])
+        else:
+            if np.shape(groups) != (observed_labels.size,):
+                raise ValueError("Groups should have one group id per observed label")
+            group_ids, keys = np.unique(groups, return_inverse=True)
+        observed_labels = observed_labels.reshape(-1)
+        if not len(expected_labels) or not len(observed_labels):
+            raise ValueError("No labels found in the expected or observed datasets")
+
+        largest = max(expected_labels.max(), observed_labels.max()) + 1
+        num_classes = num_classes if num_classes else int(largest)
+        if largest > num_classes:
+            raise ValueError(f"Found label {largest - 1}, which is not below num_classes={num_classes}")
+
+        observed = np.bincount(keys * num_classes + observed_labels, minlength=len(group_ids) * num_classes)
+        observed = observed.reshape((len(group_ids), num_classes))
+        expected_dist = np.bincount(expected_labels, minlength=num_classes)
+        num_observations = observed.sum(axis=1)
+        expected = expected_dist * (num_observations[:, None] / expected_dist.sum())
+
+        low = group_ids[np.any(observed < 5, axis=1) | np.any(expected < 5, axis=1)]
+        if len(low):
+            warnings.warn(
+                f"Groups {low} have expected or observed label frequencies less than 5."
+                " This may lead to invalid chi-squared evaluation."
+            )
+
+        chisquared, p_value = _chisquare(observed, expected)
+        return {
+            "group": group_ids,
+            "chi_squared": chisquared,
+            "p_value": p_value,
+            "num_observations": num_observations,
+        }
+
+
+class StreamingParity(MetricMixin):
+    """
+    Accumulates the class counts of the expected and observed labels across batches for :class:`Parity`
+
+    Only the counts of each class are kept, so labels can be streamed from a data loader over a dataset of any
+    size. Accumulators of separate shards of the datasets can be combined with :meth:`merge`.
+
+    Parameters
+    ----------
+    num_classes : Optional[int]
+        The number of unique classes in the datasets. If this is not specified, it will
+        be inferred from the largest labels in the expected and observed batches
+    """
+
+    def __init__(self, num_classes: Optional[int] = None):
+        self.num_classes = num_classes
+        self.reset()
+
+    def update(self, preds: Optional[ArrayLike] = None, targets: Optional[ArrayLike] = None) -> None:
+        """
+        Adds a batch of labels to the class counts
+
+        Parameters
+        ----------
+        preds : Optional[ArrayLike]
+            Batch of class labels in the observed dataset
+        targets : Optional[ArrayLike]
+            Batch of class labels in the expected dataset
+        """
+        if preds is not None:
+            self.observed_counts = self._add(self.observed_counts, np.bincount(np.ravel(preds)))
+        if targets is not None:
+            self.expected_counts = self._add(self.expected_counts, np.bincount(np.ravel(targets)))
+
+    def merge(self, other: "StreamingParity") -> "StreamingParity":
+        """
+        Adds the class counts accumulated by another instance, such as one over another shard of the datasets
+
+        Parameters
+        ----------
+        other : StreamingParity
+            Accumulator whose counts are added
+
+        Returns
+        -------
+        StreamingParity
+            This accumulator
+        """
+        self.observed_counts = self._add(self.observed_counts, other.observed_counts)
+        self.expected_counts = self._add(self.expected_counts, other.expected_counts)
+        return self
+
+    def compute(self) -> Dict[str, Any]:
+        """
+        Perform a one-way chi-squared test between the accumulated observed and expected class counts,
+        as :meth:`Parity.evaluate` does for the complete labels
+
+        Returns
+        -------
+        Dict[str, Any]
+            chi_squared : np.float64
+                chi-squared value of the test
+            p_value : np.float64
+                p-value of the test
+
+        Raises
+        ------
+        ValueError
+            If either dataset is empty or the numbers of classes differ
+        """
+        num_classes = self.num_classes or 0
+        expected = self._add(np.zeros(num_classes, dtype=np.intp), self.expected_counts)
+        observed = self._add(np.zeros(num_classes, dtype=np.intp), self.observed_counts)
+        chisquared, p_value = Parity.from_counts(expected, observed).evaluate()
+        return {"chi_squared": chisquared, "p_value": p_value}
+
+    def reset(self) -> None:
+        """
+        Resets the class counts
+        """
+        self.observed_counts = np.zeros(0, dtype=np.intp)
+        self.expected_counts = np.zeros(0, dtype=np.intp)
+
+    @staticmethod
+    def _add(counts: np.ndarray, other: np.ndarray) -> np.ndarray:
+        """Adds two class count arrays, extending the shorter one with zeros"""
+        if len(counts) < len(other):
+            counts, other = other, counts
+        counts = counts.copy()
+        counts[: len(other)] += other
+        return counts
@@ -4,12 +4,13 @@ FR Test Statistic based estimate for the upperbound
 average precision using empirical mean precision
 """
 
-from typing import Dict
+from typing import Dict, Optional, Tuple
 
 import numpy as np
+from numpy.typing import ArrayLike
 
-from dataeval._internal.functional.uap import uap
-from dataeval._internal.metrics.base import EvaluateMixin
+from dataeval._internal.functional.uap import binned_uap, uap
+from dataeval._internal.metrics.base import EvaluateMixin, MetricMixin
 
 
 class UAP(EvaluateMixin):
@@ -22,7 +23,7 @@ class UAP(EvaluateMixin):
         A numpy array of n_samples of class labels with M unique classes.
 
     scores : np.ndarray
-        A 2D array of class probabilities per image
+        A 2D array of class probabilities per image, with a column for each of the sorted unique labels
     """
 
     def __init__(self, labels: np.ndarray, scores: np.ndarray) -> None:
@@ -43,3 +44,112 @@ class UAP(EvaluateMixin):
         """
 
         return {"uap": uap(self.labels, self.scores)}
+
+
+class StreamingUAP(MetricMixin):
+    """
+    Approximates :class:`UAP` from histograms of the class scores accumulated across batches
+
+    Only the counts of the scores of each class in each bin are kept, split by whether the sample
+    belongs to the class, so inference logs of any size can be streamed through. The estimate equals
+    the exact average precision of the scores rounded down to their bins, and approaches it as
+    num_bins grows. Accumulators of separate shards can be combined with :meth:`merge`.
+
+    Parameters
+    ----------
+    num_bins : int, default 1000
+        Number of uniform bins of the scores
+    score_range : Tuple[float, float], default (0.0, 1.0)
+        Range of the scores, where scores outside of it are counted in the first or last bin
+    """
+
+    def __init__(self, num_bins: int = 1000, score_range: Tuple[float, float] = (0.0, 1.0)) -> None:
+        if num_bins < 1:
+            raise ValueError(f"num_bins should be at least 1; got {num_bins}")
+        self.num_bins = num_bins
+        self.score_range = score_range
+        self.reset()
+
+    def update(self, preds: ArrayLike, targets: ArrayLike) -> None:
+        """
+        Adds a batch of scores to the histograms
+
+        Parameters
+        ----------
+        preds : ArrayLike
+            Batch of class scores of shape (batch_size, num_classes)
+        targets : ArrayLike
+            Batch of class labels, as indices of the columns of preds
+
+        Raises
+        ------
+        ValueError
+            If the number of classes differs from earlier batches
+        """
+        scores = np.asarray(preds, dtype=np.float64)
+        labels = np.ravel(targets).astype(np.intp)
+        if scores.ndim != 2 or len(scores) != len(labels):
+            raise ValueError(f"preds should be of shape ({len(labels)}, num_classes); got {scores.shape}")
+        num_classes = scores.shape[1]
+        if self.positives is None or self.negatives is None:
+            self.positives = np.zeros((num_classes, self.num_bins), dtype=np.int64)
+            self.negatives = np.zeros((num_classes, self.num_bins), dtype=np.int64)
+        elif len(self.positives) != num_classes:
+            raise ValueError(f"Expected scores of {len(self.positives)} classes; got {num_classes}")
+
+        low, high = self.score_range
+        bins = np.clip(((scores - low) / (high - low) * self.num_bins).astype(np.intp), 0, self.num_bins - 1)
+        # Index of the (class, bin) histogram entry of every score
+        keys = np.arange(num_classes) * self.num_bins + bins
+        size = num_classes * self.num_bins
+        counts = np.bincount(keys.reshape(-1), minlength=size)
+        positives = np.bincount(keys[np.arange(len(labels)), labels], minlength=size)
+        self.positives += positives.reshape(self.positives.shape)
+        self.negatives += (counts - positives).reshape(self.negatives.shape)
+
+    def merge(self, other: "StreamingUAP") -> "StreamingUAP":
+        """
+        Adds the histograms accumulated by another instance with the same bins
+
+        Parameters
+        ----------
+        other : StreamingUAP
+            Accumulator whose histograms are added
+
+        Returns
+        -------
+        StreamingUAP
+            This accumulator
+        """
+        if (other.num_bins, other.score_range) != (self.num_bins, self.score_range):
+            raise ValueError("Only accumulators with the same bins can be merged")
+        if other.positives is not None and other.negatives is not None:
+            if self.positives is None or self.negatives is None:
+                self.positives, self.negatives = other.positives.copy(), other.negatives.copy()
+            else:
+                self.positives += other.positives
+                self.negatives += other.negatives
+        return self
+
+    def compute(self) -> Dict[str, float]:
+        """
+        Returns
+        -------
+        Dict[str, float]
+            uap : The approximate empirical mean precision estimate
+
+        Raises
+        ------
+        ValueError
+            If fewer than 2 classes have samples
+        """
+        if self.positives is None or self.negatives is None or np.count_nonzero(self.positives.sum(axis=1)) < 2:
+            raise ValueError("Expected samples of at least 2 classes")
+        return {"uap": binned_uap(self.positives, self.negatives)}
+
+    def reset(self) -> None:
+        """
+        Resets the histograms
+        """
+        self.positives: Optional[np.ndarray] = None
+        self.negatives: Optional[np.ndarray] = None
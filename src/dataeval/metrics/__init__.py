@@ -1,8 +1,22 @@
+from dataeval._internal.functional.neighbors import NeighborIndex
 from dataeval._internal.metrics.ber import BER
 from dataeval._internal.metrics.coverage import Coverage
 from dataeval._internal.metrics.divergence import Divergence
-from dataeval._internal.metrics.parity import Parity
+from dataeval._internal.metrics.metadata import MetadataBias
+from dataeval._internal.metrics.parity import Parity, StreamingParity
 from dataeval._internal.metrics.stats import ChannelStats, ImageStats
-from dataeval._internal.metrics.uap import UAP
+from dataeval._internal.metrics.uap import UAP, StreamingUAP
 
-__all__ = ["BER", "Coverage", "Divergence", "Parity", "ChannelStats", "ImageStats", "UAP"]
+__all__ = [
+    "BER",
+    "Coverage",
+    "Divergence",
+    "Parity",
+    "ChannelStats",
+    "ImageStats",
+    "MetadataBias",
+    "NeighborIndex",
+    "StreamingParity",
+    "StreamingUAP",
+    "UAP",
+]
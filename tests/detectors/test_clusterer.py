@@ -6,11 +6,9 @@ import pytest
 import sklearn.datasets as dsets
 
 from dataeval._internal.detectors.clusterer import (
-    Cluster,
     Clusterer,
+    ClusterHierarchy,
     ClusterMergeEntry,
-    ClusterPosition,
-    Clusters,
     extend_linkage,
 )
 
@@ -25,6 +23,19 @@ def get_blobs(std=0.3):
     return blobs
 
 
+def chain_hierarchy(dists) -> ClusterHierarchy:
+    """Hierarchy of a single cluster that starts as a pair and adds one sample per distance"""
+    n = len(dists) + 1
+    link_arr = [[0, 1, dists[0], 2]] + [[n + i - 1, i + 1, dist, i + 2] for i, dist in enumerate(dists[1:], 1)]
+    return ClusterHierarchy(extend_linkage(np.array(link_arr, dtype=np.float64)))
+
+
+def merge_hierarchy() -> ClusterHierarchy:
+    """Hierarchy where pair 0 merges into cluster 1 two levels after it formed"""
+    link_arr = [[0, 1, 1, 2], [2, 3, 1, 2], [7, 4, 1, 3], [8, 5, 1, 4], [6, 9, 2, 6]]
+    return ClusterHierarchy(extend_linkage(np.array(link_arr, dtype=np.float64)))
+
+
 @pytest.fixture
 def functional_data():
     functional_data = get_blobs()
@@ -72,14 +83,13 @@ class TestMatrixOps:
         for test_set in test_sets:
             c = Clusterer(test_set)
 
-            # Distance matrix
-            assert not any(np.isnan(c._darr))  # Should contain no NaN
-            assert all(c._darr >= 0)  # Distances are always positive or 0 (same data point)
-            assert len(c._darr) == rows * (rows - 1) / 2  #  condensed form of matrix
-
             # Square distance matrix
-            assert len(set(c._sqdmat.shape)) == 1  # All dims are equal size
+            assert not np.any(np.isnan(c._sqdmat))  # Should contain no NaN
+            assert np.all(c._sqdmat >= 0)  # Distances are always positive or 0 (same data point)
+            assert c._sqdmat.shape == (rows, rows)  # All dims are equal size
+            assert c._sqdmat.dtype == np.float32
             assert np.all(c._sqdmat == c._sqdmat.T)  # Matrix is symmetrical
+            assert np.all(np.diag(c._sqdmat) == 0)
 
             # Extend function
             arr = np.ones(shape=(rows, cols))
@@ -112,11 +122,6 @@ class TestMatrixOps:
         test_set = np.ones(shape=shape)
         with pytest.raises(ValueError):
             c = Clusterer(test_set)
-            # Distance matrix
-            assert not any(np.isnan(c._darr))  # Should contain no NaN
-            assert all(c._darr >= 0)  # Distances are always positive or 0 (same data point)
-            assert len(c._darr) == rows * (rows - 1) / 2  #  condensed form of matrix
-
             # Square distance matrix
             assert len(set(c._sqdmat.shape)) == 1  # All dims are equal size
             assert np.all(c._sqdmat == c._sqdmat.T)  # Matrix is symmetrical
@@ -134,94 +139,64 @@ class TestMatrixOps:
             npt.assert_array_equal(ext_matrix[:, -1], np.arange(rows + 1, 2 * rows + 1))
 
 
-class TestCluster:
-    def test_init_not_copy(self):
-        """Variables are calculated correctly when not copying"""
-        c1 = Cluster(merged=False, samples=[0, 1], sample_dist=[1, 4], is_copy=False)  # type: ignore
-
-        assert isinstance(c1.samples, np.ndarray)
-        assert c1.samples.dtype == np.int32
-
-        assert isinstance(c1.sample_dist, np.ndarray)
-        npt.assert_array_equal(c1.sample_dist, np.array([1, 4]))
-
-        assert c1.dist_avg == 2.5
-        assert c1.dist_std == 1.5
-        assert not c1.out1
-        assert not c1.out2
-
-    def test_init_dist_is_scalar(self):
-        """Special case where there is only one sample"""
-        c1 = Cluster(merged=False, samples=[0], sample_dist=0, is_copy=False)  # type: ignore
-
-        assert isinstance(c1.samples, np.ndarray)
-        assert c1.samples.dtype == np.int32
-
-        assert isinstance(c1.sample_dist, np.ndarray)
-        npt.assert_array_equal(c1.sample_dist, np.array([0]))
-
-        assert c1.dist_avg == 0
-        assert c1.dist_std == 1e-5
-        assert not c1.out1
-        assert not c1.out2
-
-    def test_init_is_copy(self):
-        """Default values are set for copied clusters"""
-        # A copy ignores scalar sample_dist, and sets dist_std to 0 instead of 1e-5
-        c1 = Cluster(merged=False, samples=[0], sample_dist=0, is_copy=True)  # type: ignore
-
-        assert isinstance(c1.samples, np.ndarray)
-        assert c1.samples.dtype == np.int32
-
-        assert isinstance(c1.sample_dist, np.ndarray)
-        assert c1.sample_dist == np.array([0])
-
-        assert c1.dist_avg == 0
-        assert c1.dist_std == 0
-        assert not c1.out1
-        assert not c1.out2
-
-    def test_cluster_copy(self):
-        """A copied cluster retains parent's samples, but not other status"""
-        c1 = Cluster(merged=True, samples=[0, 1], sample_dist=[1, 4], is_copy=False)  # type: ignore
-
-        c2 = c1.copy()
-
-        assert c1.merged != c2.merged
-        assert not c2.merged
-
-        npt.assert_array_equal(c1.samples, c2.samples)
-        npt.assert_array_equal(c1.sample_dist, c2.sample_dist)
-
-        assert c1.dist_avg != c2.dist_avg  # 2.5 != 0.0
-        assert c1.dist_std != c2.dist_std  # 1.5 != 0.0
-
-        assert not c2.out1
-        assert not c2.out2
-
-    def test_cluster_repr(self):
-        c1 = Cluster(merged=False, samples=[0, 1], sample_dist=[1, 4], is_copy=False)  # type: ignore
-
-        assert (
-            c1.__repr__()
-            == "Cluster(**{'merged': False, 'samples': array([0, 1], dtype=int32), 'sample_dist': array([1, 4]), 'is_copy': False})"  # noqa: E501
-        )
-
-        # Numpy repr assumes direct numpy namespace imports
-        from numpy import array, int32
-
-        assert Cluster(
-            **{"merged": False, "samples": array([0, 1], dtype=int32), "sample_dist": array([1, 4]), "is_copy": False}
-        )
-
-        del array, int32  # Remove imports
-
-
-class TestClusterPosition:
-    def test_get_by_name(self):
-        cp = ClusterPosition(1, 1)
-        assert cp.level
-        assert cp.cid
+class TestClusterHierarchy:
+    def test_chain(self):
+        """Running distance statistics match the statistics of all merge distances"""
+        h = chain_hierarchy([1, 4])
+        assert len(h) == 2
+        assert list(h.levels) == [0, 1]
+
+        pair, chain = h.find(0, 0), h.find(1, 0)
+        npt.assert_array_equal(h.samples(pair), [0, 1])
+        npt.assert_array_equal(h.samples(chain), [0, 1, 2])
+        assert h.records["dist_avg"][chain] == 2.5
+        assert h.records["dist_std"][chain] == 1.5
+        assert h.records["parent"][pair] == chain
+        assert h.records["parent"][chain] == -1
+        assert not h.records["out1"][chain]
+        assert not h.records["out2"][chain]
+
+    def test_single_distance(self):
+        """Special case where there is only one distance"""
+        h = chain_hierarchy([0])
+        record = h.records[h.find(0, 0)]
+        assert record["dist_avg"] == 0
+        assert record["dist_std"] == 1e-5
+        assert not record["out1"]
+        assert not record["out2"]
+
+    def test_samples_are_views(self):
+        """Samples of every cluster are slices of a single permutation"""
+        h = merge_hierarchy()
+        npt.assert_array_equal(np.sort(h.order), np.arange(6))
+        for record in range(len(h)):
+            assert h.samples(record).base is h.order
+
+    def test_copies(self):
+        """A cluster skipping levels before merging is copied onto the skipped levels"""
+        h = merge_hierarchy()
+        original = h.find(0, 0)
+        for level in (1, 2):
+            copy = h.find(level, 0)
+            assert h.records["is_copy"][copy]
+            assert not h.records["merged"][copy]
+            assert h.records["dist_avg"][copy] == 0
+            assert h.records["dist_std"][copy] == 0
+            npt.assert_array_equal(h.samples(copy), h.samples(original))
+
+        merged = h.find(3, 0)
+        assert h.records["merged"][merged] == 1
+        assert h.records["count"][merged] == 6
+        # Larger cluster is ordered first when merging two clusters
+        npt.assert_array_equal(h.samples(merged), [2, 3, 4, 5, 0, 1])
+        with pytest.raises(KeyError):
+            h.find(3, 1)
+
+    def test_records_ordered_by_level(self):
+        h = merge_hierarchy()
+        assert np.all(np.diff(h.records["level"]) >= 0)
+        for level in h.levels:
+            assert all(h.records["level"][i] == level for i in h.level(level))
 
 
 class TestClusterMergeEntry:
@@ -269,7 +244,6 @@ class TestClustererInit:
         """Tests that the init correctly sets the distance matrix and linkage array"""
         cl = Clusterer(functional_data)
         assert cl._num_samples is not None
-        assert cl._darr is not None
         assert cl._sqdmat is not None
         assert cl._larr is not None
         assert cl._max_clusters is not None
@@ -308,51 +282,21 @@ class TestClustererInit:
 
 
 class TestCreateClusters:
-    """Tests all functions related to and including the `create_clusters` method"""
-
-    clusterer = Clusterer(np.zeros((3, 1)))
-
-    def test_fill_level(self):
-        """Merged clusters fill levels with missing cluster data"""
-        dummy_data = Cluster(False, np.ndarray([0]), 0.0, True)
-        x = Clusters(
-            {
-                0: {
-                    0: dummy_data,
-                    1: dummy_data,
-                },
-                1: {
-                    0: dummy_data,
-                },
-                2: {
-                    0: dummy_data,
-                },
-                3: {
-                    0: dummy_data,
-                },
-            }
-        )
-
-        # Fill 0,1 up to 2,1
-        filled_clusters = self.clusterer._fill_levels(x, ClusterPosition(0, 1), ClusterPosition(2, 1))
-
-        # Confirm cluster info has been placed into levels up to merge level (3)
-        # assert cluster_1 in [0, 1, 2, 3)
-        assert [1 in filled_clusters[i] for i in (0, 1, 2)]
-        assert 1 not in filled_clusters[3]
+    """Tests all functions related to and including creating the cluster hierarchy"""
 
     @pytest.mark.parametrize("data_func", ["functional_data", "duplicate_data", "outlier_data"])
     def test_create_clusters(self, data_func, request):
         """
-        1. All keys are present in outer and inner dicts
+        1. All levels and cluster ids are present
         2. Max level and max clusters are correct
         3. Distances are all positive
         4. All samples have a cluster
         """
         dataset = request.getfixturevalue(data_func)
         clusterer = Clusterer(dataset)
-        # Calling clusterer.clusters calls _create_clusters if _clusters is empty
+        # Calling clusterer.clusters creates the hierarchy if _clusters is empty
         clusters = clusterer.clusters
+        records = clusters.records
 
         # Max level and max clusters are empirically correct
         n = len(dataset)
@@ -361,77 +305,57 @@ class TestCreateClusters:
         assert clusters.max_level >= 1
         assert clusters.max_level <= n  # Max levels must be less than samples
 
-        result_all_levels = {}
-        result_all_clusters = {}
-
-        all_samples = set()
-
-        # Collect all samples in results to confirm they have been added to the dict
-        for cluster_id_dict in clusters.values():
-            for cluster in cluster_id_dict.values():
-                # All distances must be positive
-                assert cluster.dist_avg >= 0
-                assert cluster.dist_std >= 0
-                assert np.all(cluster.sample_dist >= 0)
+        # All distances must be positive
+        assert np.all(records["dist_avg"] >= 0)
+        assert np.all(records["dist_std"] >= 0)
 
-                samples = cluster.samples
-                all_samples.update(set(samples))
-            # Max of all clusters, checking at each level
-            result_all_clusters.update(cluster_id_dict)
-        result_all_levels = set(clusters)  # type: ignore
+        # Quick check that no levels or cluster_ids are skipped, both are 0-indexed
+        assert len(np.unique(records["level"])) == records["level"].max() + 1
+        assert len(np.unique(records["cid"])) == records["cid"].max() + 1
 
-        result_max_cluster = max(result_all_clusters)
-        result_max_level = max(result_all_levels)
+        # Every cluster is contained in the cluster it merges into
+        for record in range(len(clusters)):
+            parent = records["parent"][record]
+            if parent >= 0:
+                assert set(clusters.samples(record)) <= set(clusters.samples(parent))
 
-        # Quick check that no levels or cluster_ids are skipped, both are 0-indexed
-        assert len(result_all_levels) == result_max_level + 1
-        assert len(result_all_clusters) == result_max_cluster + 1
-
-        # Confirm that over all results, last level has all samples
-        last_level_results = clusters.get(result_max_level)
-        assert last_level_results is not None
-        # Should only contain one cluster
-        last_level_cluster = list(last_level_results.values())
-        assert len(last_level_cluster) == 1
-        # Confirm final cluster contains all samples, and is the same as all samples found in results
-        last_cluster_info = last_level_cluster[0]
-        assert last_cluster_info.count == len(all_samples)
-        assert sorted(last_cluster_info.samples) == sorted(all_samples)
+        # Last level contains a single cluster with all samples
+        last_level = list(clusters.level(clusters.levels[-1]))
+        assert len(last_level) == 1
+        assert records["count"][last_level[0]] == n
+        assert sorted(clusters.samples(last_level[0])) == list(range(n))
 
         # result_max_cluster is 0-indexed, so adjust for total number
-        assert clusterer._max_clusters == result_max_cluster + 1
-        assert len(all_samples) == n
+        assert clusterer._max_clusters == records["cid"].max() + 1
 
     def test_skip_create_clusters(self, functional_data):
         c = Clusterer(functional_data)
-        x = {0: {0: Cluster(0, np.array([0]), np.array([0]))}}
-        c._clusters = x  # type: ignore
+        x = chain_hierarchy([0, 0])
+        c._clusters = x
 
-        assert c.clusters == x
+        assert c.clusters is x
 
 
 class TestClusterOutliers:
     """Tests all functions related to and including the `find_outliers` method"""
 
     @pytest.mark.parametrize(
-        "cluster, outs, pouts",
+        "dists, outs, pouts",
         [
             # out2 is True; add last sample to outliers
-            (Cluster(0, np.arange(10), np.array([1, 1, 1, 1, 1, 1, 1, 1, 1, 11])), [9], []),
+            ([1, 1, 1, 1, 1, 1, 1, 1, 11], [9], []),
             # out1 is True and len(cluster.samples) >= min_num; add last sample to possible_outliers
-            (Cluster(0, np.arange(5), np.array([1, 1, 1, 1, 6])), [], [4]),
+            ([1, 1, 1, 6], [], [4]),
             # len(cluster.samples) < self.min_num; add all samples to outliers
-            (Cluster(0, np.arange(3), np.zeros((3, 1))), [0, 1, 2], []),
+            ([0, 0], [0, 1, 2], []),
         ],
     )
-    def test_find_outliers(self, cluster: Cluster, outs, pouts):
+    def test_find_outliers(self, dists, outs, pouts):
         """Specified outliers are added to lists"""
-
-        x = Clusters({1: {0: cluster}})
         last_merge_levels = {0: 0}
 
         c = Clusterer(np.zeros((3, 1)))
-        c._clusters = x
+        c._clusters = chain_hierarchy(dists)
         c._min_num_samples_per_cluster = 4
 
         o, po = c.find_outliers(last_merge_levels=last_merge_levels)
@@ -440,22 +364,18 @@ class TestClusterOutliers:
         assert po == pouts
 
     @pytest.mark.parametrize(
-        "mid, cid, merge_lvl, cluster",
+        "last_merge_levels, hierarchy",
         [
-            (0, 0, 0, Cluster(1, np.array([0]), 0.0)),  # merged
-            (0, 1, 0, Cluster(0, np.array([0]), 0.0)),  # cluster_id not in last_merge_levels
-            (0, 0, 2, Cluster(0, np.array([0]), 0.0)),  # merge_level > level (1)
-            (0, 0, 0, Cluster(0, np.arange(3), np.zeros((3, 1)))),  # No outliers
+            ({0: 0}, merge_hierarchy()),  # merged
+            ({1: 0}, chain_hierarchy([0, 0])),  # cluster_id not in last_merge_levels
+            ({0: 2}, chain_hierarchy([0, 0])),  # merge_level > level (1)
+            ({0: 0}, chain_hierarchy([0, 0, 0])),  # No outliers
         ],
     )
-    def test_no_outliers(self, mid, cid, merge_lvl, cluster):
+    def test_no_outliers(self, last_merge_levels, hierarchy):
         """No outliers are found"""
-        x = Clusters({1: {cid: cluster}})
-
-        last_merge_levels = {mid: merge_lvl}
-
         c = Clusterer(np.zeros((3, 1)))
-        c._clusters = x
+        c._clusters = hierarchy
         c._min_num_samples_per_cluster = 2
 
         o, po = c.find_outliers(last_merge_levels=last_merge_levels)
@@ -602,3 +522,137 @@ class TestClustererEvaluate:
             [41, 62],
             [80, 81, 93],
         ]
+
+
+class TestClustererMetric:
+    """Tests clustering with distance metrics other than euclidean"""
+
+    def test_linkage_matches_scipy(self, functional_data):
+        from scipy.cluster.hierarchy import linkage
+
+        for metric in ("euclidean", "cosine", "cityblock"):
+            c = Clusterer(functional_data, metric=metric)
+            expected = linkage(functional_data, method="single", metric=metric)
+            npt.assert_allclose(c._larr[:, 2], expected[:, 2], rtol=1e-5, atol=1e-5)
+            npt.assert_array_equal(c._larr[:, 3], expected[:, 3])
+
+    def test_cosine_duplicates(self, functional_data):
+        """Scaled copies are exact duplicates under cosine distance"""
+        data = np.concatenate([functional_data, functional_data[:1] * 3])
+        results = Clusterer(data, metric="cosine").evaluate()
+        assert any({0, len(data) - 1} <= set(group) for group in results["duplicates"])
+
+    def test_invalid_metric(self, functional_data):
+        with pytest.raises(ValueError):
+            Clusterer(functional_data, metric="not_a_metric")
+
+
+class TestClustererApproximate:
+    """Tests the approximate mode using representatives"""
+
+    def test_invalid_representatives(self, functional_data):
+        with pytest.raises(ValueError):
+            Clusterer(functional_data, representatives=1)
+
+    def test_exact_when_representatives_exceed_samples(self, functional_data):
+        c = Clusterer(functional_data, representatives=len(functional_data))
+        results = c.evaluate()
+        assert c.representatives is None
+        assert c.assignments is None
+        assert "error_bound" not in results
+        assert results == Clusterer(functional_data).evaluate()
+
+    def test_evaluate_approximate(self, functional_data):
+        data = np.concatenate([functional_data, functional_data[:50] + 1e-3, [[20.0, 20.0]]])
+        c = Clusterer(data, representatives=60)
+        results = c.evaluate()
+
+        representatives = c.representatives
+        assert representatives is not None
+        assert c.assignments is not None
+        assert len(representatives) <= 60
+        assert c.assignments.shape == (len(data),)
+        # Every representative is assigned to itself
+        npt.assert_array_equal(representatives[c.assignments[representatives]], representatives)
+
+        assert results["error_bound"] >= 0
+        assert [24, 79] in results["duplicates"]
+        assert len(data) - 1 in results["outliers"]
+        all_indices = results["outliers"] + results["potential_outliers"]
+        all_indices += [i for group in results["duplicates"] + results["near_duplicates"] for i in group]
+        assert all(0 <= i < len(data) for i in all_indices)
+
+    @pytest.mark.parametrize("metric", ["euclidean", "cosine"])
+    def test_error_bound(self, metric):
+        from scipy.spatial.distance import cdist
+
+        data = np.random.default_rng(2).normal(size=(300, 4)) + 1
+        c = Clusterer(data, metric=metric, representatives=40)
+        assert c.representatives is not None and c.assignments is not None
+        represented = data[c.representatives[c.assignments]]
+        difference = np.abs(cdist(data, data, metric) - cdist(represented, represented, metric))
+        assert difference.max() <= 2 * c._error_bound() + 1e-5
+
+
+class TestClustererAdd:
+    """Tests inserting samples into an existing hierarchy"""
+
+    def test_add_matches_rebuild(self, functional_data):
+        c = Clusterer(functional_data[:60])
+        c.add(functional_data[60:90])
+        c.add(functional_data[90:])
+        full = Clusterer(functional_data)
+
+        npt.assert_array_equal(c.data, functional_data)
+        npt.assert_allclose(c._sqdmat, full._sqdmat, atol=1e-5)
+        npt.assert_allclose(c._larr[:, 2], full._larr[:, 2], atol=1e-5)
+        npt.assert_array_equal(c._larr[:, 3], full._larr[:, 3])
+        assert c.evaluate() == full.evaluate()
+
+    def test_add_single_samples(self, functional_data):
+        c = Clusterer(functional_data[:10])
+        for sample in functional_data[10:20]:
+            c.add(sample[None])
+        assert c._sqdmat.shape == (20, 20)
+        npt.assert_array_equal(c._sqdmat, c._sqdmat.T)
+        assert len(c._mst[0]) == 19
+
+    def test_add_resets_results(self, functional_data):
+        c = Clusterer(functional_data[:-1])
+        assert len(functional_data) - 1 not in c.evaluate()["outliers"]
+        c.add(np.array([[20.0, 20.0]]))
+        assert c._clusters is None
+        assert len(functional_data) - 1 in c.evaluate()["outliers"]
+
+    def test_add_empty(self, functional_data):
+        c = Clusterer(functional_data)
+        larr = c._larr
+        c.add(np.zeros((0, 2)))
+        assert c._larr is larr
+
+    @pytest.mark.parametrize(
+        "samples, error",
+        [
+            ([[0.0, 0.0]], TypeError),
+            (np.zeros(2), ValueError),
+            (np.zeros((1, 3)), ValueError),
+        ],
+    )
+    def test_add_invalid(self, functional_data, samples, error):
+        c = Clusterer(functional_data)
+        with pytest.raises(error):
+            c.add(samples)
+
+    def test_add_approximate(self, functional_data):
+        c = Clusterer(functional_data[:-1], representatives=30)
+        error_bound = c.evaluate()["error_bound"]
+        assert c.representatives is not None
+        representatives = c.representatives.copy()
+
+        c.add(np.stack([functional_data[-1], [20.0, 20.0]]))
+        assert c.assignments is not None
+        assert c.assignments.shape == (len(functional_data) + 1,)
+        # Only the sample beyond the error bound becomes a representative
+        npt.assert_array_equal(c.representatives, np.append(representatives, len(functional_data)))
+        assert c._sqdmat.shape == (len(representatives) + 1,) * 2
+        assert c.evaluate()["error_bound"] == error_bound
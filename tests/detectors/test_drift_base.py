@@ -17,6 +17,7 @@ from dataeval._internal.detectors.drift.base import (
     BaseUnivariateDrift,
     LastSeenUpdate,
     ReservoirSamplingUpdate,
+    _average_ranks,
     preprocess_x,
 )
 
@@ -119,3 +120,40 @@ class TestPreprocessDecorator:
         assert result == 10
         assert self._x_refcount == 0
         assert not hasattr(self, "_x")
+
+
+class TestReferenceCache:
+    def test_sorted(self):
+        base = BaseUnivariateDrift(np.array([[3.0, 1.0], [1.0, 1.0], [2.0, 0.0], [1.0, 2.0]]))
+        np.testing.assert_equal(base._x_ref_sorted, [[1, 1, 2, 3], [0, 1, 1, 2]])
+        assert base._x_ref_sorted is base._x_ref_sorted
+
+    def test_average_ranks(self):
+        ranks = _average_ranks(np.array([[1.0, 1.0, 2.0, 3.0], [0.0, 1.0, 1.0, 1.0]]))
+        np.testing.assert_equal(ranks, [[1.5, 1.5, 3, 4], [1, 3, 3, 3]])
+
+    def test_cache_cleared_on_update(self):
+        base = BaseUnivariateDrift(np.zeros((4, 2)), update_x_ref=LastSeenUpdate(4))
+        base.score = MagicMock(return_value=(np.ones(2), np.zeros(2)))
+        sorted_ref = base._x_ref_sorted
+        base.predict(np.ones((4, 2)))
+        assert base._x_ref_sorted is not sorted_ref
+        np.testing.assert_equal(base._x_ref_sorted, np.ones((2, 4)))
+
+    def test_cache_after_preprocessing(self):
+        base = BaseUnivariateDrift(np.zeros((4, 2)), preprocess_fn=lambda x: x + 1)
+        np.testing.assert_equal(base._x_ref_sorted, np.ones((2, 4)))
+
+
+def _feature_sums(x_ref: np.ndarray, x: np.ndarray, scale: float) -> np.ndarray:
+    return scale * (x_ref.sum(axis=1) + x.sum(axis=1))
+
+
+class TestMapFeatures:
+    @pytest.mark.parametrize("n_jobs", [None, 2, 3])
+    def test_chunks_in_order(self, n_jobs):
+        base = BaseUnivariateDrift(np.zeros((4, 7)), n_jobs=n_jobs)
+        x_ref = np.arange(28.0).reshape(7, 4)
+        x = np.ones((7, 5))
+        result = base._map_features(_feature_sums, x_ref, x, 2.0)
+        np.testing.assert_equal(result, 2 * (x_ref.sum(axis=1) + 5))
@@ -44,3 +44,43 @@ class TestCVMDrift:
         preds = cd.predict(x_h1)
         assert preds["is_drift"] == 1
         assert preds["distance"].min() >= 0.0  # type: ignore
+
+
+class TestCVMDriftScore:
+    @pytest.mark.parametrize(
+        "method, n_ref, n, decimals",
+        [("auto", 15, 12, None), ("auto", 15, 12, 0), ("asymptotic", 300, 200, None), ("auto", 300, 200, 1)],
+    )
+    def test_matches_scipy(self, method, n_ref, n, decimals):
+        from scipy.stats import cramervonmises_2samp
+
+        rng = np.random.default_rng(0)
+        x_ref = rng.normal(size=(n_ref, 4))
+        x = rng.normal(0.2, 1.2, size=(n, 4))
+        if decimals is not None:
+            x_ref, x = np.round(x_ref, decimals), np.round(x, decimals)
+        p_val, dist = DriftCVM(x_ref, method=method).score(x)
+        for f in range(4):
+            result = cramervonmises_2samp(x_ref[:, f], x[:, f], method=method)
+            assert dist[f] == pytest.approx(result.statistic, rel=1e-5)
+            assert p_val[f] == pytest.approx(result.pvalue, abs=1e-6)
+
+    def test_table(self):
+        rng = np.random.default_rng(0)
+        x_ref = rng.normal(size=(500, 20))
+        x = rng.normal(np.linspace(0, 0.5, 20), 1, size=(300, 20))
+        asymptotic = DriftCVM(x_ref, method="asymptotic").score(x)
+        table = DriftCVM(x_ref, method="table").score(x)
+        np.testing.assert_allclose(table[0], asymptotic[0], atol=1e-5)
+        np.testing.assert_equal(table[1], asymptotic[1])
+
+    def test_invalid_method(self):
+        with pytest.raises(ValueError):
+            DriftCVM(np.zeros((10, 2)), method="fast")  # type: ignore
+
+    def test_exact_n_jobs(self):
+        rng = np.random.default_rng(0)
+        x_ref, x = rng.normal(size=(12, 5)), rng.normal(size=(10, 5))
+        serial = DriftCVM(x_ref, method="exact").score(x)
+        parallel = DriftCVM(x_ref, method="exact", n_jobs=2).score(x)
+        np.testing.assert_equal(serial, parallel)
@@ -83,3 +83,39 @@ class TestKSDrift:
         assert preds_feature["threshold"] == cd.p_val
         if correction == "bonferroni":
             assert preds_batch["threshold"] == cd.p_val / cd.n_features
+
+
+class TestKSDriftScore:
+    @pytest.mark.parametrize("alternative", ["two-sided", "less", "greater"])
+    @pytest.mark.parametrize("method, n_ref, n", [("exact", 60, 40), ("asymp", 300, 200), ("auto", 80, 100)])
+    def test_matches_scipy(self, alternative, method, n_ref, n):
+        from scipy.stats import ks_2samp
+
+        rng = np.random.default_rng(0)
+        x_ref = np.round(rng.normal(size=(n_ref, 4)), 1)
+        x = np.round(rng.normal(0.2, 1.2, size=(n, 4)), 1)
+        p_val, dist = DriftKS(x_ref, alternative=alternative, method=method).score(x)
+        for f in range(4):
+            statistic, pvalue = ks_2samp(x_ref[:, f], x[:, f], alternative=alternative, method=method)[:2]
+            assert dist[f] == pytest.approx(statistic, abs=1e-6)
+            assert p_val[f] == pytest.approx(pvalue, abs=1e-6)
+
+    def test_sorted_reference_cached(self):
+        x_ref = np.random.default_rng(0).normal(size=(100, 3))
+        cd = DriftKS(x_ref, update_x_ref=LastSeenUpdate(100))
+        cd.score(x_ref)
+        sorted_ref = cd._x_ref_sorted
+        assert cd._x_ref_sorted is sorted_ref
+        cd.predict(x_ref + 1)
+        assert cd._x_ref_sorted is not sorted_ref
+
+    def test_invalid_method(self):
+        with pytest.raises(ValueError):
+            DriftKS(np.zeros((10, 2)), method="fast")  # type: ignore
+
+    def test_exact_n_jobs(self):
+        rng = np.random.default_rng(0)
+        x_ref, x = rng.normal(size=(30, 5)), rng.normal(size=(20, 5))
+        serial = DriftKS(x_ref, method="exact").score(x)
+        parallel = DriftKS(x_ref, method="exact", n_jobs=2).score(x)
+        np.testing.assert_equal(serial, parallel)
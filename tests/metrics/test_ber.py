@@ -1,4 +1,5 @@
 import numpy as np
+import numpy.testing as npt
 import pytest
 import torch
 
@@ -54,6 +55,36 @@ class TestAPIBER:
         methods = BER.methods()
         assert len(methods) == 2
 
+    @pytest.mark.parametrize("method", ["MST", "KNN"])
+    def test_n_jobs(self, method):
+        """Parallel neighbor searches return the same estimate"""
+        rng = np.random.default_rng(0)
+        data, labels = rng.normal(size=(200, 8)), rng.integers(0, 3, 200)
+        serial = BER(data, labels, method).evaluate()
+        parallel = BER(data, labels, method, n_jobs=2).evaluate()
+        assert (parallel["ber"], parallel["ber_lower"]) == (serial["ber"], serial["ber_lower"])
+        npt.assert_array_equal(parallel["confusion"], serial["confusion"])
+
+    @pytest.mark.parametrize(
+        "method, expected",
+        [
+            ("MST", [[0, 3, 0], [3, 0, 1], [0, 1, 0]]),
+            ("KNN", [[0, 2, 0], [2, 0, 0], [0, 1, 0]]),
+        ],
+    )
+    def test_confusion(self, method, expected):
+        """Confusion counts the edges or votes between each pair of sorted labels"""
+        data = np.array([[0.0], [1.0], [3.0], [4.0], [10.0]])
+        labels = np.array([5, 5, 7, 7, 9])[[0, 2, 1, 3, 4]]
+        result = BER(data, labels, method).evaluate()
+        npt.assert_array_equal(result["confusion"], expected)
+        # Misclassified samples or cross-class edges are the off-diagonal counts
+        errors = np.sum(result["confusion"]) - np.trace(result["confusion"])
+        if method == "MST":
+            assert result["ber"] == errors / 2 / len(data)
+        else:
+            assert result["ber"] == errors / len(data)
+
     @pytest.mark.parametrize(
         "method, k, expected",
         [
@@ -68,7 +99,9 @@ class TestAPIBER:
         data, labels = mnist()
         ber = BER(data=data, labels=labels, method=method, k=k)
         result = ber.evaluate()
+        confusion = result.pop("confusion")
         assert result == expected
+        assert confusion.shape == (10, 10)
 
 
 class TestArrayLikeBER:
@@ -98,3 +131,38 @@ class TestArrayLikeBER:
         ber = BER(arr, larr)
         with pytest.raises(ValueError):
             ber.evaluate()
+
+
+class TestSubsampledBER:
+    rng = np.random.default_rng(0)
+    labels = rng.integers(0, 3, 600)
+    data = rng.normal(size=(600, 4)) + labels[:, None]
+
+    @pytest.mark.parametrize("method", ["MST", "KNN"])
+    def test_output(self, method):
+        result = BER(self.data, self.labels, method).evaluate_subsamples(20, 200, seed=0)
+        assert result["estimates"].shape == (20, 2)
+        assert result["ber_ci"][0] <= result["ber"] <= result["ber_ci"][1]
+        assert result["ber_lower_ci"][0] <= result["ber_lower"] <= result["ber_lower_ci"][1]
+        assert result["ber_std_error"] > 0
+        assert result["ber_running_mean"][-1] == pytest.approx(result["ber"])
+
+    def test_full_subsamples_match_evaluate(self):
+        ber = BER(self.data, self.labels, "KNN", 3)
+        result = ber.evaluate_subsamples(2, 600, seed=0)
+        expected = ber.evaluate()
+        assert result["ber"] == expected["ber"]
+        assert result["ber_lower"] == expected["ber_lower"]
+        assert result["ber_std_error"] == 0
+
+    def test_processes(self):
+        ber = BER(self.data, self.labels, "MST")
+        # More subsamples than the two per worker in flight, which come back in order
+        serial = ber.evaluate_subsamples(7, 100, seed=1)
+        parallel = ber.evaluate_subsamples(7, 100, max_workers=2, seed=1)
+        npt.assert_array_equal(serial["estimates"], parallel["estimates"])
+
+    @pytest.mark.parametrize("num_subsamples, subsample_size", [(0, 100), (10, 1), (10, 601)])
+    def test_invalid_subsamples(self, num_subsamples, subsample_size):
+        with pytest.raises(ValueError):
+            BER(self.data, self.labels).evaluate_subsamples(num_subsamples, subsample_size)
@@ -4,7 +4,7 @@ import warnings
 import numpy as np
 import pytest
 
-from dataeval.metrics import Coverage
+from dataeval.metrics import Coverage, NeighborIndex
 
 
 class TestCoverageUnit:
@@ -49,3 +49,64 @@ class TestCoverageFunctional:
         pvals, dists = metric.evaluate()
         assert pvals[0] == 100
         assert dists[100] == pytest.approx(1.41421356)
+
+    @pytest.mark.parametrize("percent", [0.0, 0.05, 0.5, 1.0])
+    def test_adaptive_largest_radii(self, percent):
+        embs = np.random.default_rng(0).random((200, 3))
+        pvals, crit = Coverage(embs, "adaptive", k=5, percent=np.float64(percent)).evaluate()
+        assert len(pvals) == int(200 * percent)
+        np.testing.assert_array_equal(crit[pvals], np.sort(crit)[::-1][: len(pvals)])
+
+
+class TestCoverageAdd:
+    rng = np.random.default_rng(1)
+    embs = rng.random((300, 3))
+    batch = rng.random((40, 3))
+
+    @pytest.mark.parametrize("radius_type", ["naive", "adaptive"])
+    def test_add_matches_evaluate(self, radius_type):
+        metric = Coverage(self.embs, radius_type, k=5)
+        result = metric.add(self.batch)
+        expected_pvals, expected_crit = Coverage(np.concatenate((self.embs, self.batch)), radius_type, k=5).evaluate()
+        np.testing.assert_allclose(result["crit"], expected_crit)
+        np.testing.assert_array_equal(np.sort(result["uncovered"]), np.sort(expected_pvals))
+        assert len(metric.embeddings) == 340
+
+    def test_add_reports_changes(self):
+        metric = Coverage(self.embs, "naive", k=5)
+        previous, previous_crit = metric.evaluate()
+        result = metric.add(self.batch)
+        np.testing.assert_array_equal(result["newly_uncovered"], np.setdiff1d(result["uncovered"], previous))
+        np.testing.assert_array_equal(result["newly_covered"], np.setdiff1d(previous, result["uncovered"]))
+        decreased = np.flatnonzero(result["crit"][:300] < previous_crit)
+        np.testing.assert_array_equal(result["updated"], decreased)
+
+    def test_add_far_batch(self):
+        metric = Coverage(self.embs, "adaptive", k=5, percent=np.float64(0.1))
+        result = metric.add(self.rng.random((10, 3)) * 100 + 10)
+        assert len(result["updated"]) == 0
+        assert set(result["newly_uncovered"]) == set(range(300, 310))
+
+    def test_add_extends_index(self):
+        index = NeighborIndex(self.embs)
+        metric = Coverage(index, k=5)
+        metric.add(self.batch)
+        assert len(index) == 340
+        assert metric.embeddings is index
+
+    def test_add_multiple_batches(self):
+        metric = Coverage(self.embs, "naive", k=5)
+        for start in range(0, 30, 10):
+            metric.add(self.batch[start : start + 10])
+        result = metric.add(self.batch[30:])
+        expected_crit = Coverage(np.concatenate((self.embs, self.batch)), "naive", k=5).evaluate()[1]
+        np.testing.assert_allclose(result["crit"], expected_crit)
+
+    def test_add_after_parameter_change(self):
+        metric = Coverage(self.embs, "naive", k=20)
+        metric.evaluate()
+        metric.radius_type, metric.k = "adaptive", 5
+        result = metric.add(self.batch)
+        expected = Coverage(self.embs, "adaptive", k=5).add(self.batch)
+        for key in ("newly_uncovered", "newly_covered", "updated", "crit"):
+            np.testing.assert_array_equal(result[key], expected[key])
@@ -31,3 +31,47 @@ class TestDivergence:
         metric = Divergence(even, odd, method)
         result = metric.evaluate()
         assert result == output
+
+    @pytest.mark.parametrize("method", ["MST", "FNN"])
+    def test_divergence_n_jobs(self, method):
+        """Parallel neighbor searches return the same divergence"""
+        rng = np.random.default_rng(0)
+        data_a, data_b = rng.normal(size=(100, 8)), rng.normal(size=(100, 8)) + 0.5
+        serial = Divergence(data_a, data_b, method).evaluate()
+        assert Divergence(data_a, data_b, method, n_jobs=2).evaluate() == serial
+
+    def test_divergence_mst_edges(self):
+        """Errors count the spanning tree edges joining the two datasets"""
+        from dataeval._internal.functional.divergence import divergence_mst
+
+        data = np.array([[0.0], [1.0], [10.0], [11.0], [20.0]])
+        assert divergence_mst(data, np.array([0, 0, 1, 1, 0])) == 2
+        assert divergence_mst(data, np.array([[0], [1], [0], [1], [0]])) == 4
+
+    def test_divergence_fnn_labels(self):
+        """Errors count the samples whose nearest neighbor has the other label, for flat or column labels"""
+        from dataeval._internal.functional.divergence import divergence_fnn
+
+        data = np.array([[0.0], [1.0], [10.0], [11.5], [14.0]])
+        assert divergence_fnn(data, np.array([0, 0, 1, 1, 0])) == 1
+        assert divergence_fnn(data, np.array([[0], [0], [1], [1], [0]])) == 1
+
+    def test_divergence_fnn_directions(self):
+        """Searching each dataset against the other matches the search over both datasets"""
+        from dataeval._internal.functional.divergence import divergence_fnn
+
+        rng = np.random.default_rng(3)
+        data_a, data_b = rng.normal(size=(60, 3)), rng.normal(0.5, size=(40, 3))
+        labels = np.repeat([0, 1], [60, 40])
+        expected = divergence_fnn(np.concatenate((data_a, data_b)), labels)
+        assert Divergence(data_a, data_b, "FNN").evaluate()["error"] == expected
+
+    def test_divergence_fnn_single_sample(self):
+        """A dataset of a single sample has no neighbor within itself"""
+        from dataeval._internal.functional.divergence import divergence_fnn
+
+        rng = np.random.default_rng(4)
+        data_a, data_b = rng.normal(size=(1, 3)), rng.normal(size=(20, 3))
+        expected = divergence_fnn(np.concatenate((data_a, data_b)), np.repeat([0, 1], [1, 20]))
+        assert Divergence(data_a, data_b, "FNN").evaluate()["error"] == expected
+        assert Divergence(data_b, data_a, "FNN").evaluate()["error"] == expected
@@ -0,0 +1,157 @@
+import warnings
+
+import numpy as np
+import pytest
+import scipy.stats
+
+from dataeval._internal.metrics.metadata import MetadataBias
+
+
+@pytest.fixture
+def factors():
+    rng = np.random.default_rng(3)
+    num_samples = 600
+    labels = rng.integers(0, 3, num_samples)
+    return {
+        "class": labels,
+        "color": rng.choice(["red", "green", "blue"], num_samples),
+        "size": rng.normal(size=num_samples),
+        "night": (labels > 0).astype(int),
+        "constant": np.zeros(num_samples),
+    }
+
+
+class TestMetadataBias:
+    def test_contingency_tables(self, factors):
+        bias = MetadataBias(factors, continuous_factor_bins={"size": 4})
+        tables = bias.contingency_tables()
+        assert [t.shape for t in tables] == [(3, 3), (3, 3), (4, 3), (2, 3), (1, 3)]
+        for table in tables:
+            np.testing.assert_array_equal(table.sum(axis=0), np.bincount(factors["class"]))
+        np.testing.assert_array_equal(tables[1][:, 0], [np.sum((factors["color"] == c) & (factors["class"] == 0))
+                                                        for c in ["blue", "green", "red"]])  # fmt: skip
+
+    def test_entropy(self, factors):
+        bias = MetadataBias(factors, continuous_factor_bins={"size": 4})
+        expected = [scipy.stats.entropy(np.bincount(bias.codes[:, i])) for i in range(len(bias.names))]
+        np.testing.assert_allclose(bias.entropy(), expected)
+        normalized = bias.entropy(normalized=True)
+        np.testing.assert_allclose(normalized[:4], np.array(expected[:4]) / np.log([3, 3, 4, 2]))
+        assert normalized[4] == 0
+
+    def test_diversity(self, factors):
+        bias = MetadataBias(factors, continuous_factor_bins={"size": 4})
+        probs = np.bincount(bias.codes[:, 1]) / len(bias.codes)
+        assert bias.diversity()[1] == pytest.approx(1 / np.sum(probs**2) / 3)
+        assert bias.diversity()[4] == 1
+        np.testing.assert_allclose(bias.diversity("shannon"), bias.entropy(normalized=True))
+
+    def test_diversity_by_class(self, factors):
+        bias = MetadataBias(factors, continuous_factor_bins={"size": 4})
+        simpson = bias.diversity_by_class()
+        shannon = bias.diversity_by_class("shannon")
+        assert simpson.shape == shannon.shape == (3, 4)
+        for label in range(3):
+            counts = np.bincount(bias.codes[bias.codes[:, 0] == label, 2], minlength=4)
+            probs = counts / counts.sum()
+            assert simpson[label, 1] == pytest.approx(1 / np.sum(probs**2) / 4)
+            assert shannon[label, 1] == pytest.approx(scipy.stats.entropy(probs) / np.log(4))
+        # Each class has a single value of night
+        np.testing.assert_allclose(shannon[:, 2], 0)
+
+    def test_unknown_diversity(self, factors):
+        with pytest.raises(ValueError):
+            MetadataBias(factors, continuous_factor_bins={"size": 4}).diversity("gini")  # type: ignore
+
+    def test_parity_matches_chi2_contingency(self, factors):
+        bias = MetadataBias(factors, continuous_factor_bins={"size": 4})
+        result = bias.parity()
+        assert result["factor"] == ["color", "size", "night", "constant"]
+        for i, name in enumerate(result["factor"][:3]):
+            table = bias.contingency_tables()[bias.names.index(name)]
+            chi2, p, _, _ = scipy.stats.chi2_contingency(table)
+            assert result["chi_squared"][i] == pytest.approx(chi2)
+            assert result["p_value"][i] == pytest.approx(p)
+        assert result["chi_squared"][3] == 0
+        assert result["p_value"][3] == 1
+
+    def test_parity_yates_correction(self):
+        factors = {"class": [0] * 30 + [1] * 30, "flag": [0] * 20 + [1] * 10 + [0] * 12 + [1] * 18}
+        result = MetadataBias(factors).parity()
+        chi2, p, _, _ = scipy.stats.chi2_contingency([[20, 10], [12, 18]])
+        assert result["chi_squared"][0] == pytest.approx(chi2)
+        assert result["p_value"][0] == pytest.approx(p)
+
+    def test_parity_warns_sparse_factors(self):
+        factors = {"class": [0] * 10 + [1] * 10, "flag": [0] * 8 + [1] * 2 + [0] * 10}
+        with pytest.warns(UserWarning, match="flag"):
+            MetadataBias(factors).parity()
+
+    def test_parity_no_warning(self, factors):
+        bias = MetadataBias(factors, continuous_factor_bins={"size": 2})
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            bias.parity()
+
+    def test_evaluate(self, factors):
+        result = MetadataBias(factors, continuous_factor_bins={"size": 4}).evaluate()
+        assert result["entropy"].shape == result["diversity"].shape == (5,)
+        assert result["diversity_by_class"].shape == (3, 4)
+        assert result["chi_squared"].shape == result["p_value"].shape == (4,)
+
+    def test_missing_class(self, factors):
+        with pytest.raises(ValueError):
+            MetadataBias(factors, class_name="label")
+
+    def test_mismatched_lengths(self, factors):
+        factors["color"] = factors["color"][:-1]
+        with pytest.raises(ValueError):
+            MetadataBias(factors)
+
+    def test_empty_factors(self):
+        with pytest.raises(ValueError, match="at least one sample"):
+            MetadataBias({"class": [], "color": []})
+
+    def test_non_numeric_continuous(self, factors):
+        with pytest.raises(TypeError):
+            MetadataBias(factors, continuous_factor_bins={"color": 3})
+
+
+class TestMetadataMutualInformation:
+    @pytest.fixture
+    def bias(self, factors):
+        return MetadataBias(factors, continuous_factor_bins={"size": 4})
+
+    def test_matches_sklearn(self, factors):
+        from sklearn.feature_selection import mutual_info_classif, mutual_info_regression
+
+        factors["size"] = factors["size"] + factors["class"]
+        factors["width"] = 2 * factors["size"] + np.random.default_rng(0).normal(size=len(factors["size"]))
+        bias = MetadataBias(factors, continuous_factor_bins={"size": 4, "width": 4})
+        mi = bias.mutual_information(normalized=False, seed=0)
+        assert mi.shape == (6, 6)
+        np.testing.assert_allclose(mi, mi.T)
+
+        size, width = factors["size"], factors["width"]
+        expected = mutual_info_regression(size[:, None], width, n_neighbors=5, random_state=0)[0]
+        assert mi[2, 5] == pytest.approx(expected, abs=1e-3)
+        expected = mutual_info_classif(size[:, None], factors["class"], n_neighbors=5, random_state=0)[0]
+        assert mi[0, 2] == pytest.approx(expected, abs=1e-3)
+        expected = mutual_info_classif(factors["night"][:, None], factors["class"], discrete_features=True)[0]  # type: ignore
+        assert mi[0, 3] == pytest.approx(expected)
+
+    def test_diagonal_is_entropy(self, bias):
+        mi = bias.mutual_information(normalized=False)
+        np.testing.assert_allclose(np.diag(mi), bias.entropy())
+
+    def test_normalized(self, bias):
+        mi = bias.mutual_information(seed=0)
+        np.testing.assert_allclose(np.diag(mi)[:4], 1, atol=1e-5)
+        assert np.all(mi >= 0)
+        # Independent factors
+        assert mi[0, 1] < 0.01
+
+    def test_process_pool(self, bias):
+        serial = bias.mutual_information(seed=0)
+        parallel = bias.mutual_information(seed=0, max_workers=2)
+        np.testing.assert_allclose(serial, parallel)
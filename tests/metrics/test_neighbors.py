@@ -0,0 +1,166 @@
+import numpy as np
+import numpy.testing as npt
+import pytest
+
+from dataeval.metrics import BER, Coverage, Divergence, NeighborIndex
+
+
+class TestNeighborIndex:
+    data = np.random.default_rng(0).random((50, 4))
+
+    def test_kneighbors_excludes_self(self):
+        index = NeighborIndex(self.data)
+        distances, indices = index.kneighbors(3)
+        assert distances.shape == indices.shape == (50, 3)
+        assert not (indices == np.arange(50)[:, None]).any()
+        assert (np.diff(distances, axis=1) >= 0).all()
+
+    def test_caches_largest_k(self):
+        index = NeighborIndex(self.data)
+        distances, indices = index.kneighbors(5)
+        assert index.cached_k == 5
+        smaller = index.kneighbors(2)
+        assert index.cached_k == 5
+        npt.assert_array_equal(smaller[0], distances[:, :2])
+        npt.assert_array_equal(smaller[1], indices[:, :2])
+
+    @pytest.mark.parametrize("k", [0, 50])
+    def test_kneighbors_invalid_k(self, k):
+        with pytest.raises(ValueError):
+            NeighborIndex(self.data).kneighbors(k)
+
+    def test_query(self):
+        index = NeighborIndex(self.data)
+        distances, indices = index.query(self.data[:5] + 1e-6, 1)
+        npt.assert_array_equal(indices[:, 0], np.arange(5))
+        assert distances.shape == (5, 1)
+
+    def test_flattens_images(self):
+        index = NeighborIndex(self.data.reshape((50, 2, 2)))
+        assert index.data.shape == (50, 4)
+
+    def test_save_load(self, tmp_path):
+        index = NeighborIndex(self.data)
+        index.kneighbors(4)
+        path = tmp_path / "index.npz"
+        index.save(str(path))
+        loaded = NeighborIndex.load(str(path))
+        assert loaded.cached_k == 4
+        npt.assert_array_equal(loaded.data, self.data)
+        npt.assert_array_equal(loaded.kneighbors(4)[1], index.kneighbors(4)[1])
+
+    def test_save_load_without_cache(self, tmp_path):
+        path = tmp_path / "index.npz"
+        NeighborIndex(self.data).save(str(path))
+        assert NeighborIndex.load(str(path)).cached_k == 0
+
+
+class TestNeighborIndexMetrics:
+    rng = np.random.default_rng(1)
+    data = rng.random((100, 3))
+    labels = rng.integers(0, 3, 100)
+
+    @pytest.mark.parametrize("method, k", [("KNN", 1), ("KNN", 5), ("MST", 1)])
+    def test_ber(self, method, k):
+        index = NeighborIndex(self.data)
+        expected = BER(self.data, self.labels, method, k).evaluate()
+        result = BER(index, self.labels, method, k).evaluate()
+        assert result["ber"] == expected["ber"]
+        assert result["ber_lower"] == expected["ber_lower"]
+        npt.assert_array_equal(result["confusion"], expected["confusion"])
+
+    @pytest.mark.parametrize("method", ["FNN", "MST"])
+    def test_divergence(self, method):
+        a, b = self.data[:50], self.data[50:]
+        expected = Divergence(a, b, method).evaluate()
+        assert Divergence(NeighborIndex(a), NeighborIndex(b), method).evaluate() == expected
+
+    @pytest.mark.parametrize("radius_type", ["naive", "adaptive"])
+    def test_coverage(self, radius_type):
+        expected = Coverage(self.data, radius_type, k=5).evaluate()
+        result = Coverage(NeighborIndex(self.data), radius_type, k=5).evaluate()
+        npt.assert_array_equal(result[0], expected[0])
+        npt.assert_array_equal(result[1], expected[1])
+
+    def test_shared_across_metrics(self):
+        index = NeighborIndex(self.data)
+        Coverage(index, k=5).evaluate()
+        assert index.cached_k == 6
+        BER(index, self.labels, "KNN", 3).evaluate()
+        assert index.cached_k == 6
+
+
+class TestNeighborIndexIVF:
+    rng = np.random.default_rng(2)
+    centers = rng.normal(size=(5, 8)) * 10
+    data = centers[rng.integers(0, 5, 400)] + rng.normal(size=(400, 8))
+
+    def test_invalid_method(self):
+        with pytest.raises(ValueError):
+            NeighborIndex(self.data, method="hnsw")  # type: ignore
+
+    def test_exact_recall(self):
+        assert NeighborIndex(self.data).recall(5, 100) == 1.0
+
+    def test_recall(self):
+        index = NeighborIndex(self.data, method="ivf", n_lists=10, n_probe=3)
+        assert not index.exact
+        assert index.recall(5, 100) > 0.9
+
+    def test_probing_all_lists_is_exact(self):
+        exact = NeighborIndex(self.data).kneighbors(5)
+        approximate = NeighborIndex(self.data, method="ivf", n_lists=10, n_probe=10).kneighbors(5)
+        npt.assert_array_equal(approximate[1], exact[1])
+        npt.assert_allclose(approximate[0], exact[0], rtol=1e-4)
+
+    def test_small_lists_probe_more(self):
+        distances, indices = NeighborIndex(self.data, method="ivf", n_lists=200, n_probe=1).kneighbors(10)
+        assert np.isfinite(distances).all()
+        assert not (indices == np.arange(400)[:, None]).any()
+
+    def test_query(self):
+        index = NeighborIndex(self.data, method="ivf", n_lists=10)
+        indices = index.query(self.data[:5] + 1e-3, 2)[1]
+        npt.assert_array_equal(indices[:, 0], np.arange(5))
+
+    def test_save_load(self, tmp_path):
+        path = str(tmp_path / "index.npz")
+        NeighborIndex(self.data, method="ivf", n_lists=10, n_probe=3).save(path)
+        loaded = NeighborIndex.load(path)
+        assert (loaded.method, loaded.n_lists, loaded.n_probe) == ("ivf", 10, 3)
+
+    def test_metrics(self):
+        labels = self.rng.integers(0, 2, 400)
+        index = NeighborIndex(self.data, method="ivf", n_lists=10, n_probe=10)
+        assert BER(index, labels, "KNN", 3).evaluate()["ber"] == BER(self.data, labels, "KNN", 3).evaluate()["ber"]
+        assert BER(index, labels, "MST").evaluate()["ber"] == BER(self.data, labels, "MST").evaluate()["ber"]
+        npt.assert_allclose(Coverage(index, k=5).evaluate()[1], Coverage(self.data, k=5).evaluate()[1], rtol=1e-4)
+
+
+class TestNeighborIndexAdd:
+    rng = np.random.default_rng(4)
+    data = rng.random((80, 3))
+    batch = rng.random((15, 3))
+
+    @pytest.mark.parametrize("method", ["exact", "ivf"])
+    def test_add_matches_rebuild(self, method):
+        index = NeighborIndex(self.data, method=method, n_lists=4, n_probe=4)
+        index.kneighbors(5)
+        index.add(self.batch)
+        expected = NeighborIndex(np.concatenate((self.data, self.batch))).kneighbors(5)
+        assert len(index) == 95
+        npt.assert_array_equal(index.kneighbors(5)[1], expected[1])
+        npt.assert_allclose(index.kneighbors(5)[0], expected[0], rtol=1e-4)
+
+    def test_add_returns_changed(self):
+        index = NeighborIndex(self.data)
+        before = index.kneighbors(3)[1].copy()
+        changed = index.add(self.batch)
+        after = index.kneighbors(3)[1][:80]
+        npt.assert_array_equal(changed, np.flatnonzero((after != before).any(axis=1)))
+
+    def test_add_single_sample_without_cache(self):
+        index = NeighborIndex(self.data)
+        assert len(index.add(self.batch[:1])) == 0
+        assert index.cached_k == 0
+        assert index.query(self.batch[:1])[1][0, 0] == 80
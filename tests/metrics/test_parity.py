@@ -3,7 +3,7 @@ import warnings
 import numpy as np
 import pytest
 
-from dataeval._internal.metrics.parity import Parity
+from dataeval._internal.metrics.parity import Parity, StreamingParity
 
 
 class MockDistributionDataset:
@@ -180,3 +180,100 @@ class TestLabelIndependenceFunctional:
         assert np.isclose(p, 1)
 
         assert np.isclose(p, 1)
+
+
+class TestParityGroups:
+    rng = np.random.default_rng(0)
+    expected = rng.integers(0, 4, 1000)
+    observed = rng.integers(0, 4, (6, 200))
+
+    def test_rows_match_evaluate(self):
+        result = Parity.evaluate_groups(self.expected, self.observed)
+        np.testing.assert_array_equal(result["group"], np.arange(6))
+        np.testing.assert_array_equal(result["num_observations"], np.full(6, 200))
+        for row, labels in enumerate(self.observed):
+            chisquared, p = Parity(self.expected, labels).evaluate()
+            assert np.isclose(result["chi_squared"][row], chisquared)
+            assert np.isclose(result["p_value"][row], p)
+
+    def test_groups_match_evaluate(self):
+        labels = self.rng.integers(0, 4, 900)
+        groups = np.array(["a", "b", "c"])[self.rng.integers(0, 3, 900)]
+        result = Parity.evaluate_groups(self.expected, labels, groups)
+        np.testing.assert_array_equal(result["group"], ["a", "b", "c"])
+        for name, chisquared in zip(result["group"], result["chi_squared"]):
+            assert np.isclose(chisquared, Parity(self.expected, labels[groups == name]).evaluate()[0])
+
+    def test_class_missing_from_observed(self):
+        expected, observed = np.repeat([0, 1, 2], 10), np.repeat([[0, 1]], 2, axis=0).repeat(15, axis=1)
+        result = Parity.evaluate_groups(expected, observed)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            chisquared, p = Parity(expected, observed[0], num_classes=3).evaluate()
+        np.testing.assert_allclose(result["chi_squared"], chisquared)
+        np.testing.assert_allclose(result["p_value"], p)
+
+    def test_warns_with_not_enough_frequency(self):
+        with pytest.warns(UserWarning):
+            Parity.evaluate_groups(self.expected, self.observed[:, :10])
+
+    @pytest.mark.parametrize(
+        "observed, groups, num_classes",
+        [
+            (np.zeros(10, dtype=int), None, None),
+            (np.zeros(10, dtype=int), np.zeros(5), None),
+            (np.zeros((2, 0), dtype=int), None, None),
+            (np.full((2, 10), 5), None, 4),
+        ],
+    )
+    def test_invalid_inputs(self, observed, groups, num_classes):
+        with pytest.raises(ValueError), warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            Parity.evaluate_groups(self.expected, observed, groups, num_classes)
+
+
+class TestStreamingParity:
+    rng = np.random.default_rng(1)
+    expected = rng.integers(0, 3, 600)
+    observed = rng.integers(0, 3, 450)
+
+    def test_matches_parity(self):
+        metric = StreamingParity()
+        for start in range(0, 600, 100):
+            metric.update(targets=self.expected[start : start + 100])
+        for start in range(0, 450, 100):
+            metric.update(self.observed[start : start + 100])
+        result = metric.compute()
+        chisquared, p = Parity(self.expected, self.observed).evaluate()
+        assert np.isclose(result["chi_squared"], chisquared)
+        assert np.isclose(result["p_value"], p)
+
+    def test_merge_shards(self):
+        shards = [StreamingParity() for _ in range(3)]
+        expected, observed = np.array_split(self.expected, 3), np.array_split(self.observed, 3)
+        for i, shard in enumerate(shards):
+            shard.update(observed[i], expected[i])
+        merged = shards[0].merge(shards[1]).merge(shards[2])
+        np.testing.assert_array_equal(merged.observed_counts, np.bincount(self.observed))
+        np.testing.assert_array_equal(merged.expected_counts, np.bincount(self.expected))
+
+    def test_num_classes(self):
+        metric = StreamingParity(num_classes=3)
+        metric.update(np.repeat([0, 1, 2], 10), np.repeat([0, 1], 15))
+        with pytest.raises(ValueError):
+            StreamingParity().merge(metric).compute()
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            assert np.isinf(metric.compute()["chi_squared"])
+
+    def test_reset(self):
+        metric = StreamingParity()
+        metric.update(self.observed, self.expected)
+        metric.reset()
+        with pytest.raises(ValueError):
+            metric.compute()
+
+    def test_from_counts(self):
+        chisquared, p = Parity.from_counts(np.array([44, 24, 29, 3]), np.array([43, 52, 54, 40])).evaluate()
+        assert np.isclose(chisquared, 228.23515947653874)
+        assert np.isclose(p, 3.3295585338846486e-49)
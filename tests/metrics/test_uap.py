@@ -1,7 +1,17 @@
 import numpy as np
+import pytest
+from sklearn.metrics import average_precision_score
 
 from dataeval._internal.functional.uap import uap
-from dataeval.metrics import UAP
+from dataeval.metrics import UAP, StreamingUAP
+
+
+def _scores(num_samples, num_classes, seed=0):
+    rng = np.random.default_rng(seed)
+    labels = rng.integers(0, num_classes, num_samples)
+    scores = rng.random((num_samples, num_classes))
+    scores[np.arange(num_samples), labels] += 0.5
+    return labels, scores / scores.sum(axis=1, keepdims=True)
 
 
 class TestAPIUAP:
@@ -19,3 +29,62 @@ class TestFunctionalUAP:
         scores = np.zeros((1000, 10), dtype=float)
         value = uap(labels, scores)
         assert value > 0
+
+    @pytest.mark.parametrize("decimals", [None, 1, 2])
+    def test_matches_sklearn(self, decimals):
+        labels, scores = _scores(2000, 7)
+        if decimals is not None:
+            scores = np.round(scores, decimals)
+        expected = average_precision_score(labels, scores, average="weighted")
+        assert uap(labels, scores) == pytest.approx(expected)
+
+    def test_non_contiguous_labels(self):
+        labels, scores = _scores(500, 4)
+        expected = average_precision_score(labels * 3 + 1, scores, average="weighted")
+        assert uap(labels * 3 + 1, scores) == pytest.approx(expected)
+
+    def test_invalid_scores(self):
+        labels, scores = _scores(100, 4)
+        with pytest.raises(ValueError):
+            uap(labels, scores[:, :3])
+        with pytest.raises(ValueError):
+            uap(np.zeros(100), scores[:, :1])
+
+
+class TestStreamingUAP:
+    def test_matches_binned_scores(self):
+        labels, scores = _scores(3000, 5)
+        metric = StreamingUAP(num_bins=20)
+        for batch in range(0, 3000, 512):
+            metric.update(scores[batch : batch + 512], labels[batch : batch + 512])
+        binned = np.floor(scores * 20)
+        assert metric.compute()["uap"] == pytest.approx(uap(labels, binned))
+
+    def test_approximates_exact(self):
+        labels, scores = _scores(3000, 5)
+        metric = StreamingUAP()
+        metric.update(scores, labels)
+        assert metric.compute()["uap"] == pytest.approx(uap(labels, scores), abs=5e-3)
+
+    def test_merge(self):
+        labels, scores = _scores(1000, 3)
+        full, first, second = StreamingUAP(), StreamingUAP(), StreamingUAP()
+        full.update(scores, labels)
+        first.update(scores[:400], labels[:400])
+        second.update(scores[400:], labels[400:])
+        assert first.merge(second).compute()["uap"] == full.compute()["uap"]
+
+    def test_reset(self):
+        labels, scores = _scores(100, 3)
+        metric = StreamingUAP()
+        metric.update(scores, labels)
+        metric.reset()
+        with pytest.raises(ValueError):
+            metric.compute()
+
+    def test_mismatched_classes(self):
+        labels, scores = _scores(100, 3)
+        metric = StreamingUAP()
+        metric.update(scores, labels)
+        with pytest.raises(ValueError):
+            metric.update(scores[:, :2], labels)
@@ -1,12 +1,21 @@
 import numpy as np
 import pytest
+from scipy.spatial.distance import cdist
+from sklearn.neighbors import NearestNeighbors
 
+from dataeval._internal.functional.distance import blocked_distances, blocked_kneighbors, pairwise_distances
 from dataeval._internal.functional.utils import (
+    DisjointSet,
+    compute_neighbors,
     edge_filter,
     get_bitdepth,
     get_classes_counts,
+    minimum_spanning_tree,
     normalize_image_shape,
+    prim_mst,
     rescale,
+    single_linkage,
+    sparse_mst,
 )
 
 
@@ -94,3 +103,191 @@ def test_edge_filter():
     image = np.zeros((28, 28))
     edge = edge_filter(image, 0.5)
     np.testing.assert_array_equal(image + 0.5, edge)
+
+
+def test_disjoint_set_union_pairs():
+    ds = DisjointSet(6)
+    ds.union([0, 0, 1, 3, 3, 4], [1, 2, 2, 4, 5, 5])
+    assert ds.groups() == [[0, 1, 2], [3, 4, 5]]
+    assert ds.find(2) == ds.find(0)
+    assert ds.find(3) != ds.find(0)
+
+
+def test_disjoint_set_groups_min_size():
+    ds = DisjointSet(5)
+    ds.union([3], [1])
+    assert ds.groups() == [[1, 3]]
+    assert ds.groups(min_size=1) == [[0], [1, 3], [2], [4]]
+    assert ds.groups([1, 3, 4], min_size=1) == [[1, 3], [4]]
+
+
+def test_disjoint_set_matches_connected_components():
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+
+    n, pairs = 1000, 800
+    rng = np.random.default_rng(0)
+    a, b = rng.integers(0, n, pairs), rng.integers(0, n, pairs)
+    ds = DisjointSet(n)
+    for i in range(0, pairs, 100):
+        ds.union(a[i : i + 100], b[i : i + 100])
+    _, labels = connected_components(coo_matrix((np.ones(pairs), (a, b)), shape=(n, n)), directed=False)
+    roots = ds.find(np.arange(n))
+    # Both labelings describe the same partition
+    assert len(np.unique(roots)) == len(np.unique(labels))
+    assert len(np.unique(np.stack([roots, labels]), axis=1)[0]) == len(np.unique(roots))
+    # Union by rank keeps the forest shallow
+    assert ds.rank.max() <= np.log2(n)
+
+
+@pytest.mark.parametrize("metric", ["euclidean", "cosine", "cityblock"])
+def test_pairwise_distances(metric):
+    rng = np.random.default_rng(0)
+    a, b = rng.normal(size=(50, 8)), rng.normal(size=(30, 8))
+    np.testing.assert_allclose(pairwise_distances(a, b, metric), cdist(a, b, metric), rtol=1e-4, atol=1e-5)
+    dist = pairwise_distances(a, metric=metric, block_size=7)
+    assert dist.dtype == np.float32
+    np.testing.assert_array_equal(dist, dist.T)
+    np.testing.assert_allclose(dist, cdist(a, a, metric), rtol=1e-4, atol=1e-5)
+
+
+def test_pairwise_distances_precision_near_zero():
+    """Duplicates far from the origin keep exact and tiny distances"""
+    a = np.random.default_rng(0).normal(size=(20, 4)) + 1000
+    a[1], a[3] = a[0], a[2] + 1e-3
+    dist = pairwise_distances(a)
+    assert dist[0, 1] == 0
+    assert dist[2, 3] == pytest.approx(2e-3, rel=1e-2)
+
+
+def test_blocked_distances_blocks():
+    a = np.random.default_rng(0).normal(size=(10, 3))
+    blocks = list(blocked_distances(a, block_size=4))
+    assert [rows for rows, _ in blocks] == [slice(0, 4), slice(4, 8), slice(8, 10)]
+    assert [block.shape for _, block in blocks] == [(4, 10), (4, 10), (2, 10)]
+
+
+def test_single_linkage_matches_scipy():
+    from scipy.cluster.hierarchy import linkage
+    from scipy.spatial.distance import pdist, squareform
+
+    x = np.round(np.random.default_rng(0).normal(size=(100, 2)), 1)
+    dist = pdist(x)
+    rows, cols, weights = prim_mst(squareform(dist))
+    np.testing.assert_array_equal(single_linkage(rows, cols, weights, len(x)), linkage(dist))
+
+
+def test_sparse_mst_matches_prim():
+    from scipy.spatial.distance import pdist, squareform
+
+    x = np.random.default_rng(0).normal(size=(50, 3))
+    x[1] = x[0]
+    dist = squareform(pdist(x))
+    rows, cols = np.triu_indices(len(x), 1)
+    tree_rows, tree_cols, weights = sparse_mst(rows, cols, dist[rows, cols], len(x))
+    assert len(weights) == len(x) - 1
+    assert np.count_nonzero(weights == 0) == 1
+    np.testing.assert_allclose(weights.sum(), prim_mst(dist)[2].sum())
+    np.testing.assert_array_equal(dist[tree_rows, tree_cols], weights)
+
+
+def test_sparse_mst_disconnected():
+    with pytest.raises(ValueError):
+        sparse_mst(np.array([0]), np.array([1]), np.array([1.0]), 3)
+
+
+@pytest.mark.parametrize("k", [1, 3, 10])
+def test_minimum_spanning_tree_exact(k):
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+    from scipy.spatial.distance import pdist, squareform
+
+    rng = np.random.default_rng(0)
+    # Separated clusters and repeated samples exercise the queries outside of the k nearest neighbors
+    x = np.concatenate(
+        [rng.normal(size=(100, 3)), rng.normal(size=(100, 3)) + 50, np.repeat(rng.normal(size=(5, 3)), 8, 0)]
+    )
+    rows, cols, weights = minimum_spanning_tree(x.reshape((len(x), 3, 1)), k=k)
+    assert len(weights) == len(x) - 1
+    graph = coo_matrix((np.ones(len(rows)), (rows, cols)), shape=(len(x), len(x)))
+    assert connected_components(graph)[0] == 1
+    np.testing.assert_allclose(np.linalg.norm(x[rows] - x[cols], axis=1), weights)
+    np.testing.assert_allclose(np.sort(weights), np.sort(prim_mst(squareform(pdist(x)))[2]))
+
+
+def test_minimum_spanning_tree_duplicates():
+    from scipy.spatial.distance import pdist, squareform
+
+    rng = np.random.default_rng(1)
+    groups = rng.normal(size=(40, 4))
+    x = np.concatenate([np.repeat(groups, 6, 0), groups[:10] + rng.normal(scale=1e-6, size=(10, 4))])
+    rows, cols, weights = minimum_spanning_tree(x, k=3)
+    assert np.sum(weights == 0) == 200
+    np.testing.assert_array_equal(np.linalg.norm(x[rows] - x[cols], axis=1) == 0, weights == 0)
+    np.testing.assert_allclose(np.sort(weights), np.sort(prim_mst(squareform(pdist(x)))[2]), atol=1e-12)
+
+
+def test_minimum_spanning_tree_small():
+    assert all(len(a) == 0 for a in minimum_spanning_tree(np.zeros((1, 2))))
+    rows, cols, weights = minimum_spanning_tree(np.array([[0.0, 0.0], [3.0, 4.0]]))
+    assert {rows[0], cols[0]} == {0, 1}
+    assert weights[0] == 5
+
+
+def test_minimum_spanning_tree_n_jobs():
+    x = np.random.default_rng(0).normal(size=(300, 4))
+    x[150:] += 20
+    serial = minimum_spanning_tree(x, k=3)
+    parallel = minimum_spanning_tree(x, k=3, n_jobs=-1)
+    np.testing.assert_allclose(np.sort(serial[2]), np.sort(parallel[2]))
+
+
+@pytest.mark.parametrize("metric", ["euclidean", "cosine", "cityblock"])
+def test_blocked_kneighbors_matches_sklearn(metric):
+    rng = np.random.default_rng(0)
+    a, b = rng.random((60, 20)), rng.random((80, 20))
+    expected_dist, expected_ind = NearestNeighbors(n_neighbors=4, metric=metric, algorithm="brute").fit(b).kneighbors(a)
+    dist, ind = blocked_kneighbors(a, b, 4, metric=metric, max_bytes=1024)
+    np.testing.assert_array_equal(ind, expected_ind)
+    np.testing.assert_allclose(dist, expected_dist, rtol=1e-4, atol=1e-5)
+
+
+def test_blocked_kneighbors_excludes_self():
+    x = np.random.default_rng(1).random((50, 20))
+    expected_dist, expected_ind = NearestNeighbors(n_neighbors=3).fit(x).kneighbors()
+    dist, ind = blocked_kneighbors(x, k=3, max_bytes=1024, n_jobs=2)
+    np.testing.assert_array_equal(ind, expected_ind)
+    np.testing.assert_allclose(dist, expected_dist, rtol=1e-4)
+
+
+def test_blocked_kneighbors_sorted_reference():
+    import tracemalloc
+
+    rng = np.random.default_rng(5)
+    # Reference sorted by cluster, so that the first columns of every block are far from most queries
+    b = np.concatenate([rng.normal(size=(500, 16)) + 10 * i for i in range(8)]).astype(np.float32)
+    a = b[rng.permutation(len(b))[:400]]
+    tracemalloc.start()
+    dist, ind = blocked_kneighbors(a, b, 5, max_bytes=2**22)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    assert peak < 2**22
+    expected_dist, expected_ind = NearestNeighbors(n_neighbors=5).fit(b).kneighbors(a)
+    np.testing.assert_array_equal(ind, expected_ind)
+    np.testing.assert_allclose(dist, expected_dist, rtol=1e-4, atol=1e-5)
+
+
+def test_blocked_kneighbors_all_samples():
+    a, b = np.random.default_rng(2).random((5, 3)), np.random.default_rng(3).random((4, 3))
+    dist, ind = blocked_kneighbors(a, b, 4)
+    assert sorted(ind[0]) == [0, 1, 2, 3]
+    assert (np.diff(dist, axis=1) >= 0).all()
+    with pytest.raises(ValueError):
+        blocked_kneighbors(b, k=4)
+
+
+@pytest.mark.parametrize("algorithm", ["auto", "brute", "kd_tree"])
+def test_compute_neighbors(algorithm):
+    x = np.random.default_rng(4).random((40, 20))
+    expected = NearestNeighbors(n_neighbors=2).fit(x).kneighbors(x)[1][:, 1]
+    np.testing.assert_array_equal(compute_neighbors(x, x, algorithm=algorithm), expected)